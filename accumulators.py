@@ -0,0 +1,379 @@
+"""
+Author Student ID: A00316036
+
+Description: This module provides mergeable online accumulators of the moments of a numerical column and of the
+co-moments of two numerical columns. They absorb rows one at a time or in batches and two partial accumulators merge
+exactly (Welford/Chan/Pebay updates), so statistics of streams or shards never need the whole column in memory.
+"""
+
+from math import nan, sqrt
+
+
+class MomentAccumulator:
+    """
+    An accumulator of the count, extremes, mean and second and third central moments of a numerical column
+
+    Attributes
+    ----------
+    count : int
+        The number of values absorbed
+    mean : float
+        The mean of the values absorbed
+    m2 : float
+        The sum of the squared deviations from the mean
+    m3 : float
+        The sum of the cubed deviations from the mean
+    minimum : float
+        The smallest value absorbed, None if there is none
+    maximum : float
+        The largest value absorbed, None if there is none
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+        self.minimum = None
+        self.maximum = None
+
+    @classmethod
+    def from_values(cls, values):
+        """
+        Builds the accumulator of a batch of values using two passes over the batch
+
+        Parameters
+        ----------
+        values : list
+            A list containing numeric values
+
+        Returns
+        -------
+        MomentAccumulator
+            The accumulator of the batch
+        """
+        accumulator = cls()
+        count = len(values)
+        if count == 0:
+            return accumulator
+        mean = sum(values) / count
+        deviations = [value - mean for value in values]
+        accumulator.count = count
+        accumulator.mean = mean
+        accumulator.m2 = sum(deviation * deviation for deviation in deviations)
+        accumulator.m3 = sum(deviation * deviation * deviation for deviation in deviations)
+        accumulator.minimum = min(values)
+        accumulator.maximum = max(values)
+        return accumulator
+
+    def update(self, value):
+        """
+        Absorbs one value
+
+        Parameters
+        ----------
+        value : float
+            The value to be absorbed
+
+        Returns
+        -------
+        None - default
+        """
+        self.merge(MomentAccumulator.from_values([value]))
+
+    def update_batch(self, values):
+        """
+        Absorbs a batch of values
+
+        Parameters
+        ----------
+        values : list
+            A list containing numeric values
+
+        Returns
+        -------
+        None - default
+        """
+        self.merge(MomentAccumulator.from_values(values))
+
+    def merge(self, other):
+        """
+        Merges another accumulator into this one, as if its values had been absorbed by this one
+
+        Parameters
+        ----------
+        other : MomentAccumulator
+            The accumulator to be merged
+
+        Returns
+        -------
+        None - default
+        """
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.m2, self.m3 = other.count, other.mean, other.m2, other.m3
+            self.minimum, self.maximum = other.minimum, other.maximum
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.m3 += other.m3 + delta ** 3 * self.count * other.count * (self.count - other.count) / count ** 2 + \
+            3 * delta * (self.count * other.m2 - other.count * self.m2) / count
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    def get_mean(self):
+        """
+        Returns the mean of the values absorbed
+
+        Returns
+        -------
+        float
+            The mean
+        """
+        return self.mean
+
+    def get_variance(self):
+        """
+        Returns the sample variance of the values absorbed
+
+        Returns
+        -------
+        float
+            The sample variance, 0 for fewer than two values
+        """
+        return self.m2 / (self.count - 1) if self.count > 1 else 0
+
+    def get_standard_deviation(self):
+        """
+        Returns the sample standard deviation of the values absorbed
+
+        Returns
+        -------
+        float
+            The sample standard deviation, 0 for fewer than two values
+        """
+        return sqrt(self.get_variance())
+
+    def get_skewness(self):
+        """
+        Returns the moment coefficient of skewness of the values absorbed
+
+        Returns
+        -------
+        float
+            The skewness, 0 if the values do not vary
+        """
+        return sqrt(self.count) * self.m3 / self.m2 ** 1.5 if self.m2 else 0
+
+    def to_dict(self):
+        """
+        Returns the state of the accumulator as a JSON-serialisable dictionary
+
+        Returns
+        -------
+        dict
+            A dictionary with the attribute names as keys and their values as values
+        """
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, state):
+        """
+        Rebuilds an accumulator from the state returned by to_dict
+
+        Parameters
+        ----------
+        state : dict
+            A dictionary with the attribute names as keys and their values as values
+
+        Returns
+        -------
+        MomentAccumulator
+            The rebuilt accumulator
+        """
+        accumulator = cls()
+        vars(accumulator).update(state)
+        return accumulator
+
+
+class CoMomentAccumulator:
+    """
+    An accumulator of the means, second central moments and co-moment of two numerical columns
+
+    Attributes
+    ----------
+    count : int
+        The number of pairs of values absorbed
+    x_mean : float
+        The mean of the x values
+    y_mean : float
+        The mean of the y values
+    x_m2 : float
+        The sum of the squared deviations of the x values
+    y_m2 : float
+        The sum of the squared deviations of the y values
+    co_moment : float
+        The sum of the products of the x and y deviations
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.x_mean = 0.0
+        self.y_mean = 0.0
+        self.x_m2 = 0.0
+        self.y_m2 = 0.0
+        self.co_moment = 0.0
+
+    @classmethod
+    def from_values(cls, x_values, y_values):
+        """
+        Builds the accumulator of a batch of pairs of values using two passes over the batch
+
+        Parameters
+        ----------
+        x_values : list
+            A list containing numeric values
+        y_values : list
+            A list containing numeric values, paired with the x values by position
+
+        Returns
+        -------
+        CoMomentAccumulator
+            The accumulator of the batch
+        """
+        accumulator = cls()
+        count = len(x_values)
+        if count == 0:
+            return accumulator
+        x_mean = sum(x_values) / count
+        y_mean = sum(y_values) / count
+        x_deviations = [x - x_mean for x in x_values]
+        y_deviations = [y - y_mean for y in y_values]
+        accumulator.count = count
+        accumulator.x_mean = x_mean
+        accumulator.y_mean = y_mean
+        accumulator.x_m2 = sum(x * x for x in x_deviations)
+        accumulator.y_m2 = sum(y * y for y in y_deviations)
+        accumulator.co_moment = sum(x * y for x, y in zip(x_deviations, y_deviations))
+        return accumulator
+
+    def update(self, x, y):
+        """
+        Absorbs one pair of values
+
+        Parameters
+        ----------
+        x : float
+            The x value
+        y : float
+            The y value
+
+        Returns
+        -------
+        None - default
+        """
+        self.merge(CoMomentAccumulator.from_values([x], [y]))
+
+    def update_batch(self, x_values, y_values):
+        """
+        Absorbs a batch of pairs of values
+
+        Parameters
+        ----------
+        x_values : list
+            A list containing numeric values
+        y_values : list
+            A list containing numeric values, paired with the x values by position
+
+        Returns
+        -------
+        None - default
+        """
+        self.merge(CoMomentAccumulator.from_values(x_values, y_values))
+
+    def merge(self, other):
+        """
+        Merges another accumulator into this one, as if its pairs had been absorbed by this one
+
+        Parameters
+        ----------
+        other : CoMomentAccumulator
+            The accumulator to be merged
+
+        Returns
+        -------
+        None - default
+        """
+        if other.count == 0:
+            return
+        if self.count == 0:
+            vars(self).update(vars(other))
+            return
+        count = self.count + other.count
+        x_delta = other.x_mean - self.x_mean
+        y_delta = other.y_mean - self.y_mean
+        weight = self.count * other.count / count
+        self.co_moment += other.co_moment + x_delta * y_delta * weight
+        self.x_m2 += other.x_m2 + x_delta ** 2 * weight
+        self.y_m2 += other.y_m2 + y_delta ** 2 * weight
+        self.x_mean += x_delta * other.count / count
+        self.y_mean += y_delta * other.count / count
+        self.count = count
+
+    def get_covariance(self):
+        """
+        Returns the sample covariance of the pairs absorbed
+
+        Returns
+        -------
+        float
+            The sample covariance, 0 for fewer than two pairs
+        """
+        return self.co_moment / (self.count - 1) if self.count > 1 else 0
+
+    def get_correlation(self):
+        """
+        Returns the Pearson correlation of the pairs absorbed
+
+        Returns
+        -------
+        float
+            The correlation between the x and y values, NaN if either of them is constant
+        """
+        if self.x_m2 == 0 or self.y_m2 == 0:
+            return nan
+        return self.co_moment / (sqrt(self.x_m2) * sqrt(self.y_m2))
+
+    def to_dict(self):
+        """
+        Returns the state of the accumulator as a JSON-serialisable dictionary
+
+        Returns
+        -------
+        dict
+            A dictionary with the attribute names as keys and their values as values
+        """
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, state):
+        """
+        Rebuilds an accumulator from the state returned by to_dict
+
+        Parameters
+        ----------
+        state : dict
+            A dictionary with the attribute names as keys and their values as values
+
+        Returns
+        -------
+        CoMomentAccumulator
+            The rebuilt accumulator
+        """
+        accumulator = cls()
+        vars(accumulator).update(state)
+        return accumulator
@@ -2,11 +2,48 @@
 Author Student ID: A00316036
 
 Description: This module provides user-defined functions to calculate and display Numerical and Categorical Analysis
-and their Visualizations based on the user's choice.
+and their Visualizations based on the user's choice. The statistics are read from the shared result cache, so going
+back and forth between the menus does not compute them again.
 """
 
-from math import sqrt
-from matplotlib_visualisations import draw_histogram, draw_numerical_box_plot, draw_scatter_plot, draw_pie_chart, draw_bar_chart, draw_categorical_box_plot
+from frequency_table import FrequencyTable
+from result_cache import result_cache, get_cached_statistic
+from statistics_backends import get_backend, build_summary_statistics
+from matplotlib_visualisations import draw_histogram, draw_numerical_box_plot, draw_scatter_plot, draw_pie_chart, draw_bar_chart, draw_categorical_box_plot, \
+    draw_correlation_heatmap, display_export_status
+
+# Plurals of the categorical column names not formed by adding an s
+CATEGORY_PLURALS = {"Country": "Countries", "Institution Name": "Institutions"}
+
+
+def get_summary_statistics(values_list, moments=None, sketch=None):
+    """
+    Calculates every summary statistic of the list of values using a single sort and a single accumulation pass
+
+    Parameters
+    ----------
+    values_list : list
+        A list containing numeric values
+    moments : MomentAccumulator
+        The already accumulated moments of the values, replacing the accumulation pass if given
+    sketch : QuantileSketch
+        The quantile sketch of the values, replacing the sort if given along with the moments
+
+    Returns
+    -------
+    dict
+        A dictionary with the statistic names (count, minimum, maximum, mean, median, mode, range,
+        inter_quartile_range, standard_deviation, mode_skewness and median_skewness) as keys and their values as values
+    """
+    if moments is None:
+        return get_cached_statistic("get_summary_statistics", values_list)
+    if sketch is None:
+        lower_quartile, median, upper_quartile = get_cached_statistic("get_quartiles", values_list)
+    else:
+        lower_quartile, median, upper_quartile = sketch.get_quartiles()
+    return build_summary_statistics(moments.count, moments.minimum, moments.maximum, moments.get_mean(), median,
+                                    get_mode(values_list), upper_quartile - lower_quartile,
+                                    moments.get_standard_deviation())
 
 
 def get_mean(values_list):
@@ -23,7 +60,7 @@ def get_mean(values_list):
     float
         The mean of the provided list of values
     """
-    return sum(values_list) / len(values_list)
+    return get_cached_statistic("get_mean", values_list)
 
 
 def get_median(values_list):
@@ -40,12 +77,7 @@ def get_median(values_list):
     float
         The median of the provided list of values
     """
-    sorted_list = sorted(values_list)
-    mid_index = int(len(sorted_list) / 2)
-    if len(sorted_list) % 2 != 0:
-        return sorted_list[mid_index]
-    else:
-        return (sorted_list[mid_index - 1] + sorted_list[mid_index]) / 2
+    return get_cached_statistic("get_median", values_list)
 
 
 def get_mode(values_list):
@@ -60,11 +92,9 @@ def get_mode(values_list):
     Returns
     -------
     float
-        The mode of the provided list of values
+        The mode of the provided list of values, the smallest one if several values are equally frequent
     """
-    distinct_values = list(set(values_list))
-    frequencies = [values_list.count(value) for value in distinct_values]
-    return distinct_values[frequencies.index(max(frequencies))]
+    return get_cached_statistic("get_mode", values_list)
 
 
 def get_range(values_list):
@@ -81,7 +111,7 @@ def get_range(values_list):
     float
         The range of the provided list of values
     """
-    return max(values_list) - min(values_list)
+    return get_cached_statistic("get_range", values_list)
 
 
 def get_inter_quartile_range(values_list):
@@ -98,14 +128,7 @@ def get_inter_quartile_range(values_list):
     float
         The Inter quartile range of the provided list of values
     """
-    sorted_list = sorted(values_list)
-    mid_index = int(len(sorted_list) / 2)
-    lower_half = sorted_list[:mid_index]
-    if len(sorted_list) % 2 != 0:
-        upper_half = sorted_list[mid_index + 1:]
-    else:
-        upper_half = sorted_list[mid_index:]
-    return get_median(upper_half) - get_median(lower_half)
+    return get_summary_statistics(values_list)["inter_quartile_range"]
 
 
 def get_standard_deviation(values_list):
@@ -122,9 +145,7 @@ def get_standard_deviation(values_list):
     float
         The standard deviation of the provided list of values
     """
-    mean = get_mean(values_list)
-    squared_deviations = [(value - mean) ** 2 for value in values_list]
-    return sqrt(sum(squared_deviations) / (len(values_list) - 1))
+    return get_summary_statistics(values_list)["standard_deviation"]
 
 
 def get_mode_skewness(values_list):
@@ -141,7 +162,7 @@ def get_mode_skewness(values_list):
     float
         The mode skewness of the provided list of values
     """
-    return (get_mean(values_list) - get_mode(values_list)) / get_standard_deviation(values_list)
+    return get_summary_statistics(values_list)["mode_skewness"]
 
 
 def get_median_skewness(values_list):
@@ -158,10 +179,10 @@ def get_median_skewness(values_list):
     float
         The median skewness of the provided list of values
     """
-    return (3 * (get_mean(values_list) - get_median(values_list))) / get_standard_deviation(values_list)
+    return get_summary_statistics(values_list)["median_skewness"]
 
 
-def display_numerical_analysis(title, values_list):
+def display_numerical_analysis(title, values_list, moments=None, sketch=None):
     """
     Performs numerical analysis on the given list of values corresponding to a numerical column
 
@@ -171,25 +192,54 @@ def display_numerical_analysis(title, values_list):
         The title of the numerical column whose values are to be analysed
     values_list : list
         A list containing numeric values
+    moments : MomentAccumulator
+        The already accumulated moments of the values, if any
+    sketch : QuantileSketch
+        The quantile sketch of the values, if any
 
     Returns
     -------
     None - default
     """
+    summary = get_summary_statistics(values_list, moments, sketch)
     print(title)
     print("-" * len(title))
-    print(f"Number of scores: {len(values_list)}")
-    print(f"Average: {sum(values_list) / len(values_list):.2f}")
-    print(f"Minimum: {min(values_list)}")
-    print(f"Maximum: {max(values_list)}")
-    print(f"Mean: {get_mean(values_list):.2f}")
-    print(f"Median: {get_median(values_list):.2f}")
-    print(f"Mode: {get_mode(values_list)}")
-    print(f"Range: {get_range(values_list)}")
-    print(f"Inter-quartile range: {get_inter_quartile_range(values_list):.2f}")
-    print(f"Standard deviation: {get_standard_deviation(values_list):.2f}")
-    print(f"Mode Skewness: {get_mode_skewness(values_list):.2f}")
-    print(f"Median Skewness: {get_median_skewness(values_list):.2f}")
+    print(f"Number of scores: {summary['count']}")
+    print(f"Average: {summary['mean']:.2f}")
+    print(f"Minimum: {summary['minimum']}")
+    print(f"Maximum: {summary['maximum']}")
+    print(f"Mean: {summary['mean']:.2f}")
+    print(f"Median: {summary['median']:.2f}")
+    print(f"Mode: {summary['mode']}")
+    print(f"Range: {summary['range']}")
+    print(f"Inter-quartile range: {summary['inter_quartile_range']:.2f}")
+    print(f"Standard deviation: {summary['standard_deviation']:.2f}")
+    print(f"Mode Skewness: {summary['mode_skewness']:.2f}")
+    print(f"Median Skewness: {summary['median_skewness']:.2f}")
+    if moments is not None and sketch is not None and not sketch.is_exact():
+        print(f"Median, Inter-quartile range and Median Skewness are approximate (rank error within "
+              f"{sketch.get_error_bound():.3%} of the scores)")
+
+
+def get_box_plot_statistics(values_list, sketch=None):
+    """
+    Calculates the statistics the box of the list of values is drawn from
+
+    Parameters
+    ----------
+    values_list : list
+        A list containing numeric values
+    sketch : QuantileSketch
+        The quantile sketch of the values, replacing the sort if given
+
+    Returns
+    -------
+    dict
+        A dictionary in the format of matplotlib.axes.Axes.bxp
+    """
+    if sketch is None:
+        return get_cached_statistic("get_box_plot_statistics", values_list)
+    return sketch.get_box_plot_statistics()
 
 
 def get_correlation(x_values, y_values):
@@ -208,17 +258,10 @@ def get_correlation(x_values, y_values):
     float
         The correlation between the two provided lists of values
     """
-    x_mean = get_mean(x_values)
-    y_mean = get_mean(y_values)
-    x_deviations = [(x - x_mean) for x in x_values]
-    y_deviations = [(y - y_mean) for y in y_values]
-    xy_deviations = [x * y for (x, y) in zip(x_deviations, y_deviations)]
-    x_squared_deviations = [x ** 2 for x in x_deviations]
-    y_squared_deviations = [y ** 2 for y in y_deviations]
-    return sum(xy_deviations) / (sqrt(sum(x_squared_deviations)) * sqrt(sum(y_squared_deviations)))
+    return get_cached_statistic("get_correlation", x_values, y_values)
 
 
-def display_correlation(academic_reputation_scores, overall_scores):
+def display_correlation(academic_reputation_scores, overall_scores, co_moments=None):
     """
     Calculates and displays the correlation between two numerical columns using their lists of values
 
@@ -228,18 +271,71 @@ def display_correlation(academic_reputation_scores, overall_scores):
         A list containing Academic Reputation Scores
     overall_scores : list
         A list containing Overall Scores
+    co_moments : CoMomentAccumulator
+        The already accumulated co-moments of the two columns, replacing the pass over the lists if given
 
     Returns
     -------
     None - default
     """
-    print(
-        f"Correlation between Academic Reputation Scores and Overall Scores: {get_correlation(academic_reputation_scores, overall_scores):.3f}")
+    correlation = get_correlation(academic_reputation_scores, overall_scores) if co_moments is None else \
+        co_moments.get_correlation()
+    print(f"Correlation between Academic Reputation Scores and Overall Scores: {correlation:.3f}")
 
 
-def analyse_numerical_data(academic_reputation_scores, overall_scores):
+def get_correlation_matrix(numerical_columns_dict):
     """
-    Perform numerical analysis on the two numerical columns using their lists of values
+    Calculates the Correlation between every pair of numerical columns in a single pass over each column
+
+    Parameters
+    ----------
+    numerical_columns_dict : dict
+        A dictionary with numerical column names as keys and their lists of values as values
+
+    Returns
+    -------
+    dict
+        A dictionary with the column names as keys and, as values, dictionaries with the column names as keys and the
+        correlation of the two columns as values (nan if a column is constant)
+    """
+    column_names = list(numerical_columns_dict)
+    columns = tuple(numerical_columns_dict.values())
+    backend = get_backend()
+    correlation_matrix = result_cache.get_result(f"{backend.name}.get_correlation_matrix", columns,
+                                                 lambda: backend.get_correlation_matrix(list(columns)))
+    return {row_name: dict(zip(column_names, correlations))
+            for row_name, correlations in zip(column_names, correlation_matrix)}
+
+
+def display_correlation_matrix(correlation_matrix):
+    """
+    Displays the correlation matrix as a table, the columns being numbered after the rows
+
+    Parameters
+    ----------
+    correlation_matrix : dict
+        A dictionary with the column names as keys and dictionaries of their correlation with every column as values
+
+    Returns
+    -------
+    None - default
+    """
+    column_names = list(correlation_matrix)
+    row_labels = [f"({number}) {column}" for number, column in enumerate(column_names, 1)]
+    label_width = max(len(label) for label in row_labels)
+    print("Correlation matrix")
+    print("------------------")
+    print(" " * label_width + "".join(f"{f'({number})':>8}" for number in range(1, len(column_names) + 1)))
+    for row_label, row_name in zip(row_labels, column_names):
+        print(f"{row_label:<{label_width}}" + "".join(f"{correlation_matrix[row_name][column]:>8.3f}"
+                                                        for column in column_names))
+
+
+def display_numerical_data_analysis(academic_reputation_scores, overall_scores, academic_reputation_moments=None,
+                                      overall_moments=None, co_moments=None, academic_reputation_sketch=None,
+                                      overall_sketch=None, correlation_matrix=None):
+    """
+    Displays the numerical analysis of the two numerical columns using their lists of values
 
     Parameters
     ----------
@@ -247,6 +343,18 @@ def analyse_numerical_data(academic_reputation_scores, overall_scores):
         A list containing Academic Reputation Scores
     overall_scores : list
         A list containing Overall Scores
+    academic_reputation_moments : MomentAccumulator
+        The already accumulated moments of the Academic Reputation Scores, if any
+    overall_moments : MomentAccumulator
+        The already accumulated moments of the Overall Scores, if any
+    co_moments : CoMomentAccumulator
+        The already accumulated co-moments of the Academic Reputation Scores and Overall Scores, if any
+    academic_reputation_sketch : QuantileSketch
+        The quantile sketch of the Academic Reputation Scores, if any
+    overall_sketch : QuantileSketch
+        The quantile sketch of the Overall Scores, if any
+    correlation_matrix : dict
+        The correlation matrix of the numerical columns, displayed after the correlation if given
 
     Returns
     -------
@@ -258,11 +366,51 @@ def analyse_numerical_data(academic_reputation_scores, overall_scores):
     print("---------------------------")
     print()
 
-    display_numerical_analysis("Academic reputation (Score)", academic_reputation_scores)
+    display_numerical_analysis("Academic reputation (Score)", academic_reputation_scores, academic_reputation_moments,
+                               academic_reputation_sketch)
     print()
-    display_numerical_analysis("Overall (Score)", overall_scores)
+    display_numerical_analysis("Overall (Score)", overall_scores, overall_moments, overall_sketch)
     print()
-    display_correlation(academic_reputation_scores, overall_scores)
+    display_correlation(academic_reputation_scores, overall_scores, co_moments)
+    if correlation_matrix is not None:
+        print()
+        display_correlation_matrix(correlation_matrix)
+
+
+def analyse_numerical_data(academic_reputation_scores, overall_scores, academic_reputation_moments=None,
+                           overall_moments=None, co_moments=None, academic_reputation_sketch=None, overall_sketch=None,
+                           numerical_columns_dict=None):
+    """
+    Perform numerical analysis on the two numerical columns using their lists of values
+
+    Parameters
+    ----------
+    academic_reputation_scores : list
+        A list containing Academic Reputation Scores
+    overall_scores : list
+        A list containing Overall Scores
+    academic_reputation_moments : MomentAccumulator
+        The already accumulated moments of the Academic Reputation Scores, if any
+    overall_moments : MomentAccumulator
+        The already accumulated moments of the Overall Scores, if any
+    co_moments : CoMomentAccumulator
+        The already accumulated co-moments of the Academic Reputation Scores and Overall Scores, if any
+    academic_reputation_sketch : QuantileSketch
+        The quantile sketch of the Academic Reputation Scores, if any
+    overall_sketch : QuantileSketch
+        The quantile sketch of the Overall Scores, if any
+    numerical_columns_dict : dict
+        A dictionary with the names of every numerical column correlated as keys and their lists of values as values,
+        if any
+
+    Returns
+    -------
+    None - default
+    """
+    correlation_matrix = None if numerical_columns_dict is None else get_correlation_matrix(numerical_columns_dict)
+    display_numerical_data_analysis(academic_reputation_scores, overall_scores, academic_reputation_moments,
+                                    overall_moments, co_moments, academic_reputation_sketch, overall_sketch,
+                                    correlation_matrix)
 
     while True:
         try:
@@ -274,7 +422,8 @@ def analyse_numerical_data(academic_reputation_scores, overall_scores):
             print("Wrong input!")
 
 
-def visualise_numerical_data(academic_reputation_scores, overall_scores):
+def visualise_numerical_data(academic_reputation_scores, overall_scores, academic_reputation_sketch=None,
+                             overall_sketch=None, numerical_columns_dict=None):
     """
     Perform numerical visualisation based on user input on the two numerical columns using their lists of values
 
@@ -284,6 +433,13 @@ def visualise_numerical_data(academic_reputation_scores, overall_scores):
         A list containing Academic Reputation Scores
     overall_scores : list
         A list containing Overall Scores
+    academic_reputation_sketch : QuantileSketch
+        The quantile sketch of the Academic Reputation Scores, drawing its box from it if given
+    overall_sketch : QuantileSketch
+        The quantile sketch of the Overall Scores, drawing its box from it if given
+    numerical_columns_dict : dict
+        A dictionary with the names of every numerical column correlated as keys and their lists of values as values,
+        the two columns above being correlated if not given
 
     Returns
     -------
@@ -295,22 +451,32 @@ def visualise_numerical_data(academic_reputation_scores, overall_scores):
     print("--------------------------------")
 
     while True:
+        # Reporting the visualisations exported in the background since the last prompt
+        display_export_status()
         print()
         print("How do you like to visualise the numerical data?")
         print("------------------------------------------------")
         print("1. Histograms")
         print("2. Box plots")
         print("3. Scatter plot")
-        print("4. Go back")
+        print("4. Correlation heatmap")
+        print("5. Go back")
         try:
             option_selected = int(input("Enter the option: "))
             if option_selected == 1:
                 draw_histogram(academic_reputation_scores, overall_scores)
             elif option_selected == 2:
-                draw_numerical_box_plot(academic_reputation_scores, overall_scores)
+                draw_numerical_box_plot(academic_reputation_scores, overall_scores,
+                                        get_box_plot_statistics(academic_reputation_scores, academic_reputation_sketch),
+                                        get_box_plot_statistics(overall_scores, overall_sketch))
             elif option_selected == 3:
                 draw_scatter_plot(academic_reputation_scores, overall_scores)
             elif option_selected == 4:
+                if numerical_columns_dict is None:
+                    numerical_columns_dict = {"Academic Reputation": academic_reputation_scores,
+                                              "Overall": overall_scores}
+                draw_correlation_heatmap(get_correlation_matrix(numerical_columns_dict))
+            elif option_selected == 5:
                 break
             else:
                 print("Wrong input!")
@@ -318,7 +484,9 @@ def visualise_numerical_data(academic_reputation_scores, overall_scores):
             print("Wrong input!")
 
 
-def analyse_and_visualise_numerical_data(academic_reputation_scores, overall_scores):
+def analyse_and_visualise_numerical_data(academic_reputation_scores, overall_scores, academic_reputation_moments=None,
+                                         overall_moments=None, co_moments=None, academic_reputation_sketch=None,
+                                         overall_sketch=None, numerical_columns_dict=None):
     """
     Analyse and Visualise the numerical columns using their lists of values
 
@@ -328,6 +496,19 @@ def analyse_and_visualise_numerical_data(academic_reputation_scores, overall_sco
         A list containing Academic Reputation Scores
     overall_scores : list
         A list containing Overall Scores
+    academic_reputation_moments : MomentAccumulator
+        The already accumulated moments of the Academic Reputation Scores, if any
+    overall_moments : MomentAccumulator
+        The already accumulated moments of the Overall Scores, if any
+    co_moments : CoMomentAccumulator
+        The already accumulated co-moments of the Academic Reputation Scores and Overall Scores, if any
+    academic_reputation_sketch : QuantileSketch
+        The quantile sketch of the Academic Reputation Scores, if any
+    overall_sketch : QuantileSketch
+        The quantile sketch of the Overall Scores, if any
+    numerical_columns_dict : dict
+        A dictionary with the names of every numerical column correlated as keys and their lists of values as values,
+        if any
 
     Returns
     -------
@@ -348,9 +529,12 @@ def analyse_and_visualise_numerical_data(academic_reputation_scores, overall_sco
         try:
             option_selected = int(input("Enter the option (1, 2 or 3): "))
             if option_selected == 1:
-                analyse_numerical_data(academic_reputation_scores, overall_scores)
+                analyse_numerical_data(academic_reputation_scores, overall_scores, academic_reputation_moments,
+                                       overall_moments, co_moments, academic_reputation_sketch, overall_sketch,
+                                       numerical_columns_dict)
             elif option_selected == 2:
-                visualise_numerical_data(academic_reputation_scores, overall_scores)
+                visualise_numerical_data(academic_reputation_scores, overall_scores, academic_reputation_sketch,
+                                         overall_sketch, numerical_columns_dict)
             elif option_selected == 3:
                 print()
                 break
@@ -360,60 +544,98 @@ def analyse_and_visualise_numerical_data(academic_reputation_scores, overall_sco
             print("Wrong input!")
 
 
-def get_maximum_and_minimum_frequency(region_frequency_dict):
+def get_category_plural(category_column):
     """
-    Calculate and display the regions with maximum and minimum frequency
+    Returns the plural of the name of a categorical column for the displayed analysis
 
     Parameters
     ----------
-    region_frequency_dict : dict
-        A dictionary with region sub-category as keys and its frequency as values
+    category_column : str
+        The name of the categorical column
+
+    Returns
+    -------
+    str
+        The plural of the name
+    """
+    return CATEGORY_PLURALS.get(category_column, f"{category_column}s")
+
+
+def get_maximum_and_minimum_frequency(grouped_statistics):
+    """
+    Calculate and display the sub-categories with maximum and minimum frequency
+
+    Parameters
+    ----------
+    grouped_statistics : GroupedStatistics
+        The aggregates of the Institutions' scores grouped by the sub-categories of a categorical column
 
     Returns
     -------
     None - default
     """
-    region_with_maximum_frequency = max(region_frequency_dict, key=region_frequency_dict.get)
+    category = grouped_statistics.category_column
+    frequency_table = FrequencyTable.from_counts(grouped_statistics.to_dict("count"))
+    most_frequent_groups = frequency_table.get_most_frequent()
+    group_with_maximum_frequency, maximum_frequency = most_frequent_groups[0]
     print(
-        f"Region with most top-ranked Institutions: {region_with_maximum_frequency} ({region_frequency_dict[region_with_maximum_frequency]})")
-    region_with_minimum_frequency = min(region_frequency_dict, key=region_frequency_dict.get)
+        f"{category} with most top-ranked Institutions: {group_with_maximum_frequency} ({maximum_frequency}){get_ties_note(most_frequent_groups)}")
+    least_frequent_groups = frequency_table.get_least_frequent()
+    group_with_minimum_frequency, minimum_frequency = least_frequent_groups[0]
     print(
-        f"Region with fewest top-ranked Institutions: {region_with_minimum_frequency} ({region_frequency_dict[region_with_minimum_frequency]})")
+        f"{category} with fewest top-ranked Institutions: {group_with_minimum_frequency} ({minimum_frequency}){get_ties_note(least_frequent_groups)}")
 
 
-def get_maximum_and_minimum_average(region_scores_dict):
+def get_ties_note(tied_frequencies):
     """
-    Calculate and display the regions with maximum and minimum average overall score
+    Builds the note listing the sub-categories tied with the first one
 
     Parameters
     ----------
-    region_scores_dict : dict
-        A dictionary with region sub-category as keys and the list of Institutions' scores as values
+    tied_frequencies : list
+        A list of (sub-category, frequency) tuples sharing the same frequency
+
+    Returns
+    -------
+    str
+        The note to be appended to the displayed sub-category, empty if there is no tie
+    """
+    if len(tied_frequencies) < 2:
+        return ""
+    return f" - tied with {', '.join(str(value) for value, _ in tied_frequencies[1:])}"
+
+
+def get_maximum_and_minimum_average(grouped_statistics):
+    """
+    Calculate and display the sub-categories with maximum and minimum average score
+
+    Parameters
+    ----------
+    grouped_statistics : GroupedStatistics
+        The aggregates of the Institutions' scores grouped by the sub-categories of a categorical column
 
     Returns
     -------
     None - default
     """
-    average_scores_per_region = [sum(scores) / len(scores) for scores in region_scores_dict.values()]
-    highest_average_score = max(average_scores_per_region)
-    lowest_average_score = min(average_scores_per_region)
-    regions = list(region_scores_dict.keys())
-    region_with_highest_average_score = regions[average_scores_per_region.index(highest_average_score)]
-    region_with_lowest_average_score = regions[average_scores_per_region.index(lowest_average_score)]
-    print(f"Region with highest average score: {region_with_highest_average_score} ({highest_average_score:.3f})")
-    print(f"Region with lowest average score: {region_with_lowest_average_score} ({lowest_average_score:.3f})")
+    category = grouped_statistics.category_column
+    average_scores_per_group = grouped_statistics.get_statistic("mean")
+    highest_average_score = max(average_scores_per_group)
+    lowest_average_score = min(average_scores_per_group)
+    group_with_highest_average_score = grouped_statistics.groups[average_scores_per_group.index(highest_average_score)]
+    group_with_lowest_average_score = grouped_statistics.groups[average_scores_per_group.index(lowest_average_score)]
+    print(f"{category} with highest average score: {group_with_highest_average_score} ({highest_average_score:.3f})")
+    print(f"{category} with lowest average score: {group_with_lowest_average_score} ({lowest_average_score:.3f})")
 
 
-def analyse_categorical_data(region_frequency_dict, region_scores_dict):
+def display_categorical_data_analysis(grouped_statistics):
     """
-    Performs categorical analysis on the given dictionaries corresponding to a categorical column and its associated numerical values
+    Displays the categorical analysis of the aggregates of a numerical column grouped by a categorical column
 
     Parameters
     ----------
-    region_scores_dict : dict
-        A dictionary with region sub-category as keys and the list of Institutions' scores as values
-    region_frequency_dict : dict
-        A dictionary with region sub-category as keys and its frequency as values
+    grouped_statistics : GroupedStatistics
+        The aggregates of the Institutions' scores grouped by the sub-categories of a categorical column
 
     Returns
     -------
@@ -424,9 +646,25 @@ def analyse_categorical_data(region_frequency_dict, region_scores_dict):
     print("| Categorical Data Analysis |")
     print("-----------------------------")
     print()
-    print(f"Number of Regions: {len(region_frequency_dict)}")
-    get_maximum_and_minimum_frequency(region_frequency_dict)
-    get_maximum_and_minimum_average(region_scores_dict)
+    print(f"Number of {get_category_plural(grouped_statistics.category_column)}: {len(grouped_statistics)}")
+    get_maximum_and_minimum_frequency(grouped_statistics)
+    get_maximum_and_minimum_average(grouped_statistics)
+
+
+def analyse_categorical_data(grouped_statistics):
+    """
+    Performs categorical analysis on the aggregates of a numerical column grouped by a categorical column
+
+    Parameters
+    ----------
+    grouped_statistics : GroupedStatistics
+        The aggregates of the Institutions' scores grouped by the sub-categories of a categorical column
+
+    Returns
+    -------
+    None - default
+    """
+    display_categorical_data_analysis(grouped_statistics)
 
     while True:
         try:
@@ -438,27 +676,52 @@ def analyse_categorical_data(region_frequency_dict, region_scores_dict):
             print("Wrong input!")
 
 
-def visualise_categorical_data(region_frequency_dict, region_scores_dict):
+def get_grouped_box_plot_statistics(grouped_statistics, group_sketches_dict=None):
+    """
+    Calculates the statistics the box of every group is drawn from
+
+    Parameters
+    ----------
+    grouped_statistics : GroupedStatistics
+        The aggregates of the Institutions' scores grouped by the sub-categories of a categorical column
+    group_sketches_dict : dict
+        A dictionary with sub-categories as keys and the quantile sketch of their scores as values, if any
+
+    Returns
+    -------
+    list
+        A list of dictionaries in the format of matplotlib.axes.Axes.bxp, in the order of the groups
+    """
+    group_sketches_dict = group_sketches_dict or {}
+    return [get_box_plot_statistics(scores, group_sketches_dict.get(group))
+            for group, scores in grouped_statistics.get_grouped_values().items()]
+
+
+def visualise_categorical_data(grouped_statistics, group_sketches_dict=None):
     """
-    Perform categorical visualisation based on user input using the given dictionaries corresponding to a categorical column and its associated numerical values
+    Perform categorical visualisation based on user input using the aggregates of a numerical column grouped by a categorical column
 
     Parameters
     ----------
-    region_scores_dict : dict
-        A dictionary with region sub-category as keys and the list of Institutions' scores as values
-    region_frequency_dict : dict
-        A dictionary with region sub-category as keys and its frequency as values
+    grouped_statistics : GroupedStatistics
+        The aggregates of the Institutions' scores grouped by the sub-categories of a categorical column
+    group_sketches_dict : dict
+        A dictionary with sub-categories as keys and the quantile sketch of the Institutions' scores as values,
+        drawing the boxes from them if given
 
     Returns
     -------
     None - default
     """
+    category = grouped_statistics.category_column
     print()
     print("----------------------------------")
     print("| Categorical Data Visualisation |")
     print("----------------------------------")
 
     while True:
+        # Reporting the visualisations exported in the background since the last prompt
+        display_export_status()
         print()
         print("How do you like to visualise the categorical data?")
         print("--------------------------------------------------")
@@ -469,11 +732,13 @@ def visualise_categorical_data(region_frequency_dict, region_scores_dict):
         try:
             option_selected = int(input("Enter the option: "))
             if option_selected == 1:
-                draw_pie_chart(region_frequency_dict)
+                draw_pie_chart(grouped_statistics.to_dict("count"), category)
             elif option_selected == 2:
-                draw_bar_chart(region_frequency_dict)
+                draw_bar_chart(grouped_statistics.to_dict("count"), category)
             elif option_selected == 3:
-                draw_categorical_box_plot(region_scores_dict)
+                draw_categorical_box_plot(grouped_statistics.get_grouped_values(),
+                                          get_grouped_box_plot_statistics(grouped_statistics, group_sketches_dict),
+                                          category)
             elif option_selected == 4:
                 break
             else:
@@ -482,16 +747,16 @@ def visualise_categorical_data(region_frequency_dict, region_scores_dict):
             print("Wrong input!")
 
 
-def analyse_and_visualise_categorical_data(region_scores_dict, region_frequency_dict):
+def analyse_and_visualise_categorical_data(grouped_statistics, group_sketches_dict=None):
     """
-    Analyse and Visualise the categorical data along with its associated numerical data using its dictionaries
+    Analyse and Visualise the categorical data along with its associated numerical data using their grouped aggregates
 
     Parameters
     ----------
-    region_scores_dict : dict
-        A dictionary with region sub-category as keys and the list of Institutions' scores as values
-    region_frequency_dict : dict
-        A dictionary with region sub-category as keys and its frequency as values
+    grouped_statistics : GroupedStatistics
+        The aggregates of the Institutions' scores grouped by the sub-categories of a categorical column
+    group_sketches_dict : dict
+        A dictionary with sub-categories as keys and the quantile sketch of the Institutions' scores as values, if any
 
     Returns
     -------
@@ -511,9 +776,9 @@ def analyse_and_visualise_categorical_data(region_scores_dict, region_frequency_
         try:
             option_selected = int(input("Enter the option (1, 2 or 3): "))
             if option_selected == 1:
-                analyse_categorical_data(region_frequency_dict, region_scores_dict)
+                analyse_categorical_data(grouped_statistics)
             elif option_selected == 2:
-                visualise_categorical_data(region_frequency_dict, region_scores_dict)
+                visualise_categorical_data(grouped_statistics, group_sketches_dict)
             elif option_selected == 3:
                 print()
                 break
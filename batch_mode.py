@@ -0,0 +1,270 @@
+"""
+Author Student ID: A00316036
+
+Description: This module provides the non-interactive batch mode, which computes the Numerical and Categorical Analysis
+of a dataset once, writes it to a report and exports every visualisation without any prompt, for scheduled runs. The
+visualisations can be rendered and encoded in parallel worker processes, each receiving only compact column arrays.
+"""
+
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from io import StringIO
+from os import makedirs, path
+from time import perf_counter
+from analysis_and_visualisation import display_numerical_data_analysis, display_categorical_data_analysis, \
+    get_box_plot_statistics, get_grouped_box_plot_statistics, get_correlation_matrix
+from dataset import CORRELATION_MATRIX_COLUMNS
+from group_by import group_by
+from instrumentation import span, add_counter, collect_trace, merge_trace
+from matplotlib_visualisations import get_pyplot, use_headless_backend, render_and_save_visualisation, \
+    create_histogram_figure, create_numerical_box_plot_figure, create_scatter_plot_figure, create_pie_chart_figure, \
+    create_bar_chart_figure, create_categorical_box_plot_figure, create_correlation_heatmap_figure
+
+REPORT_FILENAME = "Analysis report.txt"
+
+
+def get_visualisations(academic_reputation_scores, overall_scores, region_frequency_dict, region_scores_dict,
+                       academic_reputation_statistics=None, overall_statistics=None, region_statistics=None,
+                       category_column="Region", correlation_matrix=None):
+    """
+    Lists every visualisation with the function creating its figure and the data it is created from
+
+    Parameters
+    ----------
+    academic_reputation_scores : list
+        A list containing Academic Reputation Scores
+    overall_scores : list
+        A list containing Overall Scores
+    region_frequency_dict : dict
+        A dictionary with region sub-category as keys and its frequency as values
+    region_scores_dict : dict
+        A dictionary with region sub-category as keys and the list of Institutions' scores as values
+    academic_reputation_statistics : dict
+        The precomputed box plot statistics of the Academic Reputation Scores, if any
+    overall_statistics : dict
+        The precomputed box plot statistics of the Overall Scores, if any
+    region_statistics : list
+        The precomputed box plot statistics of each region, if any
+    category_column : str
+        The name of the categorical column the regions are sub-categories of
+    correlation_matrix : dict
+        The correlation matrix of the numerical columns, whose heatmap is listed if given
+
+    Returns
+    -------
+    list
+        A list of (filename, figure creation function, arguments) tuples
+    """
+    visualisations = [
+        ("Numerical Visualisation - Histograms", create_histogram_figure, (academic_reputation_scores, overall_scores)),
+        ("Numerical Visualisation - Box plots", create_numerical_box_plot_figure,
+         (academic_reputation_scores, overall_scores, academic_reputation_statistics, overall_statistics)),
+        ("Numerical Visualisation - Scatter plot", create_scatter_plot_figure,
+         (academic_reputation_scores, overall_scores)),
+        ("Categorical Visualisation - Pie chart", create_pie_chart_figure, (region_frequency_dict, category_column)),
+        ("Categorical Visualisation - Bar chart", create_bar_chart_figure, (region_frequency_dict, category_column)),
+        ("Categorical Visualisation - Box plots", create_categorical_box_plot_figure,
+         (region_scores_dict, region_statistics, category_column)),
+    ]
+    if correlation_matrix is not None:
+        visualisations.insert(3, ("Numerical Visualisation - Correlation heatmap", create_correlation_heatmap_figure,
+                                  (correlation_matrix,)))
+    return visualisations
+
+
+def get_compact_array(values):
+    """
+    Copies a column view into an array.array, which is sent to worker processes as a single block of bytes
+
+    Parameters
+    ----------
+    values : memoryview or array.array or numpy.ndarray
+        The values of a column
+
+    Returns
+    -------
+    array.array
+        The values in a picklable typed buffer
+    """
+    if isinstance(values, array):
+        return values
+    values = memoryview(values)
+    compact_array = array(values.format)
+    compact_array.frombytes(values.cast("B"))
+    return compact_array
+
+
+def export_visualisation_job(filename, create_figure, arguments, output_directory):
+    """
+    Creates, renders and saves one visualisation with the headless backend, in the current or a worker process
+
+    Parameters
+    ----------
+    filename : str
+        The name of the visualisation
+    create_figure : function
+        The function creating the figure of the visualisation
+    arguments : tuple
+        The data the figure is created from
+    output_directory : str
+        The directory in which the PNG file is saved
+
+    Returns
+    -------
+    tuple
+        The filename, the path of the PNG file, the figure creation time, the rendering time and the PNG encoding time
+        in seconds
+    """
+    use_headless_backend()
+    start_time = perf_counter()
+    with span("create figure", "visualisation", visualisation=filename):
+        figure = create_figure(*arguments)
+    creation_time = perf_counter() - start_time
+    file_path, rendering_time, encoding_time = render_and_save_visualisation(figure, filename, output_directory)
+    get_pyplot().close(figure)
+    return filename, file_path, creation_time, rendering_time, encoding_time
+
+
+def iterate_export_results(visualisations, output_directory, worker_count=1):
+    """
+    Exports the visualisations, in a pool of worker processes if more than one worker is wanted, yielding the outcome
+    of each one in the order of the list. A visualisation that fails for any reason, including a worker process that
+    died, is reported with its error and the next ones are still exported
+
+    Parameters
+    ----------
+    visualisations : list
+        A list of (filename, figure creation function, arguments) tuples
+    output_directory : str
+        The directory in which the PNG files are saved
+    worker_count : int
+        The number of worker processes
+
+    Returns
+    -------
+    generator
+        A generator of (filename, result of export_visualisation_job or None, error or None) tuples
+    """
+    if worker_count > 1:
+        with ProcessPoolExecutor(max_workers=min(worker_count, len(visualisations))) as executor:
+            # Collecting the trace of each worker along with its result, for the instrumentation
+            futures = [executor.submit(collect_trace, export_visualisation_job, filename, create_figure, arguments,
+                                       output_directory)
+                       for filename, create_figure, arguments in visualisations]
+            for (filename, _, _), future in zip(visualisations, futures):
+                try:
+                    result, events, counter_amounts = future.result()
+                    merge_trace(events, counter_amounts)
+                    yield filename, result, None
+                except Exception as error:
+                    yield filename, None, error
+    else:
+        for filename, create_figure, arguments in visualisations:
+            try:
+                yield filename, export_visualisation_job(filename, create_figure, arguments, output_directory), None
+            except Exception as error:
+                yield filename, None, error
+
+
+def export_visualisations(visualisations, output_directory, worker_count=1):
+    """
+    Exports the visualisations and reports the figure creation, rendering and encoding time of every one of them
+
+    Parameters
+    ----------
+    visualisations : list
+        A list of (filename, figure creation function, arguments) tuples
+    output_directory : str
+        The directory in which the PNG files are saved
+    worker_count : int
+        The number of worker processes
+
+    Returns
+    -------
+    bool
+        True if every visualisation was exported, False otherwise
+    """
+    is_every_visualisation_exported = True
+    for filename, result, error in iterate_export_results(visualisations, output_directory, worker_count):
+        if error is not None:
+            print(f"Error exporting {filename}:", error)
+            is_every_visualisation_exported = False
+        else:
+            _, file_path, creation_time, rendering_time, encoding_time = result
+            print(f"{filename} exported to {file_path} (figure {creation_time:.3f}s, render {rendering_time:.3f}s, "
+                  f"encode {encoding_time:.3f}s)")
+    return is_every_visualisation_exported
+
+
+def run_batch_mode(dataset, output_directory, worker_count=1, category_column="Region"):
+    """
+    Writes the analysis report and exports every visualisation of the dataset into the output directory
+
+    Parameters
+    ----------
+    dataset : Dataset
+        The loaded dataset
+    output_directory : str
+        The directory the report and the PNG files are written to, created if it does not exist
+    worker_count : int
+        The number of worker processes rendering the visualisations
+    category_column : str
+        The name of the categorical column analysed and visualised
+
+    Returns
+    -------
+    int
+        The exit status - 0 if everything was written, 1 otherwise
+    """
+    if len(dataset) == 0:
+        print("No Institutions to analyse")
+        return 1
+    makedirs(output_directory, exist_ok=True)
+    use_headless_backend()
+
+    # Computing the columns and groupings once for the report and every visualisation
+    academic_reputation_scores = dataset.get_column("Academic Reputation")
+    overall_scores = dataset.get_column("Overall")
+    grouped_statistics = group_by(dataset, category_column, "Overall")
+    region_scores_dict = grouped_statistics.get_grouped_values()
+    region_frequency_dict = grouped_statistics.to_dict("count")
+    # Quantile sketches, if they are enabled, replace sorting the columns for the quartiles and box plots
+    academic_reputation_sketch = dataset.column_sketches.get("Academic Reputation")
+    overall_sketch = dataset.column_sketches.get("Overall")
+    region_sketches_dict = dataset.get_grouped_sketches(category_column, "Overall")
+    correlation_matrix = get_correlation_matrix({column: dataset.get_column(column)
+                                                 for column in CORRELATION_MATRIX_COLUMNS})
+
+    report = StringIO()
+    with span("analysis report", "statistics"), redirect_stdout(report):
+        display_numerical_data_analysis(academic_reputation_scores, overall_scores,
+                                        dataset.column_moments["Academic Reputation"],
+                                        dataset.column_moments["Overall"],
+                                        dataset.co_moments[("Academic Reputation", "Overall")],
+                                        academic_reputation_sketch, overall_sketch, correlation_matrix)
+        display_categorical_data_analysis(grouped_statistics)
+    print(report.getvalue())
+    exit_status = 0
+    try:
+        with open(path.join(output_directory, REPORT_FILENAME), "w") as report_file:
+            add_counter("bytes written", report_file.write(report.getvalue()))
+    except OSError as error:
+        print("Error writing the analysis report:", error)
+        exit_status = 1
+
+    # Computing the box plot statistics once, from the sketches if they are enabled or else through the result cache
+    # shared with the report, instead of sorting the columns again in every worker process
+    box_plot_statistics = (get_box_plot_statistics(academic_reputation_scores, academic_reputation_sketch),
+                           get_box_plot_statistics(overall_scores, overall_sketch),
+                           get_grouped_box_plot_statistics(grouped_statistics, region_sketches_dict))
+    if worker_count > 1:
+        # Sending only the compact column arrays to the worker processes
+        academic_reputation_scores = get_compact_array(academic_reputation_scores)
+        overall_scores = get_compact_array(overall_scores)
+        region_scores_dict = {region: get_compact_array(scores) for region, scores in region_scores_dict.items()}
+    visualisations = get_visualisations(academic_reputation_scores, overall_scores, region_frequency_dict,
+                                        region_scores_dict, *box_plot_statistics, category_column, correlation_matrix)
+    if not export_visualisations(visualisations, output_directory, worker_count):
+        exit_status = 1
+    return exit_status
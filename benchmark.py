@@ -0,0 +1,296 @@
+"""
+Author Student ID: A00316036
+
+Description: This module provides the benchmark suite. It generates synthetic datasets of increasing size with the
+schema of dataset.csv, times the ingestion, every statistic, the group-by aggregations and the figure creation,
+rendering and export of every visualisation on each of them, and writes the wall time and peak memory of every
+benchmark to a JSON results file. A results file of an earlier version can be given as a baseline to compare against.
+"""
+
+import json
+import tracemalloc
+from argparse import ArgumentParser
+from datetime import datetime, timezone
+from os import cpu_count, makedirs, path, remove
+from platform import platform, python_version
+from tempfile import gettempdir
+from time import perf_counter
+from analysis_and_visualisation import get_mean, get_median, get_mode, get_range, get_inter_quartile_range, \
+    get_standard_deviation, get_mode_skewness, get_median_skewness, get_summary_statistics, get_box_plot_statistics, \
+    get_correlation, get_correlation_matrix, get_grouped_box_plot_statistics
+from batch_mode import get_visualisations, export_visualisation_job
+from data_ingestion import load_dataset, load_dataset_in_parallel
+from dataset import CORRELATION_MATRIX_COLUMNS
+from dataset_cache import get_cache_path, load_dataset_with_cache
+from group_by import group_by
+from matplotlib_visualisations import use_headless_backend
+from result_cache import result_cache
+from statistics_backends import get_available_backends, get_backend, set_backend
+from synthetic_dataset import DEFAULT_SEED, write_synthetic_dataset
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+DEFAULT_ROW_COUNTS = (10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6)
+MAXIMUM_ROW_COUNT = 10 ** 7
+RESULTS_FILENAME = "benchmark_results.json"
+RESULTS_VERSION = 1
+DEFAULT_REPEAT = 3
+STATISTIC_FUNCTIONS = (get_mean, get_median, get_mode, get_range, get_inter_quartile_range, get_standard_deviation,
+                       get_mode_skewness, get_median_skewness, get_summary_statistics, get_box_plot_statistics)
+GROUPED_COLUMNS = ("Country", "Region", "Size")
+# A benchmark taking this many times its baseline wall time is reported as a regression
+REGRESSION_THRESHOLD = 1.2
+
+
+def measure(function, setup=None, repeat=1):
+    """
+    Measures the shortest wall time of repeated calls of the function, then its peak memory in one more call traced by
+    tracemalloc so that tracing does not slow down the timed calls
+
+    Parameters
+    ----------
+    function : function
+        The function to be measured, called without arguments
+    setup : function
+        The function called without arguments before each call, outside the measurement, if any
+    repeat : int
+        The number of timed calls
+
+    Returns
+    -------
+    tuple
+        The result of the last timed call, the shortest wall time in seconds and the peak memory of the traced call in
+        bytes
+    """
+    wall_time = None
+    result = None
+    for _ in range(repeat):
+        # Emptying the result cache so that every call computes its statistics
+        result_cache.clear()
+        if setup is not None:
+            setup()
+        start_time = perf_counter()
+        result = function()
+        call_time = perf_counter() - start_time
+        wall_time = call_time if wall_time is None else min(wall_time, call_time)
+
+    result_cache.clear()
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        function()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, wall_time, peak_memory
+
+
+def get_dataset_path(data_directory, row_count, seed=DEFAULT_SEED):
+    """
+    Returns the path of the synthetic dataset with the given number of rows, generating it if it does not exist
+
+    Parameters
+    ----------
+    data_directory : str
+        The directory of the synthetic datasets
+    row_count : int
+        The number of rows
+    seed : int
+        The seed the dataset is generated with
+
+    Returns
+    -------
+    str
+        The path of the synthetic dataset
+    """
+    makedirs(data_directory, exist_ok=True)
+    file_path = path.join(data_directory, f"synthetic_{row_count}_{seed}.csv")
+    if not path.exists(file_path):
+        write_synthetic_dataset(file_path, row_count, seed)
+    return file_path
+
+
+def run_benchmarks(row_count, data_directory, worker_count=1, include_visualisations=True, seed=DEFAULT_SEED,
+                   repeat=DEFAULT_REPEAT):
+    """
+    Runs every benchmark on the synthetic dataset with the given number of rows, printing each result as it is measured
+
+    Parameters
+    ----------
+    row_count : int
+        The number of rows of the synthetic dataset
+    data_directory : str
+        The directory of the synthetic datasets, their caches and the exported visualisations
+    worker_count : int
+        The number of worker processes of the parallel ingestion benchmark, which is skipped for a single worker
+    include_visualisations : bool
+        Whether the visualisations are benchmarked
+    seed : int
+        The seed the dataset is generated with
+    repeat : int
+        The number of timed calls of every benchmark, the shortest wall time being recorded
+
+    Returns
+    -------
+    list
+        A list of dictionaries with the row count, the benchmark name, the wall time in seconds and the peak memory in
+        bytes of every benchmark, along with any timing breakdown
+    """
+    results = []
+
+    def record(benchmark, function, setup=None):
+        result, wall_time, peak_memory = measure(function, setup, repeat)
+        results.append({"row_count": row_count, "benchmark": benchmark, "wall_time": wall_time,
+                        "peak_memory": peak_memory})
+        print(f"{row_count:>10} {benchmark:<60} {wall_time:>10.4f}s {peak_memory / (1 << 20):>10.1f} MiB")
+        return result
+
+    start_time = perf_counter()
+    file_path = get_dataset_path(data_directory, row_count, seed)
+    print(f"{row_count:>10} {'generation (not benchmarked)':<60} {perf_counter() - start_time:>10.4f}s")
+
+    # Ingestion - streaming, building the binary cache, memory-mapping the cache and, with workers, parallel parsing
+    def remove_cache():
+        if path.exists(get_cache_path(file_path)):
+            remove(get_cache_path(file_path))
+
+    dataset = record("ingestion.stream", lambda: load_dataset(file_path))
+    record("ingestion.parse_and_write_cache", lambda: load_dataset_with_cache(file_path), remove_cache)
+    record("ingestion.memory_map_cache", lambda: load_dataset_with_cache(file_path))
+    if worker_count > 1:
+        record(f"ingestion.parallel_{worker_count}_workers", lambda: load_dataset_in_parallel(file_path, worker_count))
+
+    # Statistics of the numerical columns
+    academic_reputation_scores = dataset.get_column("Academic Reputation")
+    overall_scores = dataset.get_column("Overall")
+    for statistic_function in STATISTIC_FUNCTIONS:
+        record(f"statistics.{statistic_function.__name__}", lambda: statistic_function(overall_scores))
+    record("statistics.get_correlation", lambda: get_correlation(academic_reputation_scores, overall_scores))
+    numerical_columns_dict = {column: dataset.get_column(column) for column in CORRELATION_MATRIX_COLUMNS}
+    correlation_matrix = record("statistics.get_correlation_matrix",
+                                lambda: get_correlation_matrix(numerical_columns_dict))
+
+    # Group-by aggregations of the Overall scores
+    grouped_statistics = None
+    for category_column in GROUPED_COLUMNS:
+        grouped_statistics = record(f"group_by.{category_column}",
+                                    lambda: group_by(dataset, category_column, "Overall"))
+        record(f"group_by.{category_column}.box_plot_statistics",
+               lambda: get_grouped_box_plot_statistics(grouped_statistics))
+
+    # Figure creation, rendering and export of every visualisation, grouped by the last categorical column
+    if include_visualisations:
+        use_headless_backend()
+        output_directory = path.join(data_directory, f"visualisations_{row_count}")
+        makedirs(output_directory, exist_ok=True)
+        region_scores_dict = grouped_statistics.get_grouped_values()
+        visualisations = get_visualisations(academic_reputation_scores, overall_scores,
+                                            grouped_statistics.to_dict("count"), region_scores_dict,
+                                            category_column=GROUPED_COLUMNS[-1], correlation_matrix=correlation_matrix)
+        for filename, create_figure, arguments in visualisations:
+            _, _, creation_time, rendering_time, encoding_time = record(
+                f"visualisation.{filename}",
+                lambda: export_visualisation_job(filename, create_figure, arguments, output_directory))
+            # Breaking the timed export down into figure creation, rendering and PNG encoding
+            results[-1].update(figure_time=creation_time, rendering_time=rendering_time, encoding_time=encoding_time)
+    return results
+
+
+def get_environment():
+    """
+    Describes the environment the benchmarks run in, so that results are compared between like environments
+
+    Returns
+    -------
+    dict
+        A dictionary with the Python version, platform, CPU count, library versions and statistics backend
+    """
+    from matplotlib import __version__ as matplotlib_version
+    return {"python": python_version(), "platform": platform(), "cpu_count": cpu_count(),
+            "numpy": numpy.__version__ if numpy is not None else None, "matplotlib": matplotlib_version,
+            "statistics_backend": get_backend().name}
+
+
+def compare_results(baseline_results, results, threshold=REGRESSION_THRESHOLD):
+    """
+    Compares the wall times of the benchmarks with those of a baseline and prints the ratio of every benchmark run in
+    both, marking the regressions
+
+    Parameters
+    ----------
+    baseline_results : list
+        The results of the baseline, as written to its results file
+    results : list
+        The results of the benchmarks just run
+    threshold : float
+        The ratio of the wall times above which a benchmark is a regression
+
+    Returns
+    -------
+    list
+        The (row count, benchmark name, ratio) tuples of the regressions
+    """
+    baseline_wall_times = {(result["row_count"], result["benchmark"]): result["wall_time"]
+                           for result in baseline_results}
+    regressions = []
+    print()
+    print("Comparison with the baseline")
+    print("----------------------------")
+    for result in results:
+        baseline_wall_time = baseline_wall_times.get((result["row_count"], result["benchmark"]))
+        if not baseline_wall_time:
+            continue
+        ratio = result["wall_time"] / baseline_wall_time
+        is_regression = ratio > threshold
+        if is_regression:
+            regressions.append((result["row_count"], result["benchmark"], ratio))
+        print(f"{result['row_count']:>10} {result['benchmark']:<60} {ratio:>8.2f}x"
+              f"{'  REGRESSION' if is_regression else ''}")
+    return regressions
+
+
+if __name__ == '__main__':
+    argument_parser = ArgumentParser(description="Benchmarks of the Exploratory Data Analysis on synthetic datasets")
+    argument_parser.add_argument("--rows", type=int, nargs="+", default=list(DEFAULT_ROW_COUNTS), metavar="COUNT",
+                                 help=f"the numbers of rows of the synthetic datasets, up to {MAXIMUM_ROW_COUNT} "
+                                      f"(default: {' '.join(str(row_count) for row_count in DEFAULT_ROW_COUNTS)})")
+    argument_parser.add_argument("--output", default=RESULTS_FILENAME,
+                                 help=f"the JSON file the results are written to (default: {RESULTS_FILENAME})")
+    argument_parser.add_argument("--baseline", help="a JSON results file of an earlier run to compare the results with")
+    argument_parser.add_argument("--data-directory", default=path.join(gettempdir(), "qs_benchmark"),
+                                 help="the directory the synthetic datasets are generated and reused in")
+    argument_parser.add_argument("--workers", type=int, default=1,
+                                 help="the number of processes of the parallel ingestion benchmark (skipped for 1)")
+    argument_parser.add_argument("--backend", choices=get_available_backends(), help="the statistics backend")
+    argument_parser.add_argument("--seed", type=int, default=DEFAULT_SEED,
+                                 help="the seed the synthetic datasets are generated with")
+    argument_parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                                 help=f"the number of timed runs of every benchmark, the shortest being recorded "
+                                      f"(default: {DEFAULT_REPEAT})")
+    argument_parser.add_argument("--no-visualisations", action="store_true",
+                                 help="skip the benchmarks of the visualisations")
+    arguments = argument_parser.parse_args()
+    if any(not 0 < row_count <= MAXIMUM_ROW_COUNT for row_count in arguments.rows):
+        argument_parser.error(f"--rows must be between 1 and {MAXIMUM_ROW_COUNT}")
+    if arguments.repeat < 1:
+        argument_parser.error("--repeat must be at least 1")
+    if arguments.backend is not None:
+        set_backend(arguments.backend)
+
+    all_results = []
+    for benchmark_row_count in sorted(arguments.rows):
+        all_results.extend(run_benchmarks(benchmark_row_count, arguments.data_directory, arguments.workers,
+                                          not arguments.no_visualisations, arguments.seed, arguments.repeat))
+    with open(arguments.output, "w") as results_file:
+        json.dump({"version": RESULTS_VERSION, "created": datetime.now(timezone.utc).isoformat(),
+                   "environment": get_environment(), "repeat": arguments.repeat, "results": all_results},
+                  results_file, indent=2)
+    print(f"\nResults written to {arguments.output}")
+
+    if arguments.baseline is not None:
+        with open(arguments.baseline) as baseline_file:
+            compare_results(json.load(baseline_file)["results"], all_results)
@@ -0,0 +1,518 @@
+"""
+Author Student ID: A00316036
+
+Description: This module provides the streaming ingestion of the dataset file - the file is read in large byte chunks
+whose complete lines are parsed in batches straight into the column buffers of a Dataset. The source can be a file
+path, "-" for the standard input or any binary/text file-like stream, gzip-compressed or not.
+
+Large uncompressed files can also be split at line boundaries into byte ranges parsed by worker processes, the
+per-shard datasets being merged in file order.
+
+Rows that cannot be parsed are sent to a quarantine with their line number and the reason they were rejected, instead
+of being reported one by one, while batches without errors are converted a whole column at a time.
+"""
+
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from gzip import GzipFile
+from os import PathLike, cpu_count, stat
+from dataset import COLUMNS, COLUMN_INDICES, NUMERICAL_COLUMNS, CATEGORICAL_COLUMNS, NUMERICAL_TYPECODES, Dataset
+from instrumentation import span, add_counter, collect_trace, merge_trace
+from quarantine import Quarantine, get_quarantine_path
+
+CHUNK_SIZE = 1 << 20
+# Files smaller than this are parsed serially, as starting worker processes would take longer than parsing them
+MINIMUM_SHARD_SIZE = 4 << 20
+GZIP_MAGIC_NUMBER = b"\x1f\x8b"
+
+
+@contextmanager
+def open_dataset_source(source):
+    """
+    Opens the dataset source as a stream, decompressing it on the fly if it is gzip-compressed
+
+    Parameters
+    ----------
+    source : str or os.PathLike or file-like
+        The path of the dataset file, "-" for the standard input or an already open stream
+
+    Returns
+    -------
+    file-like
+        A context manager yielding the stream, closing it on exit only if it was opened here
+    """
+    if source == "-":
+        stream = sys.stdin.buffer
+        is_opened_here = False
+    elif isinstance(source, (str, PathLike)):
+        stream = open(source, "rb")
+        is_opened_here = True
+    else:
+        stream = source
+        is_opened_here = False
+
+    try:
+        if is_gzip_stream(stream):
+            with GzipFile(fileobj=stream) as decompressed_stream:
+                yield decompressed_stream
+        else:
+            yield stream
+    finally:
+        if is_opened_here:
+            stream.close()
+
+
+def is_gzip_stream(stream):
+    """
+    Checks whether a stream starts with the gzip magic number without consuming it
+
+    Parameters
+    ----------
+    stream : file-like
+        The stream to be checked
+
+    Returns
+    -------
+    bool
+        True if the stream is a gzip-compressed binary stream, False otherwise
+    """
+    if hasattr(stream, "peek"):
+        return stream.peek(len(GZIP_MAGIC_NUMBER))[:len(GZIP_MAGIC_NUMBER)] == GZIP_MAGIC_NUMBER
+    if hasattr(stream, "seekable") and stream.seekable():
+        position = stream.tell()
+        magic_number = stream.read(len(GZIP_MAGIC_NUMBER))
+        stream.seek(position)
+        return magic_number == GZIP_MAGIC_NUMBER
+    return False
+
+
+def iterate_line_batches(stream, chunk_size=CHUNK_SIZE):
+    """
+    Reads a stream in chunks and yields the complete lines of each chunk, carrying a partial last line over to the
+    next chunk
+
+    Parameters
+    ----------
+    stream : file-like
+        A binary or text stream
+    chunk_size : int
+        The number of bytes (or characters for a text stream) read at a time
+
+    Returns
+    -------
+    generator
+        A generator of lists of decoded lines without their line endings
+    """
+    remainder = None
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        if remainder:
+            chunk = remainder + chunk
+        newline = b"\n" if isinstance(chunk, bytes) else "\n"
+        last_newline_index = chunk.rfind(newline)
+        if last_newline_index == -1:
+            remainder = chunk
+            continue
+        remainder = chunk[last_newline_index + 1:]
+        lines = chunk[:last_newline_index]
+        if isinstance(lines, bytes):
+            lines = lines.decode("utf-8")
+        yield lines.split("\n")
+    if remainder:
+        yield [remainder.decode("utf-8") if isinstance(remainder, bytes) else remainder]
+
+
+def parse_numerical_column(texts, column):
+    """
+    Parses the texts of a numerical column of a batch, an empty field being read as 0
+
+    The whole column is converted at once, the fields being parsed one by one only if one of them is empty or invalid.
+
+    Parameters
+    ----------
+    texts : tuple
+        The texts of the fields
+    column : str
+        The name of the numerical column the fields belong to
+
+    Returns
+    -------
+    tuple
+        The list of parsed numbers, 0 for an empty or invalid field, and the list of the indices of the invalid fields
+    """
+    convert = int if NUMERICAL_TYPECODES[column] == "q" else float
+    try:
+        return list(map(convert, texts)), []
+    except ValueError:
+        pass
+    values = []
+    invalid_indices = []
+    for index, text in enumerate(texts):
+        try:
+            values.append(convert(text))
+        except ValueError:
+            values.append(0)
+            if text != "":
+                invalid_indices.append(index)
+    return values, invalid_indices
+
+
+def parse_line_batch(lines, dataset, quarantine=None):
+    """
+    Parses a batch of lines column by column and appends them to the dataset, quarantining the rows without the
+    expected number of fields or with an invalid numerical field
+
+    Parameters
+    ----------
+    lines : list
+        The lines of the batch without their line endings
+    dataset : Dataset
+        The dataset the parsed rows are appended to
+    quarantine : Quarantine
+        The quarantine of the rejected rows, numbering them after the lines it has counted, None to drop them
+
+    Returns
+    -------
+    int
+        The number of rows appended
+    """
+    quarantine = quarantine if quarantine is not None else Quarantine()
+    first_line_number = quarantine.line_count + 1
+    quarantine.line_count += len(lines)
+    rows = []
+    # The offsets within the batch of the lines that are not rows, needed only to number rejected rows
+    skipped_offsets = []
+    for offset, line in enumerate(lines):
+        fields = line.strip().split(',')
+        if len(fields) == len(COLUMNS):
+            rows.append(fields)
+        else:
+            skipped_offsets.append(offset)
+            if line.strip():
+                quarantine.row_count += 1
+                quarantine.reject(first_line_number + offset,
+                                  f"Expected {len(COLUMNS)} fields but found {len(fields)}", line)
+                add_counter("parse errors")
+    quarantine.row_count += len(rows)
+    if not rows:
+        return 0
+
+    columns = list(zip(*rows))
+    numerical_batch = {}
+    invalid_fields = {}
+    for column in NUMERICAL_COLUMNS:
+        numerical_batch[column], invalid_indices = parse_numerical_column(columns[COLUMN_INDICES[column]], column)
+        for index in invalid_indices:
+            invalid_fields.setdefault(index, []).append(column)
+    categorical_batch = {column: columns[COLUMN_INDICES[column]] for column in CATEGORICAL_COLUMNS}
+
+    if invalid_fields:
+        skipped_offsets = set(skipped_offsets)
+        row_offsets = [offset for offset in range(len(lines)) if offset not in skipped_offsets]
+        for index in sorted(invalid_fields):
+            reasons = "; ".join(f"Invalid {column}: {rows[index][COLUMN_INDICES[column]]!r}"
+                                for column in invalid_fields[index])
+            quarantine.reject(first_line_number + row_offsets[index], reasons, lines[row_offsets[index]],
+                              invalid_fields[index])
+        add_counter("parse errors", len(invalid_fields))
+        # Dropping the rejected rows from every column of the batch
+        valid_indices = [index for index in range(len(rows)) if index not in invalid_fields]
+        numerical_batch = {column: [values[index] for index in valid_indices]
+                           for column, values in numerical_batch.items()}
+        categorical_batch = {column: [texts[index] for index in valid_indices]
+                             for column, texts in categorical_batch.items()}
+        if not valid_indices:
+            return 0
+    add_counter("rows parsed", len(rows) - len(invalid_fields))
+    dataset.append_batch(numerical_batch, categorical_batch)
+    return len(rows) - len(invalid_fields)
+
+
+def stream_dataset(source, chunk_size=CHUNK_SIZE, quantile_error_bound=None, quarantine=None):
+    """
+    Streams the dataset source into a dataset, yielding it after every parsed batch so that analysis of the rows read
+    so far can begin before the whole source is read
+
+    Views taken from the yielded dataset must be released before the generator is resumed, as the column buffers
+    cannot grow while they are exported.
+
+    Parameters
+    ----------
+    source : str or os.PathLike or file-like
+        The path of the dataset file, "-" for the standard input or an already open stream
+    chunk_size : int
+        The number of bytes read at a time
+    quantile_error_bound : float
+        The error bound of the quantile sketches fed with every batch, None not to sketch the columns
+    quarantine : Quarantine
+        The quarantine the rejected rows are sent to, flushed to its file at the end, None to drop them
+
+    Returns
+    -------
+    generator
+        A generator yielding the growing dataset after each batch
+
+    Raises
+    ------
+    FileNotFoundError
+        If the dataset file does not exist
+    """
+    dataset = Dataset()
+    if quantile_error_bound is not None:
+        dataset.enable_quantile_sketches(quantile_error_bound)
+    quarantine = quarantine if quarantine is not None else Quarantine()
+    with open_dataset_source(source) as stream:
+        is_header = True
+        for lines in iterate_line_batches(stream, chunk_size):
+            if is_header:
+                # Skipping the header line of the dataset
+                lines = lines[1:]
+                quarantine.line_count += 1
+                is_header = False
+            with span("parse_line_batch", "ingestion", lines=len(lines)):
+                row_count = parse_line_batch(lines, dataset, quarantine)
+            if row_count:
+                yield dataset
+    quarantine.flush()
+
+
+def load_dataset(source, chunk_size=CHUNK_SIZE, quantile_error_bound=None, quarantine=None):
+    """
+    Loads the whole dataset source into a dataset
+
+    Parameters
+    ----------
+    source : str or os.PathLike or file-like
+        The path of the dataset file, "-" for the standard input or an already open stream
+    chunk_size : int
+        The number of bytes read at a time
+    quantile_error_bound : float
+        The error bound of the quantile sketches fed with every batch, None not to sketch the columns
+    quarantine : Quarantine
+        The quarantine the rejected rows are sent to, flushed to its file at the end, None to drop them
+
+    Returns
+    -------
+    Dataset
+        The dataset holding every column of the source
+
+    Raises
+    ------
+    FileNotFoundError
+        If the dataset file does not exist
+    """
+    dataset = Dataset()
+    for dataset in stream_dataset(source, chunk_size, quantile_error_bound, quarantine):
+        pass
+    return dataset
+
+
+class ByteRangeReader:
+    """
+    A stream reading at most a given number of bytes from the current position of a binary file
+
+    Attributes
+    ----------
+    data_file : file-like
+        The binary file being read
+    remaining_size : int
+        The number of bytes left to be read
+    """
+
+    def __init__(self, data_file, size):
+        self.data_file = data_file
+        self.remaining_size = size
+
+    def read(self, size):
+        """
+        Reads at most size bytes without going past the end of the range
+
+        Parameters
+        ----------
+        size : int
+            The maximum number of bytes to be read
+
+        Returns
+        -------
+        bytes
+            The bytes read, empty at the end of the range
+        """
+        data = self.data_file.read(min(size, self.remaining_size))
+        self.remaining_size -= len(data)
+        return data
+
+
+def get_shard_ranges(file_path, shard_count):
+    """
+    Splits the rows of a dataset file into byte ranges of similar size starting and ending at line boundaries
+
+    Parameters
+    ----------
+    file_path : str or os.PathLike
+        The path of the uncompressed dataset file
+    shard_count : int
+        The number of byte ranges wanted
+
+    Returns
+    -------
+    list
+        A list of (start, stop) byte offsets in file order, the header line being excluded
+    """
+    file_size = stat(file_path).st_size
+    with open(file_path, "rb") as data_file:
+        data_file.readline()
+        boundaries = [data_file.tell()]
+        rows_size = file_size - boundaries[0]
+        for shard_index in range(1, shard_count):
+            data_file.seek(boundaries[0] + rows_size * shard_index // shard_count - 1)
+            # Moving forward to the start of the next line
+            data_file.readline()
+            if boundaries[-1] < data_file.tell() < file_size:
+                boundaries.append(data_file.tell())
+    boundaries.append(file_size)
+    return [(start, stop) for start, stop in zip(boundaries, boundaries[1:]) if start < stop]
+
+
+def load_byte_range(file_path, start, stop, chunk_size=CHUNK_SIZE):
+    """
+    Parses the rows within a byte range of a dataset file into a dataset, run by the worker processes
+
+    Parameters
+    ----------
+    file_path : str or os.PathLike
+        The path of the uncompressed dataset file
+    start : int
+        The offset of the first byte of the range, at the start of a line
+    stop : int
+        The offset after the last byte of the range, at the start of a line or the end of the file
+    chunk_size : int
+        The number of bytes read at a time
+
+    Returns
+    -------
+    tuple
+        The dataset holding the rows of the range and the quarantine of its rejected rows, numbered from the start of
+        the range
+    """
+    dataset = Dataset()
+    # Keeping every rejected row, as they are merged into the quarantine of the whole file
+    quarantine = Quarantine(row_limit=None)
+    with open(file_path, "rb") as data_file:
+        data_file.seek(start)
+        for lines in iterate_line_batches(ByteRangeReader(data_file, stop - start), chunk_size):
+            with span("parse_line_batch", "ingestion", lines=len(lines)):
+                parse_line_batch(lines, dataset, quarantine)
+    return dataset, quarantine
+
+
+def load_dataset_in_parallel(file_path, worker_count=None, chunk_size=CHUNK_SIZE, minimum_shard_size=MINIMUM_SHARD_SIZE,
+                             quarantine=None):
+    """
+    Loads a dataset file by parsing byte ranges of it in worker processes and merging their datasets in file order,
+    so the row order, the category codes and the accumulators are the same as those of a serial load
+
+    Gzip-compressed files and files too small to be worth sharding are loaded serially.
+
+    Parameters
+    ----------
+    file_path : str or os.PathLike
+        The path of the dataset file
+    worker_count : int
+        The number of worker processes, the number of CPUs by default
+    chunk_size : int
+        The number of bytes read at a time by each worker
+    minimum_shard_size : int
+        The smallest number of bytes worth parsing in a worker process
+    quarantine : Quarantine
+        The quarantine the rejected rows are sent to, flushed to its file at the end, None to drop them
+
+    Returns
+    -------
+    Dataset
+        The dataset holding every column of the file
+
+    Raises
+    ------
+    FileNotFoundError
+        If the dataset file does not exist
+    """
+    worker_count = worker_count or cpu_count() or 1
+    with open(file_path, "rb") as data_file:
+        is_compressed = is_gzip_stream(data_file)
+    shard_count = min(worker_count, stat(file_path).st_size // minimum_shard_size)
+    if is_compressed or shard_count < 2:
+        return load_dataset(file_path, chunk_size, quarantine=quarantine)
+
+    shard_ranges = get_shard_ranges(file_path, shard_count)
+    dataset = Dataset()
+    quarantine = quarantine if quarantine is not None else Quarantine()
+    # Counting the header line, which the shards exclude
+    quarantine.line_count += 1
+    with ProcessPoolExecutor(max_workers=shard_count) as executor:
+        # Collecting the trace of each worker along with its dataset, for the instrumentation
+        for (shard_dataset, shard_quarantine), events, counter_amounts in executor.map(
+                collect_trace, [load_byte_range] * len(shard_ranges), [file_path] * len(shard_ranges),
+                *zip(*shard_ranges), [chunk_size] * len(shard_ranges)):
+            merge_trace(events, counter_amounts)
+            with span("merge shard", "ingestion", rows=len(shard_dataset)):
+                dataset.extend(shard_dataset)
+            quarantine.merge(shard_quarantine)
+    quarantine.flush()
+    return dataset
+
+
+def load_dataset_file(file_path):
+    """
+    Loads one dataset file, quarantining its rejected rows next to it, in the current or a worker process
+
+    Parameters
+    ----------
+    file_path : str or os.PathLike
+        The path of the dataset file
+
+    Returns
+    -------
+    tuple
+        The dataset holding every column of the file and the quarantine of its rejected rows
+    """
+    quarantine = Quarantine(get_quarantine_path(file_path))
+    with span("load dataset", "ingestion", dataset=str(file_path)):
+        dataset = load_dataset(file_path, quarantine=quarantine)
+    return dataset, quarantine
+
+
+def load_datasets_concurrently(file_paths, worker_count=None):
+    """
+    Loads several dataset files at the same time, one per worker process, such as the exports of several years
+
+    Parameters
+    ----------
+    file_paths : list
+        The paths of the dataset files
+    worker_count : int
+        The number of worker processes, the number of CPUs by default, the files being loaded one after the other in
+        the current process for a single worker
+
+    Returns
+    -------
+    list
+        The (dataset, quarantine) tuples of the files, in the order of the paths
+
+    Raises
+    ------
+    FileNotFoundError
+        If a dataset file does not exist
+    """
+    worker_count = min(worker_count or cpu_count() or 1, len(file_paths))
+    if worker_count < 2:
+        return [load_dataset_file(file_path) for file_path in file_paths]
+    results = []
+    with ProcessPoolExecutor(max_workers=worker_count) as executor:
+        for result, events, counter_amounts in executor.map(collect_trace, [load_dataset_file] * len(file_paths),
+                                                            file_paths):
+            merge_trace(events, counter_amounts)
+            results.append(result)
+    return results
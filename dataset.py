@@ -0,0 +1,377 @@
+"""
+Author Student ID: A00316036
+
+Description: This module provides a columnar dataset storing every numerical column of the "QS World Rankings - 2023"
+dataset in a contiguous typed buffer and every categorical column as dictionary-encoded integer codes.
+"""
+
+from array import array
+from collections import Counter
+from accumulators import MomentAccumulator, CoMomentAccumulator
+from quantile_sketch import QuantileSketch
+
+COLUMNS = ("Rank", "Institution Name", "Country", "Region", "Size", "Academic Reputation", "Employer Reputation",
+           "Citations per faculty", "International Faculty Ratio", "International Students Ratio",
+           "Employment Outcomes", "Overall")
+NUMERICAL_COLUMNS = ("Rank", "Academic Reputation", "Employer Reputation", "Citations per faculty",
+                     "International Faculty Ratio", "International Students Ratio", "Employment Outcomes", "Overall")
+CATEGORICAL_COLUMNS = ("Institution Name", "Country", "Region", "Size")
+# Fixed-width type codes of the column buffers - 64-bit integers for Rank, doubles for the scores and 32-bit codes
+NUMERICAL_TYPECODES = {column: "q" if column == "Rank" else "d" for column in NUMERICAL_COLUMNS}
+COLUMN_INDICES = {column: index for index, column in enumerate(COLUMNS)}
+CATEGORY_CODE_TYPECODE = "i"
+# Pairs of numerical columns whose co-moments are accumulated while the rows are appended
+CORRELATION_PAIRS = (("Academic Reputation", "Overall"),)
+# The numerical columns correlated with each other in the correlation matrix - every indicator score
+CORRELATION_MATRIX_COLUMNS = tuple(column for column in NUMERICAL_COLUMNS if column != "Rank")
+# Pairs of a categorical column and a numerical column whose grouped values get quantile sketches once they are enabled
+SKETCHED_GROUPS = (("Region", "Overall"),)
+# The number of stored rows fed to the quantile sketches at a time when they are enabled
+SKETCH_BLOCK_SIZE = 1 << 16
+
+
+class Dataset:
+    """
+    A columnar dataset with typed numerical buffers and dictionary-encoded categorical columns
+
+    Attributes
+    ----------
+    numerical_columns : dict
+        A dictionary with numerical column names as keys and their array.array buffers as values
+    category_codes : dict
+        A dictionary with categorical column names as keys and the array.array of each row's category code as values
+    categories : dict
+        A dictionary with categorical column names as keys and the list of sub-categories, indexed by code, as values
+    category_counts : dict
+        A dictionary with categorical column names as keys and the list of row counts, indexed by code, as values
+    column_moments : dict
+        A dictionary with numerical column names as keys and the MomentAccumulator of their values as values
+    co_moments : dict
+        A dictionary with the CORRELATION_PAIRS as keys and the CoMomentAccumulator of their values as values
+    quantile_error_bound : float
+        The error bound of the quantile sketches, None if they are not enabled
+    column_sketches : dict
+        A dictionary with numerical column names as keys and the QuantileSketch of their values as values, empty if
+        the quantile sketches are not enabled
+    grouped_sketches : dict
+        A dictionary with the SKETCHED_GROUPS as keys and the list of QuantileSketch of each sub-category's values,
+        indexed by code, as values, empty if the quantile sketches are not enabled
+    """
+
+    def __init__(self):
+        self.numerical_columns = {column: array(NUMERICAL_TYPECODES[column]) for column in NUMERICAL_COLUMNS}
+        self.category_codes = {column: array(CATEGORY_CODE_TYPECODE) for column in CATEGORICAL_COLUMNS}
+        self.categories = {column: [] for column in CATEGORICAL_COLUMNS}
+        self.category_counts = {column: [] for column in CATEGORICAL_COLUMNS}
+        self.column_moments = {column: MomentAccumulator() for column in NUMERICAL_COLUMNS}
+        self.co_moments = {pair: CoMomentAccumulator() for pair in CORRELATION_PAIRS}
+        self.quantile_error_bound = None
+        self.column_sketches = {}
+        self.grouped_sketches = {}
+        self._category_lookup = {column: {} for column in CATEGORICAL_COLUMNS}
+
+    @classmethod
+    def from_buffers(cls, numerical_columns, category_codes, categories, category_counts, column_moments, co_moments):
+        """
+        Builds a complete dataset over existing column buffers, such as read-only views of a memory-mapped file
+
+        Parameters
+        ----------
+        numerical_columns : dict
+            A dictionary with numerical column names as keys and their buffers as values
+        category_codes : dict
+            A dictionary with categorical column names as keys and the buffer of each row's category code as values
+        categories : dict
+            A dictionary with categorical column names as keys and the list of sub-categories, indexed by code, as values
+        category_counts : dict
+            A dictionary with categorical column names as keys and the list of row counts, indexed by code, as values
+        column_moments : dict
+            A dictionary with numerical column names as keys and the MomentAccumulator of their values as values
+        co_moments : dict
+            A dictionary with the CORRELATION_PAIRS as keys and the CoMomentAccumulator of their values as values
+
+        Returns
+        -------
+        Dataset
+            The dataset reading the given buffers without copying them
+        """
+        dataset = cls()
+        dataset.numerical_columns = numerical_columns
+        dataset.category_codes = category_codes
+        dataset.categories = categories
+        dataset.category_counts = category_counts
+        dataset.column_moments = column_moments
+        dataset.co_moments = co_moments
+        dataset._category_lookup = {column: {sub_category: code for code, sub_category in enumerate(sub_categories)}
+                                    for column, sub_categories in categories.items()}
+        return dataset
+
+    def __len__(self):
+        return len(self.numerical_columns[NUMERICAL_COLUMNS[0]])
+
+    def encode_category(self, column, sub_category):
+        """
+        Returns the integer code of a sub-category, adding it to the column's dictionary if it is new
+
+        Parameters
+        ----------
+        column : str
+            The name of the categorical column
+        sub_category : str
+            The sub-category to be encoded
+
+        Returns
+        -------
+        int
+            The code of the sub-category
+        """
+        lookup = self._category_lookup[column]
+        code = lookup.get(sub_category)
+        if code is None:
+            code = len(lookup)
+            lookup[sub_category] = code
+            self.categories[column].append(sub_category)
+            self.category_counts[column].append(0)
+        return code
+
+    def append_batch(self, numerical_batch, categorical_batch):
+        """
+        Appends a batch of rows to the dataset, updating the category counts and column moments incrementally
+
+        The column buffers cannot grow while a view returned by get_column or get_category_codes is alive, so views
+        taken between batches must be released before the next batch is appended.
+
+        Parameters
+        ----------
+        numerical_batch : dict
+            A dictionary with numerical column names as keys and the list of the batch's numbers as values
+        categorical_batch : dict
+            A dictionary with categorical column names as keys and the list of the batch's sub-categories as values
+
+        Returns
+        -------
+        None - default
+        """
+        for column, values in numerical_batch.items():
+            self.numerical_columns[column].extend(values)
+            self.column_moments[column].update_batch(values)
+        for (x_column, y_column), co_moments in self.co_moments.items():
+            if x_column in numerical_batch and y_column in numerical_batch:
+                co_moments.update_batch(numerical_batch[x_column], numerical_batch[y_column])
+        codes_batch = {}
+        for column, sub_categories in categorical_batch.items():
+            lookup = self._category_lookup[column]
+            codes = [lookup[sub_category] if sub_category in lookup else self.encode_category(column, sub_category)
+                     for sub_category in sub_categories]
+            self.category_codes[column].extend(codes)
+            counts = self.category_counts[column]
+            for code, frequency in Counter(codes).items():
+                counts[code] += frequency
+            codes_batch[column] = codes
+        if self.quantile_error_bound is not None:
+            self.update_sketches(numerical_batch, codes_batch)
+
+    def extend(self, other):
+        """
+        Appends every row of another dataset after the rows of this one, re-encoding its category codes against this
+        dataset's category dictionaries and merging its category counts and accumulators
+
+        Parameters
+        ----------
+        other : Dataset
+            The dataset whose rows are appended, such as the dataset of the next shard of a file
+
+        Returns
+        -------
+        None - default
+        """
+        row_count = len(self)
+        for column, values in other.numerical_columns.items():
+            self.numerical_columns[column].extend(values)
+            self.column_moments[column].merge(other.column_moments[column])
+        for pair, co_moments in other.co_moments.items():
+            self.co_moments[pair].merge(co_moments)
+        code_mappings = {}
+        for column, sub_categories in other.categories.items():
+            code_mapping = [self.encode_category(column, sub_category) for sub_category in sub_categories]
+            self.category_codes[column].extend([code_mapping[code] for code in other.category_codes[column]])
+            counts = self.category_counts[column]
+            for code, frequency in zip(code_mapping, other.category_counts[column]):
+                counts[code] += frequency
+            code_mappings[column] = code_mapping
+
+        if self.quantile_error_bound is None:
+            return
+        if other.quantile_error_bound == self.quantile_error_bound:
+            for column, sketch in other.column_sketches.items():
+                self.column_sketches[column].merge(sketch)
+            for (category_column, numerical_column), sketches in other.grouped_sketches.items():
+                grouped_sketches = self.get_grouped_sketches(category_column, numerical_column)
+                for sub_category, sketch in zip(other.categories[category_column], sketches):
+                    grouped_sketches[sub_category].merge(sketch)
+        else:
+            self.feed_sketches(row_count)
+
+    def enable_quantile_sketches(self, error_bound):
+        """
+        Creates the quantile sketches of the numerical columns and of the SKETCHED_GROUPS, feeding them the rows
+        already stored, after which every appended row updates them
+
+        Parameters
+        ----------
+        error_bound : float
+            The guaranteed bound of the sketches' rank error as a fraction of the number of values
+
+        Returns
+        -------
+        None - default
+        """
+        self.quantile_error_bound = error_bound
+        self.column_sketches = {column: QuantileSketch(error_bound) for column in NUMERICAL_COLUMNS}
+        self.grouped_sketches = {pair: [] for pair in SKETCHED_GROUPS}
+        self.feed_sketches(0)
+
+    def feed_sketches(self, start):
+        """
+        Feeds the stored rows from the given row onwards to the quantile sketches, a block of rows at a time so that
+        the columns of a memory-mapped cache are never read into memory whole
+
+        Parameters
+        ----------
+        start : int
+            The index of the first row to be fed
+
+        Returns
+        -------
+        None - default
+        """
+        for block_start in range(start, len(self), SKETCH_BLOCK_SIZE):
+            block_stop = block_start + SKETCH_BLOCK_SIZE
+            self.update_sketches({column: values[block_start:block_stop]
+                                  for column, values in self.numerical_columns.items()},
+                                 {category_column: self.category_codes[category_column][block_start:block_stop]
+                                  for category_column, _ in SKETCHED_GROUPS})
+
+    def update_sketches(self, numerical_batch, codes_batch):
+        """
+        Feeds a batch of rows to the quantile sketches
+
+        Parameters
+        ----------
+        numerical_batch : dict
+            A dictionary with numerical column names as keys and the list of the batch's numbers as values
+        codes_batch : dict
+            A dictionary with categorical column names as keys and the list of the batch's category codes as values
+
+        Returns
+        -------
+        None - default
+        """
+        for column, values in numerical_batch.items():
+            self.column_sketches[column].update_batch(values)
+        for (category_column, numerical_column), sketches in self.grouped_sketches.items():
+            if category_column not in codes_batch or numerical_column not in numerical_batch:
+                continue
+            sketches.extend(QuantileSketch(self.quantile_error_bound)
+                            for _ in range(len(self.categories[category_column]) - len(sketches)))
+            groups = [[] for _ in sketches]
+            for code, value in zip(codes_batch[category_column], numerical_batch[numerical_column]):
+                groups[code].append(value)
+            for sketch, group in zip(sketches, groups):
+                sketch.update_batch(group)
+
+    def get_column(self, column):
+        """
+        Returns a zero-copy, read-only view of a numerical column
+
+        Parameters
+        ----------
+        column : str
+            The name of the numerical column
+
+        Returns
+        -------
+        memoryview
+            A view over the column's buffer that can be iterated, indexed, sliced or wrapped by numpy.frombuffer
+        """
+        column_buffer = self.numerical_columns[column]
+        if isinstance(column_buffer, memoryview) and column_buffer.readonly:
+            # Columns of a memory-mapped cache are already read-only views, returned as they are so that every caller
+            # gets the same view of the column
+            return column_buffer
+        return memoryview(column_buffer).toreadonly()
+
+    def get_category_codes(self, column):
+        """
+        Returns a zero-copy, read-only view of the category codes of a categorical column
+
+        Parameters
+        ----------
+        column : str
+            The name of the categorical column
+
+        Returns
+        -------
+        memoryview
+            A view over the buffer holding each row's category code
+        """
+        return memoryview(self.category_codes[column]).toreadonly()
+
+    def get_categorical_values(self, column):
+        """
+        Returns the decoded sub-category of every row of a categorical column
+
+        Parameters
+        ----------
+        column : str
+            The name of the categorical column
+
+        Returns
+        -------
+        list
+            A list with the sub-category of each row
+        """
+        categories = self.categories[column]
+        return [categories[code] for code in self.category_codes[column]]
+
+    def get_category_frequencies(self, column):
+        """
+        Counts the rows of each sub-category of a categorical column
+
+        Parameters
+        ----------
+        column : str
+            The name of the categorical column
+
+        Returns
+        -------
+        dict
+            A dictionary with sub-categories as keys, in the order they were first seen, and their frequency as values
+        """
+        return dict(zip(self.categories[column], self.category_counts[column]))
+
+    def get_grouped_sketches(self, category_column, numerical_column):
+        """
+        Returns the quantile sketches of the values of a numerical column grouped by the sub-categories of a
+        categorical column
+
+        Parameters
+        ----------
+        category_column : str
+            The name of the categorical column grouped by
+        numerical_column : str
+            The name of the numerical column grouped
+
+        Returns
+        -------
+        dict
+            A dictionary with sub-categories as keys, in the order they were first seen, and their QuantileSketch as
+            values, empty if the pair is not one of the SKETCHED_GROUPS or the sketches are not enabled
+        """
+        sketches = self.grouped_sketches.get((category_column, numerical_column))
+        if sketches is None:
+            return {}
+        sketches.extend(QuantileSketch(self.quantile_error_bound)
+                        for _ in range(len(self.categories[category_column]) - len(sketches)))
+        return dict(zip(self.categories[category_column], sketches))
+
@@ -0,0 +1,263 @@
+"""
+Author Student ID: A00316036
+
+Description: This module provides a binary sidecar cache of the parsed dataset. The fixed-width column buffers and the
+encoded category dictionaries are written next to the dataset file, keyed by the file's size, modification time and
+content hash, and memory-mapped on later runs instead of parsing the file again.
+"""
+
+import json
+from array import array
+from hashlib import sha256
+from mmap import mmap, ACCESS_READ
+from os import fspath, replace, stat
+from struct import Struct, calcsize
+from data_ingestion import load_dataset_in_parallel
+from instrumentation import span, add_counter
+from quarantine import Quarantine
+from accumulators import MomentAccumulator, CoMomentAccumulator
+from dataset import NUMERICAL_COLUMNS, CATEGORICAL_COLUMNS, NUMERICAL_TYPECODES, CATEGORY_CODE_TYPECODE, Dataset
+
+CACHE_SUFFIX = ".qscache"
+CACHE_MAGIC_NUMBER = b"QSDC"
+CACHE_VERSION = 3
+# Magic number, version, source size, source modification time (ns), source SHA-256, row count, dictionary size
+CACHE_HEADER = Struct("<4sIQq32sQQ")
+# The source modification time field, rewritten in place when the file is touched without changing its content
+CACHE_MTIME_OFFSET = calcsize("<4sIQ")
+CACHE_MTIME = Struct("<q")
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def get_cache_path(file_path):
+    """
+    Returns the path of the cache file of a dataset file
+
+    Parameters
+    ----------
+    file_path : str or os.PathLike
+        The path of the dataset file
+
+    Returns
+    -------
+    str
+        The path of the sidecar cache file
+    """
+    return fspath(file_path) + CACHE_SUFFIX
+
+
+def get_content_hash(file_path):
+    """
+    Calculates the SHA-256 digest of a file's content
+
+    Parameters
+    ----------
+    file_path : str or os.PathLike
+        The path of the file
+
+    Returns
+    -------
+    bytes
+        The 32-byte digest
+    """
+    content_hash = sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+            content_hash.update(block)
+    return content_hash.digest()
+
+
+def get_padding(size):
+    """
+    Returns the padding keeping the next section of the cache aligned on 8 bytes
+
+    Parameters
+    ----------
+    size : int
+        The size of the current section in bytes
+
+    Returns
+    -------
+    bytes
+        The zero bytes to be written after the section
+    """
+    return b"\0" * (-size % 8)
+
+
+def write_dataset_cache(file_path, dataset, file_stat=None, content_hash=None):
+    """
+    Writes the cache of a parsed dataset file, replacing any previous cache atomically
+
+    Parameters
+    ----------
+    file_path : str or os.PathLike
+        The path of the dataset file the dataset was parsed from
+    dataset : Dataset
+        The parsed dataset
+    file_stat : os.stat_result
+        The status of the dataset file taken before it was parsed, taken now if not given
+    content_hash : bytes
+        The SHA-256 digest of the dataset file calculated before it was parsed, calculated now if not given
+
+    Returns
+    -------
+    None - default
+    """
+    if file_stat is None:
+        file_stat = stat(file_path)
+    if content_hash is None:
+        content_hash = get_content_hash(file_path)
+    dictionary = json.dumps({
+        "categories": dataset.categories,
+        "category_counts": dataset.category_counts,
+        "column_moments": {column: moments.to_dict() for column, moments in dataset.column_moments.items()},
+        "co_moments": [[list(pair), co_moments.to_dict()] for pair, co_moments in dataset.co_moments.items()],
+    }).encode("utf-8")
+
+    cache_path = get_cache_path(file_path)
+    temporary_cache_path = cache_path + ".tmp"
+    with span("write_dataset_cache", "ingestion"), open(temporary_cache_path, "wb") as cache_file:
+        cache_file.write(CACHE_HEADER.pack(CACHE_MAGIC_NUMBER, CACHE_VERSION, file_stat.st_size, file_stat.st_mtime_ns,
+                                           content_hash, len(dataset), len(dictionary)))
+        cache_file.write(get_padding(CACHE_HEADER.size))
+        for buffers in (dataset.numerical_columns, dataset.category_codes):
+            for buffer in buffers.values():
+                data = memoryview(buffer).cast("B")
+                cache_file.write(data)
+                cache_file.write(get_padding(len(data)))
+        cache_file.write(dictionary)
+        add_counter("bytes written", cache_file.tell())
+    replace(temporary_cache_path, cache_path)
+
+
+def refresh_cache_mtime(file_path, mtime_ns):
+    """
+    Records a new modification time of the dataset file in the header of its cache, so that the content of a file that
+    was touched but not changed is hashed only once
+
+    Parameters
+    ----------
+    file_path : str or os.PathLike
+        The path of the dataset file
+    mtime_ns : int
+        The current modification time of the dataset file in nanoseconds
+
+    Returns
+    -------
+    None - default
+    """
+    try:
+        with open(get_cache_path(file_path), "r+b") as cache_file:
+            cache_file.seek(CACHE_MTIME_OFFSET)
+            cache_file.write(CACHE_MTIME.pack(mtime_ns))
+    except OSError as error:
+        print("Error updating the dataset cache:", error)
+
+
+def read_dataset_cache(file_path, verify_content=False):
+    """
+    Memory-maps the cache of a dataset file if it matches the file's current size, modification time and content
+
+    A cache whose size matches but whose modification time does not is accepted only if the content hash matches, the
+    new modification time being recorded in the cache. A truncated or corrupted cache is ignored.
+
+    Parameters
+    ----------
+    file_path : str or os.PathLike
+        The path of the dataset file
+    verify_content : bool
+        Whether the content hash is checked even when the size and modification time match
+
+    Returns
+    -------
+    Dataset or None
+        The dataset reading the memory-mapped columns without copying them, None if there is no valid cache
+    """
+    try:
+        with open(get_cache_path(file_path), "rb") as cache_file:
+            cache = mmap(cache_file.fileno(), 0, access=ACCESS_READ)
+    except (FileNotFoundError, ValueError):
+        return None
+
+    if len(cache) < CACHE_HEADER.size:
+        return None
+    magic_number, version, size, mtime_ns, content_hash, row_count, dictionary_size = CACHE_HEADER.unpack_from(cache)
+    file_stat = stat(file_path)
+    if magic_number != CACHE_MAGIC_NUMBER or version != CACHE_VERSION or size != file_stat.st_size:
+        return None
+    if (verify_content or mtime_ns != file_stat.st_mtime_ns) and content_hash != get_content_hash(file_path):
+        return None
+
+    columns = [(column, NUMERICAL_TYPECODES[column]) for column in NUMERICAL_COLUMNS] + \
+              [(column, CATEGORY_CODE_TYPECODE) for column in CATEGORICAL_COLUMNS]
+    column_sizes = [row_count * array(typecode).itemsize for _, typecode in columns]
+    dictionary_offset = CACHE_HEADER.size + len(get_padding(CACHE_HEADER.size)) + \
+        sum(size + len(get_padding(size)) for size in column_sizes)
+    if dictionary_offset + dictionary_size > len(cache):
+        return None
+    view = memoryview(cache)
+    try:
+        dictionary = json.loads(bytes(view[dictionary_offset:dictionary_offset + dictionary_size]).decode("utf-8"))
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+
+    offset = CACHE_HEADER.size + len(get_padding(CACHE_HEADER.size))
+    buffers = {}
+    for (column, typecode), size in zip(columns, column_sizes):
+        buffers[column] = view[offset:offset + size].cast(typecode)
+        offset += size + len(get_padding(size))
+    if mtime_ns != file_stat.st_mtime_ns:
+        refresh_cache_mtime(file_path, file_stat.st_mtime_ns)
+
+    return Dataset.from_buffers({column: buffers[column] for column in NUMERICAL_COLUMNS},
+                                {column: buffers[column] for column in CATEGORICAL_COLUMNS},
+                                dictionary["categories"], dictionary["category_counts"],
+                                {column: MomentAccumulator.from_dict(state)
+                                 for column, state in dictionary["column_moments"].items()},
+                                {tuple(pair): CoMomentAccumulator.from_dict(state)
+                                 for pair, state in dictionary["co_moments"]})
+
+
+def load_dataset_with_cache(file_path, verify_content=False, worker_count=1, quarantine=None):
+    """
+    Loads a dataset file from its cache, parsing the file and writing a new cache if the cache is missing or stale.
+    No cache is written for a file with rejected rows, so that they are quarantined and reported on every load
+
+    Parameters
+    ----------
+    file_path : str or os.PathLike
+        The path of the dataset file
+    verify_content : bool
+        Whether the content hash is checked even when the size and modification time match
+    worker_count : int
+        The number of worker processes parsing the file if the cache cannot be used
+    quarantine : Quarantine
+        The quarantine the rows rejected while parsing the file are sent to, None to drop them
+
+    Returns
+    -------
+    Dataset
+        The dataset holding every column of the file
+
+    Raises
+    ------
+    FileNotFoundError
+        If the dataset file does not exist
+    """
+    with span("read_dataset_cache", "ingestion"):
+        dataset = read_dataset_cache(file_path, verify_content)
+    if dataset is None:
+        if quarantine is None:
+            # Counting the rejected rows without keeping them
+            quarantine = Quarantine()
+        # Keying the cache on the file as it was before parsing, so that a file modified while it is parsed does not
+        # match the cache on the next load
+        file_stat = stat(file_path)
+        content_hash = get_content_hash(file_path)
+        dataset = load_dataset_in_parallel(file_path, worker_count, quarantine=quarantine)
+        if quarantine.rejected_count == 0:
+            try:
+                write_dataset_cache(file_path, dataset, file_stat, content_hash)
+            except OSError as error:
+                print("Error writing the dataset cache:", error)
+    return dataset
@@ -0,0 +1,157 @@
+"""
+Author Student ID: A00316036
+
+Description: This module provides a frequency table built in a single hashing pass, shared by the numerical (mode)
+and categorical (most and least frequent sub-category) frequency calculations.
+"""
+
+from collections import Counter
+from heapq import nlargest
+
+
+class FrequencyTable:
+    """
+    A table of the frequencies of the distinct values of a column, in the order the values were first seen
+
+    Attributes
+    ----------
+    frequencies : collections.Counter
+        A counter with the distinct values as keys and their frequencies as values
+    """
+
+    def __init__(self, values=()):
+        """
+        Builds the frequency table by counting the given values in one pass
+
+        Parameters
+        ----------
+        values : iterable
+            The values whose frequencies are to be counted
+        """
+        self.frequencies = Counter(values)
+
+    @classmethod
+    def from_counts(cls, counts_dict):
+        """
+        Builds the frequency table from already counted frequencies
+
+        Parameters
+        ----------
+        counts_dict : dict
+            A dictionary with the distinct values as keys and their frequencies as values
+
+        Returns
+        -------
+        FrequencyTable
+            The frequency table holding the given frequencies
+        """
+        frequency_table = cls()
+        frequency_table.frequencies.update(counts_dict)
+        return frequency_table
+
+    def __len__(self):
+        return len(self.frequencies)
+
+    def get_total(self):
+        """
+        Returns the number of values counted
+
+        Returns
+        -------
+        int
+            The sum of all the frequencies
+        """
+        return sum(self.frequencies.values())
+
+    def get_frequency(self, value):
+        """
+        Returns the frequency of the given value
+
+        Parameters
+        ----------
+        value : object
+            The value whose frequency is required
+
+        Returns
+        -------
+        int
+            The frequency of the value, 0 if it was never counted
+        """
+        return self.frequencies[value]
+
+    def get_most_frequent(self):
+        """
+        Returns every value sharing the highest frequency, so that ties can be reported
+
+        Returns
+        -------
+        list
+            A list of (value, frequency) tuples in the order the values were first seen
+        """
+        if not self.frequencies:
+            return []
+        highest_frequency = max(self.frequencies.values())
+        return [(value, frequency) for value, frequency in self.frequencies.items() if frequency == highest_frequency]
+
+    def get_least_frequent(self):
+        """
+        Returns every value sharing the lowest frequency, so that ties can be reported
+
+        Returns
+        -------
+        list
+            A list of (value, frequency) tuples in the order the values were first seen
+        """
+        if not self.frequencies:
+            return []
+        lowest_frequency = min(self.frequencies.values())
+        return [(value, frequency) for value, frequency in self.frequencies.items() if frequency == lowest_frequency]
+
+    def get_modes(self):
+        """
+        Returns all the modes of the counted values, more than one for multimodal data
+
+        Returns
+        -------
+        list
+            A sorted list of the values sharing the highest frequency
+        """
+        return sorted(value for value, _ in self.get_most_frequent())
+
+    def get_mode(self):
+        """
+        Returns the mode of the counted values, the smallest mode being chosen for multimodal data
+
+        Returns
+        -------
+        object
+            The smallest of the most frequent values
+        """
+        return min(value for value, _ in self.get_most_frequent())
+
+    def is_multimodal(self):
+        """
+        Checks whether more than one value shares the highest frequency
+
+        Returns
+        -------
+        bool
+            True if the highest frequency is tied, False otherwise
+        """
+        return len(self.get_most_frequent()) > 1
+
+    def get_top_k(self, k):
+        """
+        Returns the k most frequent values, ties being broken by the order the values were first seen
+
+        Parameters
+        ----------
+        k : int
+            The number of values required
+
+        Returns
+        -------
+        list
+            A list of at most k (value, frequency) tuples ordered from the most frequent
+        """
+        return nlargest(k, self.frequencies.items(), key=lambda item: item[1])
@@ -0,0 +1,243 @@
+"""
+Author Student ID: A00316036
+
+Description: This module provides the group-by aggregation of any numerical column by any categorical column of a
+dataset. The dictionary-encoded category codes of the dataset are the group keys, so the rows are gathered by group in
+one stable pass over the codes and the count, sum, mean, extremes, standard deviation and quartiles of every group are
+computed from contiguous slices - vectorised with NumPy when it is installed.
+"""
+
+from array import array
+from math import sqrt
+from dataset import NUMERICAL_TYPECODES
+from instrumentation import span
+from statistics_backends import get_backend
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class GroupedStatistics:
+    """
+    The aggregates of a numerical column grouped by the sub-categories of a categorical column
+
+    Attributes
+    ----------
+    category_column : str
+        The name of the categorical column grouped by
+    numerical_column : str
+        The name of the numerical column aggregated
+    groups : list
+        The sub-categories, in the order they were first seen, indexed by code
+    counts : list
+        The number of rows of each group
+    sums : list
+        The sum of the values of each group
+    means : list
+        The mean of the values of each group
+    minimums : list
+        The smallest value of each group
+    maximums : list
+        The largest value of each group
+    standard_deviations : list
+        The sample standard deviation of the values of each group, 0 for a group of a single row
+    """
+
+    def __init__(self, category_column, numerical_column, groups, grouped_values, counts):
+        self.category_column = category_column
+        self.numerical_column = numerical_column
+        self.groups = groups
+        self.counts = counts
+        self._grouped_values = grouped_values
+        self._group_starts = [0]
+        for count in counts[:-1]:
+            self._group_starts.append(self._group_starts[-1] + count)
+        self._quartiles = None
+
+        if numpy is not None:
+            values = numpy.asarray(grouped_values)
+            group_codes = numpy.repeat(numpy.arange(len(groups)), counts)
+            count_array = numpy.asarray(counts, dtype=float)
+            self.sums = numpy.bincount(group_codes, weights=values, minlength=len(groups)).tolist()
+            mean_array = numpy.divide(self.sums, count_array, out=numpy.zeros(len(groups)), where=count_array > 0)
+            squared_deviations = numpy.bincount(group_codes, weights=(values - mean_array[group_codes]) ** 2,
+                                                minlength=len(groups))
+            self.means = mean_array.tolist()
+            self.standard_deviations = numpy.sqrt(numpy.divide(squared_deviations, count_array - 1,
+                                                               out=numpy.zeros(len(groups)),
+                                                               where=count_array > 1)).tolist()
+            non_empty_starts = [start for start, count in zip(self._group_starts, counts) if count]
+            minimums = iter(numpy.minimum.reduceat(values, non_empty_starts).tolist() if non_empty_starts else [])
+            maximums = iter(numpy.maximum.reduceat(values, non_empty_starts).tolist() if non_empty_starts else [])
+            self.minimums = [next(minimums) if count else None for count in counts]
+            self.maximums = [next(maximums) if count else None for count in counts]
+        else:
+            group_values = [self.get_group_values(code) for code in range(len(groups))]
+            self.sums = [sum(values) for values in group_values]
+            self.means = [total / count if count else 0 for total, count in zip(self.sums, counts)]
+            self.standard_deviations = [
+                sqrt(sum((value - mean) ** 2 for value in values) / (len(values) - 1)) if len(values) > 1 else 0
+                for values, mean in zip(group_values, self.means)]
+            self.minimums = [min(values) if values else None for values in group_values]
+            self.maximums = [max(values) if values else None for values in group_values]
+
+    def __len__(self):
+        return len(self.groups)
+
+    def get_group_values(self, code):
+        """
+        Returns the values of one group without copying them
+
+        Parameters
+        ----------
+        code : int
+            The code of the group's sub-category
+
+        Returns
+        -------
+        numpy.ndarray or memoryview
+            The values of the group's rows in row order
+        """
+        start = self._group_starts[code]
+        return self._grouped_values[start:start + self.counts[code]]
+
+    def get_grouped_values(self):
+        """
+        Returns the values of every group
+
+        Returns
+        -------
+        dict
+            A dictionary with sub-categories as keys, in the order they were first seen, and their values as values
+        """
+        return {group: self.get_group_values(code) for code, group in enumerate(self.groups)}
+
+    def get_quartiles(self):
+        """
+        Returns the lower quartile, median and upper quartile of every group, calculated once with the statistics
+        backend's selection of the half-split order statistics
+
+        Returns
+        -------
+        list
+            A list of (lower quartile, median, upper quartile) tuples indexed by code, None for an empty group
+        """
+        if self._quartiles is None:
+            backend = get_backend()
+            self._quartiles = [backend.get_quartiles(self.get_group_values(code)) if count else None
+                               for code, count in enumerate(self.counts)]
+        return self._quartiles
+
+    def get_statistic(self, statistic):
+        """
+        Returns one statistic of every group
+
+        Parameters
+        ----------
+        statistic : str
+            The name of the statistic - count, sum, mean, minimum, maximum, standard_deviation, lower_quartile,
+            median, upper_quartile or inter_quartile_range
+
+        Returns
+        -------
+        list
+            The statistic of each group, indexed by code
+
+        Raises
+        ------
+        ValueError
+            If the statistic is unknown
+        """
+        aggregates = {"count": self.counts, "sum": self.sums, "mean": self.means, "minimum": self.minimums,
+                      "maximum": self.maximums, "standard_deviation": self.standard_deviations}
+        if statistic in aggregates:
+            return aggregates[statistic]
+        quartile_indices = {"lower_quartile": 0, "median": 1, "upper_quartile": 2}
+        if statistic in quartile_indices:
+            return [quartiles[quartile_indices[statistic]] if quartiles else None for quartiles in self.get_quartiles()]
+        if statistic == "inter_quartile_range":
+            return [quartiles[2] - quartiles[0] if quartiles else None for quartiles in self.get_quartiles()]
+        raise ValueError(f"Unknown group statistic: {statistic}")
+
+    def to_dict(self, statistic):
+        """
+        Returns one statistic of every group keyed by sub-category
+
+        Parameters
+        ----------
+        statistic : str
+            The name of the statistic, as for get_statistic
+
+        Returns
+        -------
+        dict
+            A dictionary with sub-categories as keys, in the order they were first seen, and the statistic as values
+        """
+        return dict(zip(self.groups, self.get_statistic(statistic)))
+
+
+def group_values(category_column, numerical_column, groups, codes, values, typecode="d"):
+    """
+    Groups the values of a numerical column by the codes of a categorical column and aggregates every group
+
+    Parameters
+    ----------
+    category_column : str
+        The name of the categorical column to group by
+    numerical_column : str
+        The name of the numerical column to be aggregated
+    groups : list
+        The sub-categories of the categorical column, indexed by code
+    codes : list or array.array or memoryview
+        The code of the sub-category of every row
+    values : list or array.array or memoryview
+        The value of every row
+    typecode : str
+        The array typecode of the values
+
+    Returns
+    -------
+    GroupedStatistics
+        The aggregates of every sub-category of the categorical column
+    """
+    if numpy is not None:
+        codes = numpy.asarray(codes)
+        counts = numpy.bincount(codes, minlength=len(groups)).tolist()
+        # A stable sort of the integer codes gathers the rows of each group contiguously, keeping their row order
+        grouped_values = numpy.asarray(values)[numpy.argsort(codes, kind="stable")]
+    else:
+        group_arrays = [array(typecode) for _ in groups]
+        for code, value in zip(codes, values):
+            group_arrays[code].append(value)
+        counts = [len(group_array) for group_array in group_arrays]
+        grouped_values = array(typecode)
+        for group_array in group_arrays:
+            grouped_values.extend(group_array)
+        grouped_values = memoryview(grouped_values).toreadonly()
+    return GroupedStatistics(category_column, numerical_column, groups, grouped_values, counts)
+
+
+def group_by(dataset, category_column, numerical_column):
+    """
+    Groups a numerical column of a dataset by a categorical column and aggregates every group
+
+    Parameters
+    ----------
+    dataset : Dataset
+        The dataset holding both columns
+    category_column : str
+        The name of the categorical column to group by
+    numerical_column : str
+        The name of the numerical column to be aggregated
+
+    Returns
+    -------
+    GroupedStatistics
+        The aggregates of every sub-category of the categorical column
+    """
+    with span("group_by", "statistics", category_column=category_column, numerical_column=numerical_column):
+        return group_values(category_column, numerical_column, list(dataset.categories[category_column]),
+                            dataset.get_category_codes(category_column), dataset.get_column(numerical_column),
+                            NUMERICAL_TYPECODES[numerical_column])
@@ -0,0 +1,148 @@
+"""
+Author Student ID: A00316036
+
+Description: This module provides the aggregation of numerical columns into histogram bin counts. The bin edges and
+counts of a column are computed in one vectorised pass and kept in the shared result cache per column and bin width,
+so histograms are drawn and re-drawn from the counts alone. Mergeable accumulators allow counts to be built from
+shards or streams.
+"""
+
+from bisect import bisect_right
+from result_cache import result_cache
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def get_bin_edges(maximum, bin_width=10):
+    """
+    Returns the bin edges of a histogram starting at 0 and covering the maximum value
+
+    Parameters
+    ----------
+    maximum : float
+        The largest value of the column
+    bin_width : int
+        The width of every bin
+
+    Returns
+    -------
+    list
+        The bin edges - 0, bin_width, 2 * bin_width... up to the first multiple above int(maximum)
+    """
+    return list(range(0, int(maximum) + bin_width, bin_width))
+
+
+class HistogramAccumulator:
+    """
+    A mergeable accumulator of the bin counts of a histogram with fixed bin edges, every bin including its left edge and
+    the last bin also including its right edge (the numpy.histogram and matplotlib convention)
+
+    Attributes
+    ----------
+    bin_edges : list
+        The sorted bin edges
+    counts : list
+        The number of values in each bin
+    """
+
+    def __init__(self, bin_edges):
+        self.bin_edges = list(bin_edges)
+        self.counts = [0] * (len(self.bin_edges) - 1)
+
+    def update_batch(self, values):
+        """
+        Counts a batch of values into the bins, values outside the edges being ignored
+
+        Parameters
+        ----------
+        values : list
+            A list containing numeric values
+
+        Returns
+        -------
+        None - default
+        """
+        if numpy is not None:
+            batch_counts = numpy.histogram(numpy.asarray(values), bins=self.bin_edges)[0].tolist()
+        else:
+            batch_counts = [0] * len(self.counts)
+            first_edge = self.bin_edges[0]
+            last_edge = self.bin_edges[-1]
+            last_bin = len(self.counts) - 1
+            for value in values:
+                if first_edge <= value < last_edge:
+                    batch_counts[bisect_right(self.bin_edges, value) - 1] += 1
+                elif value == last_edge:
+                    batch_counts[last_bin] += 1
+        self.counts = [count + batch_count for count, batch_count in zip(self.counts, batch_counts)]
+
+    def merge(self, other):
+        """
+        Merges the counts of another accumulator with the same bin edges into this one
+
+        Parameters
+        ----------
+        other : HistogramAccumulator
+            The accumulator to be merged
+
+        Returns
+        -------
+        None - default
+
+        Raises
+        ------
+        ValueError
+            If the bin edges of the accumulators differ
+        """
+        if other.bin_edges != self.bin_edges:
+            raise ValueError("Histograms with different bin edges cannot be merged")
+        self.counts = [count + other_count for count, other_count in zip(self.counts, other.counts)]
+
+
+def compute_histogram(values, bin_width=10):
+    """
+    Computes the bin edges and counts of the histogram of a column in one pass
+
+    Parameters
+    ----------
+    values : list or array.array or memoryview
+        The values of a column
+    bin_width : int
+        The width of every bin
+
+    Returns
+    -------
+    tuple
+        The list of bin edges and the list of bin counts
+    """
+    if numpy is not None:
+        array_values = numpy.asarray(values)
+        histogram = HistogramAccumulator(get_bin_edges(array_values.max(), bin_width))
+        histogram.update_batch(array_values)
+    else:
+        histogram = HistogramAccumulator(get_bin_edges(max(values), bin_width))
+        histogram.update_batch(values)
+    return histogram.bin_edges, histogram.counts
+
+
+def get_histogram(values, bin_width=10):
+    """
+    Returns the bin edges and counts of the histogram of a column, computing them in one pass the first time and
+    reading them from the shared result cache afterwards, as long as the column is not modified
+
+    Parameters
+    ----------
+    values : list or array.array or memoryview
+        The values of a column
+    bin_width : int
+        The width of every bin
+
+    Returns
+    -------
+    tuple
+        The list of bin edges and the list of bin counts
+    """
+    return result_cache.get_result(f"histogram.{bin_width}", (values,), lambda: compute_histogram(values, bin_width))
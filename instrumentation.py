@@ -0,0 +1,254 @@
+"""
+Author Student ID: A00316036
+
+Description: This module provides the instrumentation of the stages of a run - named timers around the parsing, the
+statistics and the creation, rendering and encoding of every visualisation, and counters of the rows parsed, the parse
+errors and the bytes written. It is enabled by the QS_TRACE environment variable or the --trace option, both naming
+the file the trace is written to at exit in the Chrome trace event format, which chrome://tracing and Perfetto load.
+When it is disabled, the timers are a shared no-op context manager and the counters return at once. Only the latest
+TRACE_EVENT_LIMIT events are kept, so that tracing a long-running server does not grow its memory without limit.
+"""
+
+import json
+from atexit import register
+from collections import deque
+from contextlib import nullcontext
+from multiprocessing import parent_process
+from os import environ, getpid
+from threading import get_ident
+from time import perf_counter_ns
+
+TRACE_ENVIRONMENT_VARIABLE = "QS_TRACE"
+NULL_SPAN = nullcontext()
+# The number of most recent events kept in the trace, the older ones being dropped
+TRACE_EVENT_LIMIT = 100000
+
+is_enabled = False
+trace_file_path = None
+trace_events = deque(maxlen=TRACE_EVENT_LIMIT)
+# The number of events recorded since the start, including those dropped from the trace
+recorded_event_count = 0
+counters = {}
+
+
+def get_timestamp():
+    """
+    Returns the current time of the monotonic clock shared by every process, in microseconds
+
+    Returns
+    -------
+    int
+        The timestamp in microseconds
+    """
+    return perf_counter_ns() // 1000
+
+
+def record_event(event):
+    """
+    Adds an event to the trace, dropping the oldest event once TRACE_EVENT_LIMIT events are kept
+
+    Parameters
+    ----------
+    event : dict
+        The event in the Chrome trace event format
+
+    Returns
+    -------
+    None - default
+    """
+    global recorded_event_count
+    trace_events.append(event)
+    recorded_event_count += 1
+
+
+class Span:
+    """
+    A timer of one stage of a run, recording a complete trace event when its with block exits
+
+    Attributes
+    ----------
+    name : str
+        The name of the stage
+    category : str
+        The category of the stage - ingestion, statistics or visualisation
+    arguments : dict
+        The details shown with the event
+    start : int
+        The timestamp at which the stage started, in microseconds
+    """
+
+    __slots__ = ("name", "category", "arguments", "start")
+
+    def __init__(self, name, category, arguments):
+        self.name = name
+        self.category = category
+        self.arguments = arguments
+        self.start = None
+
+    def __enter__(self):
+        self.start = get_timestamp()
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        record_event({"name": self.name, "cat": self.category, "ph": "X", "ts": self.start,
+                      "dur": get_timestamp() - self.start, "pid": getpid(), "tid": get_ident(), "args": self.arguments})
+        return False
+
+
+def span(name, category="stage", **arguments):
+    """
+    Returns the timer of a stage, to be used in a with statement
+
+    Parameters
+    ----------
+    name : str
+        The name of the stage
+    category : str
+        The category of the stage
+    arguments : dict
+        The details shown with the event
+
+    Returns
+    -------
+    Span or contextlib.nullcontext
+        The timer, or the shared no-op context manager if the instrumentation is disabled
+    """
+    if not is_enabled:
+        return NULL_SPAN
+    return Span(name, category, arguments)
+
+
+def add_counter(name, amount=1):
+    """
+    Adds to a counter and records its new total as a counter event
+
+    Parameters
+    ----------
+    name : str
+        The name of the counter
+    amount : int
+        The amount added
+
+    Returns
+    -------
+    None - default
+    """
+    if not is_enabled:
+        return
+    counters[name] = counters.get(name, 0) + amount
+    record_event({"name": name, "cat": "counter", "ph": "C", "ts": get_timestamp(), "pid": getpid(),
+                  "args": {name: counters[name]}})
+
+
+def collect_trace(function, *arguments):
+    """
+    Calls a function in a worker process and returns its result with the timer events and counter amounts it
+    recorded, so that the parent process merges them into its trace
+
+    Parameters
+    ----------
+    function : function
+        The function to be called
+    arguments : tuple
+        The arguments of the function
+
+    Returns
+    -------
+    tuple
+        The result of the function, the list of its timer events and a dictionary with counter names as keys and the
+        amounts added as values
+    """
+    if not is_enabled:
+        return function(*arguments), [], {}
+    previous_event_count = recorded_event_count
+    previous_counters = dict(counters)
+    result = function(*arguments)
+    # Taking the events of the function off the end of the trace, except those already dropped from it
+    new_events = [trace_events.pop() for _ in range(min(recorded_event_count - previous_event_count,
+                                                        len(trace_events)))]
+    events = [event for event in reversed(new_events) if event["ph"] != "C"]
+    counter_amounts = {name: total - previous_counters.get(name, 0) for name, total in counters.items()
+                       if total != previous_counters.get(name, 0)}
+    counters.update(previous_counters)
+    return result, events, counter_amounts
+
+
+def merge_trace(events, counter_amounts):
+    """
+    Merges the timer events and counter amounts recorded by a worker process into the trace
+
+    Parameters
+    ----------
+    events : list
+        The timer events of the worker process
+    counter_amounts : dict
+        A dictionary with counter names as keys and the amounts the worker process added as values
+
+    Returns
+    -------
+    None - default
+    """
+    if not is_enabled:
+        return
+    for event in events:
+        record_event(event)
+    for name, amount in counter_amounts.items():
+        add_counter(name, amount)
+
+
+def write_trace(file_path=None):
+    """
+    Writes the trace in the Chrome trace event format, with the totals of the counters as metadata
+
+    Parameters
+    ----------
+    file_path : str
+        The path of the trace file, the one the instrumentation was enabled with if not given
+
+    Returns
+    -------
+    None - default
+    """
+    with open(file_path or trace_file_path, "w") as trace_file:
+        json.dump({"traceEvents": list(trace_events), "displayTimeUnit": "ms", "otherData": {"counters": counters}},
+                  trace_file)
+
+
+def write_trace_at_exit():
+    """
+    Writes the trace when the main process exits, reporting instead of raising any error
+
+    Returns
+    -------
+    None - default
+    """
+    try:
+        write_trace()
+    except OSError as error:
+        print("Error writing the trace:", error)
+
+
+def enable_tracing(file_path):
+    """
+    Enables the instrumentation, including in worker processes started afterwards, the trace being written to the file
+    when the main process exits
+
+    Parameters
+    ----------
+    file_path : str
+        The path of the trace file
+
+    Returns
+    -------
+    None - default
+    """
+    global is_enabled, trace_file_path
+    if not is_enabled and parent_process() is None:
+        register(write_trace_at_exit)
+    is_enabled = True
+    trace_file_path = file_path
+    environ[TRACE_ENVIRONMENT_VARIABLE] = file_path
+
+
+if environ.get(TRACE_ENVIRONMENT_VARIABLE):
+    enable_tracing(environ[TRACE_ENVIRONMENT_VARIABLE])
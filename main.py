@@ -6,94 +6,106 @@ or Categorical Analysis and Visualization based on a selected dataset "QS World
 """
 
 from analysis_and_visualisation import analyse_and_visualise_numerical_data, analyse_and_visualise_categorical_data
+from argparse import ArgumentParser
+from batch_mode import run_batch_mode
+from data_ingestion import load_dataset, load_dataset_in_parallel
+from dataset import CATEGORICAL_COLUMNS, CORRELATION_MATRIX_COLUMNS, Dataset
+from dataset_cache import load_dataset_with_cache
+from group_by import group_by
+from instrumentation import TRACE_ENVIRONMENT_VARIABLE, enable_tracing, span
+from matplotlib_visualisations import display_export_status, wait_for_exports
+from quarantine import Quarantine, get_quarantine_path
+from server_mode import DEFAULT_PORT, run_server_mode
+from os import cpu_count
+from sys import exit
+from year_comparison import run_year_comparison
 
 if __name__ == '__main__':
-    academic_reputation_scores = []
-    overall_scores = []
-    region_scores_dict = {}
-    region_frequency_dict = {}
+    argument_parser = ArgumentParser(description="Exploratory Data Analysis - QS World University Rankings 2023")
+    argument_parser.add_argument("dataset", nargs="?", default="dataset.csv",
+                                 help="the dataset file, optionally gzip-compressed ('-' to read the standard input)")
+    argument_parser.add_argument("--no-cache", action="store_true",
+                                 help="parse the dataset file without reading or writing its binary cache")
+    argument_parser.add_argument("--workers", type=int,
+                                 help="the number of processes parsing a large uncompressed dataset file, rendering "
+                                      "the visualisations in batch mode and loading the files compared (0 for one per "
+                                      "CPU; default: 1, or one per file with --compare)")
+    argument_parser.add_argument("--batch", metavar="OUTPUT_DIRECTORY",
+                                 help="write the analysis report and every visualisation into OUTPUT_DIRECTORY without "
+                                      "any menu or prompt, then exit")
+    argument_parser.add_argument("--serve", type=int, nargs="?", const=DEFAULT_PORT, metavar="PORT",
+                                 help="serve the analyses as JSON and the visualisations as PNG or SVG images over "
+                                      f"HTTP on localhost (default port: {DEFAULT_PORT}) until interrupted, instead of "
+                                      "the menus")
+    argument_parser.add_argument("--quantile-error", type=float, metavar="FRACTION",
+                                 help="estimate the medians, quartiles and box plots from quantile sketches whose rank "
+                                      "error is within FRACTION of the number of scores, instead of sorting the columns")
+    argument_parser.add_argument("--category", choices=[column for column in CATEGORICAL_COLUMNS
+                                                        if column != "Institution Name"], default="Region",
+                                 help="the categorical column the Overall scores are grouped by in the categorical "
+                                      "analysis and visualisation (default: Region)")
+    argument_parser.add_argument("--quarantine", metavar="QUARANTINE_FILE",
+                                 help="the CSV file the rows that cannot be parsed are written to, with their line "
+                                      "number and the reason (default: the dataset file name followed by "
+                                      ".quarantine.csv)")
+    argument_parser.add_argument("--compare", nargs="+", metavar="OTHER_DATASET",
+                                 help="load the dataset files of other years with the dataset file, one per worker "
+                                      "process, and print the changes of the Institutions ranked in consecutive years, "
+                                      "then exit")
+    argument_parser.add_argument("--trace", metavar="TRACE_FILE",
+                                 help="time every stage and count the rows parsed, parse errors and bytes written, "
+                                      "writing them to TRACE_FILE at exit in the Chrome trace event format (also "
+                                      f"enabled by the {TRACE_ENVIRONMENT_VARIABLE} environment variable)")
+    arguments = argument_parser.parse_args()
+    if arguments.quantile_error is not None and not 0 < arguments.quantile_error < 1:
+        argument_parser.error("--quantile-error must be between 0 and 1")
+    if arguments.trace is not None:
+        enable_tracing(arguments.trace)
+    if arguments.compare is not None:
+        file_paths = [arguments.dataset] + arguments.compare
+        # Loading every file in a worker process of its own unless the number of workers is given
+        exit(run_year_comparison(file_paths, len(file_paths) if arguments.workers is None else arguments.workers))
+    if arguments.workers is None:
+        arguments.workers = 1
 
+    quarantine = Quarantine(arguments.quarantine or get_quarantine_path(arguments.dataset))
     try:
-        # Reading the dataset file to add required columns to perform analysis/visualisation
-        with open("dataset.csv") as data_file:
-            data_file.readline()
-
-            for line in data_file:
-                try:
-                    rank, institution, country, region, size, academic_reputation, employer_reputation, citations_per_faculty, international_faculty_ratio, international_students_ratio,  employment_outcomes, overall_score = line.strip().split(',')
-                except ValueError:
-                    print("Error splitting line:", line)
-
-                try:
-                    rank = int(rank)
-                except ValueError:
-                    print("Error parsing Rank to int:", rank)
-                try:
-                    academic_reputation = float(academic_reputation)
-                except ValueError:
-                    if academic_reputation == "":
-                        academic_reputation = 0
-                    else:
-                        print("Error parsing Academic Reputation Score to float:", academic_reputation)
-                try:
-                    employer_reputation = float(employer_reputation)
-                except ValueError:
-                    if employer_reputation == "":
-                        employer_reputation = 0
-                    else:
-                        print("Error parsing Employer Reputation to float:", employer_reputation)
-                try:
-                    citations_per_faculty = float(citations_per_faculty)
-                except ValueError:
-                    if citations_per_faculty == "":
-                        citations_per_faculty = 0
-                    else:
-                        print("Error parsing Citations per faculty to float:", citations_per_faculty)
-                try:
-                    international_faculty_ratio = float(international_faculty_ratio)
-                except ValueError:
-                    if international_faculty_ratio == "":
-                        international_faculty_ratio = 0
-                    else:
-                        print("Error parsing International Faculty Ratio to float:", international_faculty_ratio)
-                try:
-                    international_students_ratio = float(international_students_ratio)
-                except ValueError:
-                    if international_students_ratio == "":
-                        international_students_ratio = 0
-                    else:
-                        print("Error parsing to International Students Ratio to float:", international_students_ratio)
-                try:
-                    employment_outcomes = float(employment_outcomes)
-                except ValueError:
-                    if employment_outcomes == "":
-                        employment_outcomes = 0
-                    else:
-                        print("Error parsing Employment Outcomes to float:", employment_outcomes)
-                try:
-                    overall_score = float(overall_score)
-                except ValueError:
-                    if overall_score == "":
-                        overall_score = 0
-                    else:
-                        print("Error parsing Overall Score to float:", overall_score)
-
-                # Adding the Academic Reputation Score column's values to list
-                academic_reputation_scores.append(academic_reputation)
-                # Adding the Overall Score column's values to list
-                overall_scores.append(overall_score)
-                # Adding the Overall Score column's values to dictionary with key being the Region
-                if region_scores_dict.get(region) is None:
-                    region_scores_dict[region] = [overall_score]
-                else:
-                    region_scores_dict[region].append(overall_score)
-                # Calculating and assigning Region frequency in dictionary with key being the Region
-                region_frequency_dict[region] = region_frequency_dict.get(region, 0) + 1
-
+        # Memory-mapping the cached columns of an unchanged dataset file, or else streaming the file into typed column
+        # buffers and dictionary-encoded categorical columns
+        with span("load dataset", "ingestion", dataset=arguments.dataset):
+            if arguments.dataset == "-":
+                dataset = load_dataset(arguments.dataset, quantile_error_bound=arguments.quantile_error,
+                                       quarantine=quarantine)
+            elif arguments.no_cache:
+                dataset = load_dataset_in_parallel(arguments.dataset, arguments.workers, quarantine=quarantine)
+            else:
+                dataset = load_dataset_with_cache(arguments.dataset, worker_count=arguments.workers,
+                                                  quarantine=quarantine)
     except FileNotFoundError:
         print("File not found")
+        dataset = Dataset()
+    if quarantine.rejected_count:
+        print(quarantine.get_summary())
+    if arguments.quantile_error is not None and dataset.quantile_error_bound is None:
+        # Feeding the loaded or memory-mapped columns to the sketches a block at a time
+        dataset.enable_quantile_sketches(arguments.quantile_error)
+
+    if arguments.batch is not None:
+        exit(run_batch_mode(dataset, arguments.batch, arguments.workers or cpu_count() or 1, arguments.category))
+    if arguments.serve is not None:
+        exit(run_server_mode(dataset, arguments.serve, arguments.workers or cpu_count() or 1, arguments.category))
+
+    # Zero-copy views of the Academic Reputation Score and Overall Score columns
+    academic_reputation_scores = dataset.get_column("Academic Reputation")
+    overall_scores = dataset.get_column("Overall")
+    # Zero-copy views of every indicator score column for the correlation matrix
+    numerical_columns_dict = {column: dataset.get_column(column) for column in CORRELATION_MATRIX_COLUMNS}
+    # Overall Score column's values, frequencies and aggregates grouped by the sub-categories of the chosen column
+    grouped_statistics = group_by(dataset, arguments.category, "Overall")
+    group_sketches_dict = dataset.get_grouped_sketches(arguments.category, "Overall")
 
     while True:
+        display_export_status()
         print("*****************************************************************")
         print("| Exploratory Data Analysis - QS World University Rankings 2023 |")
         print("*****************************************************************")
@@ -107,16 +119,23 @@ if __name__ == '__main__':
             option_selected = int(input("Enter the option (1, 2 or 3): "))
             if option_selected == 1:
                 # Perform analysis and visualisation of numerical data
-                analyse_and_visualise_numerical_data(academic_reputation_scores, overall_scores)
+                analyse_and_visualise_numerical_data(academic_reputation_scores, overall_scores,
+                                                     dataset.column_moments["Academic Reputation"],
+                                                     dataset.column_moments["Overall"],
+                                                     dataset.co_moments[("Academic Reputation", "Overall")],
+                                                     dataset.column_sketches.get("Academic Reputation"),
+                                                     dataset.column_sketches.get("Overall"),
+                                                     numerical_columns_dict)
             elif option_selected == 2:
                 # Perform analysis and visualisation of categorical data
-                analyse_and_visualise_categorical_data(region_scores_dict, region_frequency_dict)
+                analyse_and_visualise_categorical_data(grouped_statistics, group_sketches_dict)
             elif option_selected == 3:
                 break
             else:
                 print("Wrong input!\n")
         except ValueError:
             print("Wrong input!\n")
+    wait_for_exports()
     print()
     print("***********************************")
     print("| Thank you! I hope you liked it. |")
@@ -1,15 +1,334 @@
 """
 Author Student ID: A00316036
 
-Description: This module contains user-defined functions to generate visualisations using matplotlib.
+Description: This module contains user-defined functions to generate visualisations using matplotlib. matplotlib is
+imported only when the first visualisation is generated, so that importing the statistics functions stays fast. The
+visualisations are rendered on the main thread and encoded and written by a background thread, so the menus return at
+once, and exporting a figure again reuses its encoded image as long as the figure is unchanged.
 """
 
-import matplotlib.pyplot as plt
+from concurrent.futures import ThreadPoolExecutor, wait
+from io import BytesIO
+from os import environ, path
+from sys import platform
+from time import perf_counter
+from weakref import WeakKeyDictionary
+from histogram_aggregation import get_histogram
+from instrumentation import span, add_counter
+from result_cache import get_cached_statistic
+
+# Above this number of points the scatter plot is drawn as a density plot (or from a subsample) instead of one marker
+# per Institution
+SCATTER_DENSITY_THRESHOLD = 50000
+SCATTER_SAMPLE_SEED = 2023
+
+pyplot = None
+is_headless_backend_forced = False
+# The single background thread encoding and writing the exported visualisations, in the order they were requested
+export_executor = None
+# The (filename, future) tuples of the exports not reported yet
+export_jobs = []
+# The future of the PNG image last encoded for each figure
+encoded_images = WeakKeyDictionary()
+
+
+def get_pyplot():
+    """
+    Imports matplotlib.pyplot on first use, selecting the non-interactive Agg backend when there is no display
+
+    Returns
+    -------
+    module
+        The matplotlib.pyplot module
+    """
+    global pyplot
+    if pyplot is None:
+        import matplotlib
+        if is_headless():
+            matplotlib.use("Agg")
+        import matplotlib.pyplot
+        pyplot = matplotlib.pyplot
+    return pyplot
+
+
+def is_headless():
+    """
+    Checks whether visualisations cannot be shown, i.e. no backend is forced and there is no display to show them on
+
+    Returns
+    -------
+    bool
+        True if use_headless_backend was called or on Linux/Unix without an X11 or Wayland display and without
+        MPLBACKEND set, False otherwise
+    """
+    if is_headless_backend_forced:
+        return True
+    if environ.get("MPLBACKEND") or platform in ("darwin", "win32"):
+        return False
+    return not (environ.get("DISPLAY") or environ.get("WAYLAND_DISPLAY"))
+
+
+def use_headless_backend():
+    """
+    Forces the non-interactive Agg backend, for visualisations that are only exported
+
+    Returns
+    -------
+    None - default
+    """
+    global is_headless_backend_forced
+    is_headless_backend_forced = True
+    if pyplot is not None:
+        pyplot.switch_backend("Agg")
+
+
+def show_visualisation():
+    """
+    Shows the generated visualisations, unless they can only be exported because the backend is non-interactive
+
+    Returns
+    -------
+    None - default
+    """
+    plt = get_pyplot()
+    if plt.get_backend().lower() != "agg":
+        plt.show()
+
+
+def render_and_save_visualisation(figure, filename, output_directory="."):
+    """
+    Render the generated matplotlib visualisation once and encode the rendered pixels as a PNG file, timing both steps
+
+    Parameters
+    ----------
+    figure : matplotlib.figure.Figure
+        An object containing axes object(s) of visualisation generated
+    filename : str
+        The name of the visualisation to be saved
+    output_directory : str
+        The directory in which the PNG file is saved
+
+    Returns
+    -------
+    tuple
+        The path of the saved PNG file, the rendering time and the PNG encoding time in seconds
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.image import imsave
+
+    start_time = perf_counter()
+    with span("render", "visualisation", visualisation=filename):
+        canvas = FigureCanvasAgg(figure)
+        canvas.draw()
+    rendered_time = perf_counter()
+    file_path = path.join(output_directory, f"{filename}.png")
+    with span("encode", "visualisation", visualisation=filename):
+        imsave(file_path, canvas.buffer_rgba(), dpi=figure.dpi)
+    encoded_time = perf_counter()
+    add_counter("bytes written", path.getsize(file_path))
+    return file_path, rendered_time - start_time, encoded_time - rendered_time
+
+
+def encode_visualisation(figure, filename, image_format="png"):
+    """
+    Render and encode the generated matplotlib visualisation in memory, without writing any file
+
+    Parameters
+    ----------
+    figure : matplotlib.figure.Figure
+        An object containing axes object(s) of visualisation generated
+    filename : str
+        The name of the visualisation, for the instrumentation
+    image_format : str
+        The image format - png or svg
+
+    Returns
+    -------
+    bytes
+        The encoded image
+    """
+    image = BytesIO()
+    with span("encode", "visualisation", visualisation=filename, format=image_format):
+        figure.savefig(image, format=image_format)
+    return image.getvalue()
+
+
+def render_visualisation(figure, filename):
+    """
+    Renders the matplotlib visualisation with the Agg renderer, on the thread that creates and draws the figures, and
+    copies the rendered pixels so that the figure can be drawn again while they are encoded
+
+    Parameters
+    ----------
+    figure : matplotlib.figure.Figure
+        An object containing axes object(s) of visualisation generated
+    filename : str
+        The name of the visualisation, for the instrumentation
+
+    Returns
+    -------
+    numpy.ndarray
+        The RGBA pixels of the rendered figure
+    """
+    import numpy
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    # Rendering on an Agg canvas of its own, as the interactive canvas of the figure may not be Agg-based
+    interactive_canvas = figure.canvas
+    with span("render", "visualisation", visualisation=filename):
+        canvas = FigureCanvasAgg(figure)
+        canvas.draw()
+        pixels = numpy.array(canvas.buffer_rgba())
+    figure.set_canvas(interactive_canvas)
+    return pixels
+
+
+def encode_visualisation_pixels(pixels, dpi, filename):
+    """
+    Encodes the rendered pixels of the matplotlib visualisation as a PNG image, in the background export thread
+
+    Parameters
+    ----------
+    pixels : numpy.ndarray
+        The RGBA pixels of the rendered figure
+    dpi : float
+        The resolution of the figure, recorded in the PNG image
+    filename : str
+        The name of the visualisation, for the instrumentation
+
+    Returns
+    -------
+    bytes
+        The PNG image
+    """
+    from matplotlib.image import imsave
+
+    image = BytesIO()
+    with span("encode", "visualisation", visualisation=filename):
+        imsave(image, pixels, format="png", dpi=dpi)
+    return image.getvalue()
+
+
+def write_visualisation_job(encoding, filename, output_directory):
+    """
+    Writes the PNG image of the matplotlib visualisation, in the background export thread
+
+    Parameters
+    ----------
+    encoding : concurrent.futures.Future
+        The future of the PNG image, queued to the export thread before this job
+    filename : str
+        The name of the visualisation to be saved
+    output_directory : str
+        The directory in which the PNG file is saved
+
+    Returns
+    -------
+    str
+        The path of the saved PNG file
+    """
+    image = encoding.result()
+    file_path = path.join(output_directory, f"{filename}.png")
+    with span("save", "visualisation", visualisation=filename), open(file_path, "wb") as image_file:
+        image_file.write(image)
+    add_counter("bytes written", len(image))
+    return file_path
+
+
+def queue_visualisation_export(figure, filename, output_directory="."):
+    """
+    Renders the matplotlib visualisation and queues the encoding and the writing of its PNG file to the background
+    export thread. The PNG image encoded by the previous export of the figure is written again if the figure has not
+    changed since
+
+    Parameters
+    ----------
+    figure : matplotlib.figure.Figure
+        An object containing axes object(s) of visualisation generated
+    filename : str
+        The name of the visualisation to be saved
+    output_directory : str
+        The directory in which the PNG file is saved
+
+    Returns
+    -------
+    concurrent.futures.Future
+        The future of the path of the saved PNG file
+    """
+    global export_executor
+    if export_executor is None:
+        export_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="export")
+    encoding = encoded_images.get(figure)
+    if encoding is None or figure.stale:
+        pixels = render_visualisation(figure, filename)
+        encoding = export_executor.submit(encode_visualisation_pixels, pixels, figure.dpi, filename)
+        encoded_images[figure] = encoding
+    future = export_executor.submit(write_visualisation_job, encoding, filename, output_directory)
+    export_jobs.append((filename, future))
+    return future
+
+
+def close_visualisation(figure):
+    """
+    Closes the matplotlib visualisation once it is no longer shown or exported, releasing the figure and the PNG image
+    encoded for it
+
+    Parameters
+    ----------
+    figure : matplotlib.figure.Figure
+        An object containing axes object(s) of visualisation generated
+
+    Returns
+    -------
+    None - default
+    """
+    encoded_images.pop(figure, None)
+    get_pyplot().close(figure)
+
+
+def display_export_status():
+    """
+    Displays the exports completed since the last call, successfully or not, and the exports still in progress
+
+    Returns
+    -------
+    None - default
+    """
+    global export_jobs
+    pending_jobs = []
+    for filename, future in export_jobs:
+        if not future.done():
+            pending_jobs.append((filename, future))
+        elif future.exception() is not None:
+            print(f"\nError exporting {filename}:", future.exception())
+        else:
+            print()
+            print("--------------------------" + (len(filename) * "-"))
+            print(f"| {filename} exported successfully |")
+            print("--------------------------" + (len(filename) * "-"))
+    export_jobs = pending_jobs
+    if pending_jobs:
+        print(f"\nExporting in the background: {', '.join(filename for filename, _ in pending_jobs)}")
+
+
+def wait_for_exports():
+    """
+    Waits for the queued exports to complete and displays their status
+
+    Returns
+    -------
+    None - default
+    """
+    if export_jobs:
+        print("\nWaiting for the exports to complete...")
+        wait([future for _, future in export_jobs])
+        display_export_status()
 
 
 def export_visualisation(figure, filename):
     """
-    Export the generated matplotlib visualisation in the directory where the modules are being placed
+    Export the generated matplotlib visualisation in the directory where the modules are being placed, in the
+    background so that the menu returns at once, and close the visualisation when going back
 
     Parameters
     ----------
@@ -26,17 +345,14 @@ def export_visualisation(figure, filename):
     print("------------------------------" + (len(filename) * "-"))
     is_visualisation_exported = False
     while True:
+        display_export_status()
         try:
             option_selected = int(input(f"1. Export Visualisation {'again' if is_visualisation_exported else ''}\n2. Go back\nEnter the option (1 or 2): "))
             if option_selected == 1:
-                figure.savefig(f"{filename}.png")
-                print()
-                print("--------------------------" + (len(filename) * "-"))
-                print(f"| {filename} exported successfully |")
-                print("--------------------------" + (len(filename) * "-"))
-                print()
+                queue_visualisation_export(figure, filename)
                 is_visualisation_exported = True
             elif option_selected == 2:
+                close_visualisation(figure)
                 break
             else:
                 print("\nWrong input!\n")
@@ -44,9 +360,9 @@ def export_visualisation(figure, filename):
             print("\nWrong input!\n")
 
 
-def draw_histogram(academic_reputation_scores, overall_scores):
+def create_histogram_figure(academic_reputation_scores, overall_scores):
     """
-    Generate histograms of the given two lists of values corresponding to the two numerical columns - Academic reputation scores and Overall scores
+    Create the figure of the histograms of the given two lists of values corresponding to the two numerical columns - Academic reputation scores and Overall scores
 
     Parameters
     ----------
@@ -57,32 +373,32 @@ def draw_histogram(academic_reputation_scores, overall_scores):
 
     Returns
     -------
-    None - default
+    matplotlib.figure.Figure
+        The generated figure
     """
-    figure, axes = plt.subplots(1, 2, figsize=(12, 6))
+    figure, axes = get_pyplot().subplots(1, 2, figsize=(12, 6))
     figure.suptitle("QS World University Rankings 2023 - Numerical Visualisation: Histograms")
 
     axes[0].set_title("Frequency of Academic Reputation Scores")
     axes[0].set_xlabel("Academic Reputation Score")
     axes[0].set_ylabel("Frequency")
-    bins = range(0, int(max(academic_reputation_scores)) + 10, 10)
+    bins, counts = get_histogram(academic_reputation_scores)
     axes[0].set_xticks(bins)
-    axes[0].hist(academic_reputation_scores, bins=bins, color="orange", edgecolor="black")
+    axes[0].hist(bins[:-1], bins=bins, weights=counts, color="orange", edgecolor="black")
 
     axes[1].set_title("Frequency of Overall scores")
     axes[1].set_xlabel("Overall Score")
     axes[1].set_ylabel("Frequency")
-    bins = range(0, int(max(overall_scores)) + 10, 10)
+    bins, counts = get_histogram(overall_scores)
     axes[1].set_xticks(bins)
-    axes[1].hist(overall_scores, bins=bins, color="green", edgecolor="black")
+    axes[1].hist(bins[:-1], bins=bins, weights=counts, color="green", edgecolor="black")
 
-    plt.show()
-    export_visualisation(figure, "Numerical Visualisation - Histograms")
+    return figure
 
 
-def draw_numerical_box_plot(academic_reputation_scores, overall_scores):
+def draw_histogram(academic_reputation_scores, overall_scores):
     """
-    Generate box plot of the given two lists of values corresponding to the two numerical columns - Academic reputation scores and Overall scores
+    Generate histograms of the given two lists of values corresponding to the two numerical columns - Academic reputation scores and Overall scores
 
     Parameters
     ----------
@@ -95,24 +411,57 @@ def draw_numerical_box_plot(academic_reputation_scores, overall_scores):
     -------
     None - default
     """
-    figure, axes = plt.subplots(1, 2, figsize=(12, 6))
+    with span("create figure", "visualisation", visualisation="Numerical Visualisation - Histograms"):
+        figure = create_histogram_figure(academic_reputation_scores, overall_scores)
+    show_visualisation()
+    export_visualisation(figure, "Numerical Visualisation - Histograms")
+
+
+def create_numerical_box_plot_figure(academic_reputation_scores, overall_scores, academic_reputation_statistics=None,
+                                     overall_statistics=None):
+    """
+    Create the figure of the box plot of the given two lists of values corresponding to the two numerical columns - Academic reputation scores and Overall scores
+
+    Parameters
+    ----------
+    academic_reputation_scores : list
+        A list containing Academic Reputation Scores
+    overall_scores : list
+        A list containing Overall Scores
+    academic_reputation_statistics : dict
+        The precomputed box plot statistics of the Academic Reputation Scores, calculated from the scores if not given
+    overall_statistics : dict
+        The precomputed box plot statistics of the Overall Scores, calculated from the scores if not given
+
+    Returns
+    -------
+    matplotlib.figure.Figure
+        The generated figure
+    """
+    figure, axes = get_pyplot().subplots(1, 2, figsize=(12, 6))
     figure.suptitle("QS World University Rankings 2023 - Numerical Visualisation: Box plots")
 
     axes[0].set_title("Academic reputation scores of Institutions")
     axes[0].set_ylabel("Academic reputation scores")
-    axes[0].boxplot(academic_reputation_scores, showmeans=True, meanline=True, showfliers=False)
+    # Drawing the boxes from their quartiles, computed by the statistics backend, instead of letting matplotlib sort
+    # the values again
+    if academic_reputation_statistics is None:
+        academic_reputation_statistics = get_cached_statistic("get_box_plot_statistics", academic_reputation_scores)
+    axes[0].bxp([academic_reputation_statistics], showmeans=True, meanline=True, showfliers=False)
 
     axes[1].set_title("Overall scores of Institutions")
     axes[1].set_ylabel("Overall scores")
-    axes[1].boxplot(overall_scores, showmeans=True, meanline=True, showfliers=False)
+    if overall_statistics is None:
+        overall_statistics = get_cached_statistic("get_box_plot_statistics", overall_scores)
+    axes[1].bxp([overall_statistics], showmeans=True, meanline=True, showfliers=False)
 
-    plt.show()
-    export_visualisation(figure, "Numerical Visualisation - Box plots")
+    return figure
 
 
-def draw_scatter_plot(academic_reputation_scores, overall_scores):
+def draw_numerical_box_plot(academic_reputation_scores, overall_scores, academic_reputation_statistics=None,
+                            overall_statistics=None):
     """
-    Generate scatter plot of the given two lists of values corresponding to the two numerical columns - Academic reputation scores and Overall scores
+    Generate box plot of the given two lists of values corresponding to the two numerical columns - Academic reputation scores and Overall scores
 
     Parameters
     ----------
@@ -120,65 +469,195 @@ def draw_scatter_plot(academic_reputation_scores, overall_scores):
         A list containing Academic Reputation Scores
     overall_scores : list
         A list containing Overall Scores
+    academic_reputation_statistics : dict
+        The precomputed box plot statistics of the Academic Reputation Scores, calculated from the scores if not given
+    overall_statistics : dict
+        The precomputed box plot statistics of the Overall Scores, calculated from the scores if not given
 
     Returns
     -------
     None - default
     """
-    figure, axes = plt.subplots(figsize=(12, 6))
+    with span("create figure", "visualisation", visualisation="Numerical Visualisation - Box plots"):
+        figure = create_numerical_box_plot_figure(academic_reputation_scores, overall_scores,
+                                                  academic_reputation_statistics, overall_statistics)
+    show_visualisation()
+    export_visualisation(figure, "Numerical Visualisation - Box plots")
+
+
+def get_stratified_sample_indices(values, sample_size, strata_count=10, seed=SCATTER_SAMPLE_SEED):
+    """
+    Draws a random sample of row indices stratified by equal-width ranges of the given values, so that every range is
+    represented in proportion to its number of rows
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        The values whose ranges define the strata
+    sample_size : int
+        The approximate number of indices wanted
+    strata_count : int
+        The number of equal-width ranges
+    seed : int
+        The seed of the random generator, making the sample reproducible
+
+    Returns
+    -------
+    numpy.ndarray
+        The sorted indices of the sampled rows
+    """
+    import numpy
+    random_generator = numpy.random.default_rng(seed)
+    strata = numpy.digitize(values, numpy.linspace(values.min(), values.max(), strata_count + 1)[1:-1])
+    sampled_indices = []
+    for stratum in range(strata_count):
+        stratum_indices = numpy.flatnonzero(strata == stratum)
+        if len(stratum_indices):
+            stratum_sample_size = max(1, round(sample_size * len(stratum_indices) / len(values)))
+            sampled_indices.append(random_generator.choice(stratum_indices, min(stratum_sample_size,
+                                                                                len(stratum_indices)), replace=False))
+    return numpy.sort(numpy.concatenate(sampled_indices))
+
+
+def create_scatter_plot_figure(academic_reputation_scores, overall_scores, density_threshold=SCATTER_DENSITY_THRESHOLD,
+                               large_data_mode="density"):
+    """
+    Create the figure of the scatter plot of the given two lists of values corresponding to the two numerical columns - Academic reputation scores and Overall scores
+
+    Above the density threshold the render time is bounded by drawing either the hexagonally binned density of the
+    points or a stratified random subsample of density_threshold points.
+
+    Parameters
+    ----------
+    academic_reputation_scores : list
+        A list containing Academic Reputation Scores
+    overall_scores : list
+        A list containing Overall Scores
+    density_threshold : int
+        The largest number of points drawn as individual markers
+    large_data_mode : str
+        "density" for a hexbin density plot or "sample" for a stratified subsample above the threshold
+
+    Returns
+    -------
+    matplotlib.figure.Figure
+        The generated figure
+    """
+    figure, axes = get_pyplot().subplots(figsize=(12, 6))
     figure.suptitle("QS World University Rankings 2023 - Numerical Visualisation: Scatter plot")
 
     axes.set_title("Top-ranked Institutions' scores")
     axes.set_xlabel("Overall score")
     axes.set_ylabel("Academic reputation score")
-    axes.scatter(academic_reputation_scores, overall_scores, marker=".")
+    if len(academic_reputation_scores) <= density_threshold:
+        axes.scatter(academic_reputation_scores, overall_scores, marker=".")
+        return figure
+
+    import numpy
+    # Reading the column buffers without copying them
+    x_values = numpy.asarray(academic_reputation_scores)
+    y_values = numpy.asarray(overall_scores)
+    if large_data_mode == "sample":
+        sampled_indices = get_stratified_sample_indices(x_values, density_threshold)
+        axes.set_title(f"Top-ranked Institutions' scores (stratified sample of {len(sampled_indices)} of "
+                       f"{len(x_values)})")
+        axes.scatter(x_values[sampled_indices], y_values[sampled_indices], marker=".")
+    else:
+        axes.set_title(f"Top-ranked Institutions' scores (density of {len(x_values)})")
+        density = axes.hexbin(x_values, y_values, gridsize=60, mincnt=1, bins="log", cmap="viridis")
+        figure.colorbar(density, ax=axes, label="Number of Institutions")
+    return figure
+
+
+def draw_scatter_plot(academic_reputation_scores, overall_scores):
+    """
+    Generate scatter plot of the given two lists of values corresponding to the two numerical columns - Academic reputation scores and Overall scores
+
+    Parameters
+    ----------
+    academic_reputation_scores : list
+        A list containing Academic Reputation Scores
+    overall_scores : list
+        A list containing Overall Scores
 
-    plt.show()
+    Returns
+    -------
+    None - default
+    """
+    with span("create figure", "visualisation", visualisation="Numerical Visualisation - Scatter plot"):
+        figure = create_scatter_plot_figure(academic_reputation_scores, overall_scores)
+    show_visualisation()
     export_visualisation(figure, "Numerical Visualisation - Scatter plot")
 
 
-def draw_pie_chart(region_frequency_dict):
+def create_pie_chart_figure(region_frequency_dict, category_column="Region"):
     """
-    Generate Pie chart of the categorical data along with its frequencies
+    Create the figure of the Pie chart of the categorical data along with its frequencies
 
     Parameters
     ----------
     region_frequency_dict : dict
         A dictionary with region sub-category as the key and the frequency as value
+    category_column : str
+        The name of the categorical column whose sub-categories are shown
 
     Returns
     -------
-    None - default
+    matplotlib.figure.Figure
+        The generated figure
     """
-    figure, axes = plt.subplots(figsize=(8, 6))
+    figure, axes = get_pyplot().subplots(figsize=(8, 6))
     figure.suptitle("QS World University Rankings 2023 - Categorical Visualisation: Pie chart")
 
-    axes.set_title("Top-ranked Institutions by region")
+    axes.set_title(f"Top-ranked Institutions by {category_column.lower()}")
     axes.pie(region_frequency_dict.values(), labels=region_frequency_dict.keys(), autopct="%.0f%%")
 
-    plt.show()
-    export_visualisation(figure, "Categorical Visualisation - Pie chart")
+    return figure
 
 
-def draw_bar_chart(region_frequency_dict):
+def draw_pie_chart(region_frequency_dict, category_column="Region"):
     """
-    Generate Bar chart of the categorical data along with its frequencies
+    Generate Pie chart of the categorical data along with its frequencies
 
     Parameters
     ----------
     region_frequency_dict : dict
         A dictionary with region sub-category as the key and the frequency as value
+    category_column : str
+        The name of the categorical column whose sub-categories are shown
 
     Returns
     -------
     None - default
     """
-    figure, axes = plt.subplots(figsize=(12, 6))
+    with span("create figure", "visualisation", visualisation="Categorical Visualisation - Pie chart"):
+        figure = create_pie_chart_figure(region_frequency_dict, category_column)
+    show_visualisation()
+    export_visualisation(figure, "Categorical Visualisation - Pie chart")
+
+
+def create_bar_chart_figure(region_frequency_dict, category_column="Region"):
+    """
+    Create the figure of the Bar chart of the categorical data along with its frequencies
+
+    Parameters
+    ----------
+    region_frequency_dict : dict
+        A dictionary with region sub-category as the key and the frequency as value
+    category_column : str
+        The name of the categorical column whose sub-categories are shown
+
+    Returns
+    -------
+    matplotlib.figure.Figure
+        The generated figure
+    """
+    figure, axes = get_pyplot().subplots(figsize=(12, 6))
     figure.suptitle("QS World University Rankings 2023 - Categorical Visualisation: Bar chart")
 
-    axes.set_title("Top-ranked Institutions by region")
+    axes.set_title(f"Top-ranked Institutions by {category_column.lower()}")
     axes.set_xlabel("Total number of top-ranked Institutions")
-    axes.set_ylabel("Region")
+    axes.set_ylabel(category_column)
     y_pos = [value for value in range(len(region_frequency_dict))]
     axes.set_yticks(y_pos)
     axes.set_yticklabels(region_frequency_dict.keys())
@@ -187,31 +666,136 @@ def draw_bar_chart(region_frequency_dict):
 
     axes.barh(y_pos, region_frequency_dict.values(), align="center")
 
-    plt.show()
+    return figure
+
+
+def draw_bar_chart(region_frequency_dict, category_column="Region"):
+    """
+    Generate Bar chart of the categorical data along with its frequencies
+
+    Parameters
+    ----------
+    region_frequency_dict : dict
+        A dictionary with region sub-category as the key and the frequency as value
+    category_column : str
+        The name of the categorical column whose sub-categories are shown
+
+    Returns
+    -------
+    None - default
+    """
+    with span("create figure", "visualisation", visualisation="Categorical Visualisation - Bar chart"):
+        figure = create_bar_chart_figure(region_frequency_dict, category_column)
+    show_visualisation()
     export_visualisation(figure, "Categorical Visualisation - Bar chart")
 
 
-def draw_categorical_box_plot(region_scores_dict):
+def create_categorical_box_plot_figure(region_scores_dict, region_statistics=None, category_column="Region"):
     """
-    Generate Box plot of the categorical data where region is the category and the corresponding scores of institutions in that region
+    Create the figure of the Box plot of the categorical data where region is the category and the corresponding scores of institutions in that region
 
     Parameters
     ----------
     region_scores_dict : dict
         A dictionary with region sub-category as the key and the list of Institutions' scores as value
+    region_statistics : list
+        The precomputed box plot statistics of each region, in the order of the dictionary, calculated from the scores
+        if not given
+    category_column : str
+        The name of the categorical column whose sub-categories are shown
 
     Returns
     -------
-    None - default
+    matplotlib.figure.Figure
+        The generated figure
     """
-    figure, axes = plt.subplots(figsize=(10, 6))
+    figure, axes = get_pyplot().subplots(figsize=(10, 6))
     figure.suptitle("QS World University Rankings 2023 - Categorical Visualisation: Box plots")
 
-    axes.set_title("Top-ranked Institutions by region")
-    axes.set_xlabel("Region")
+    axes.set_title(f"Top-ranked Institutions by {category_column.lower()}")
+    axes.set_xlabel(category_column)
     axes.set_ylabel("Overall scores of Institutions")
-    axes.boxplot(list(region_scores_dict.values()), showfliers=False, showmeans=True, meanline=True,
-                 labels=region_scores_dict.keys())
+    if region_statistics is None:
+        region_statistics = [get_cached_statistic("get_box_plot_statistics", scores)
+                             for scores in region_scores_dict.values()]
+    axes.bxp(region_statistics, showfliers=False, showmeans=True, meanline=True)
+    axes.set_xticklabels(region_scores_dict.keys())
+
+    return figure
 
-    plt.show()
+
+def draw_categorical_box_plot(region_scores_dict, region_statistics=None, category_column="Region"):
+    """
+    Generate Box plot of the categorical data where region is the category and the corresponding scores of institutions in that region
+
+    Parameters
+    ----------
+    region_scores_dict : dict
+        A dictionary with region sub-category as the key and the list of Institutions' scores as value
+    region_statistics : list
+        The precomputed box plot statistics of each region, in the order of the dictionary, calculated from the scores
+        if not given
+    category_column : str
+        The name of the categorical column whose sub-categories are shown
+
+    Returns
+    -------
+    None - default
+    """
+    with span("create figure", "visualisation", visualisation="Categorical Visualisation - Box plots"):
+        figure = create_categorical_box_plot_figure(region_scores_dict, region_statistics, category_column)
+    show_visualisation()
     export_visualisation(figure, "Categorical Visualisation - Box plots")
+
+
+def create_correlation_heatmap_figure(correlation_matrix):
+    """
+    Create the figure of the heatmap of the correlation matrix of the numerical columns
+
+    Parameters
+    ----------
+    correlation_matrix : dict
+        A dictionary with the column names as keys and dictionaries of their correlation with every column as values
+
+    Returns
+    -------
+    matplotlib.figure.Figure
+        The generated figure
+    """
+    column_names = list(correlation_matrix)
+    correlations = [[correlation_matrix[row_name][column] for column in column_names] for row_name in column_names]
+    figure, axes = get_pyplot().subplots(figsize=(10, 8))
+    figure.suptitle("QS World University Rankings 2023 - Numerical Visualisation: Correlation heatmap")
+
+    axes.set_title("Correlation between the scores of Institutions")
+    heatmap = axes.imshow(correlations, cmap="coolwarm", vmin=-1, vmax=1)
+    axes.set_xticks(range(len(column_names)))
+    axes.set_xticklabels(column_names, rotation=45, ha="right")
+    axes.set_yticks(range(len(column_names)))
+    axes.set_yticklabels(column_names)
+    for row, row_correlations in enumerate(correlations):
+        for column, correlation in enumerate(row_correlations):
+            axes.text(column, row, f"{correlation:.2f}", ha="center", va="center")
+    figure.colorbar(heatmap, ax=axes, label="Pearson correlation")
+    figure.tight_layout()
+
+    return figure
+
+
+def draw_correlation_heatmap(correlation_matrix):
+    """
+    Generate heatmap of the correlation matrix of the numerical columns
+
+    Parameters
+    ----------
+    correlation_matrix : dict
+        A dictionary with the column names as keys and dictionaries of their correlation with every column as values
+
+    Returns
+    -------
+    None - default
+    """
+    with span("create figure", "visualisation", visualisation="Numerical Visualisation - Correlation heatmap"):
+        figure = create_correlation_heatmap_figure(correlation_matrix)
+    show_visualisation()
+    export_visualisation(figure, "Numerical Visualisation - Correlation heatmap")
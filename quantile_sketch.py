@@ -0,0 +1,240 @@
+"""
+Author Student ID: A00316036
+
+Description: This module provides a mergeable quantile sketch of a numerical column, answering median, quartile and box
+plot queries from a bounded number of retained values instead of the whole sorted column. It follows the KLL sketch -
+a stack of compactors where each compaction sorts a full level and promotes every other value, with twice the weight,
+to the level above. Every compaction is accounted for, so the sketch reports the bound of its rank error and whether
+its answers are still exact.
+"""
+
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from math import ceil
+from statistics_backends import get_half_split_quartiles, get_whisker_limits, build_box_plot_statistics
+
+DEFAULT_ERROR_BOUND = 0.01
+# The guaranteed rank error is the number of levels divided by the capacity of a level, and 32 levels hold more than
+# 2 ** 32 times the capacity of a level
+MAXIMUM_LEVEL_COUNT = 32
+
+
+class QuantileSketch:
+    """
+    A mergeable quantile sketch whose estimated rank of any value is within error_bound * count of its true rank
+
+    Attributes
+    ----------
+    error_bound : float
+        The guaranteed bound of the rank error as a fraction of the number of values
+    capacity : int
+        The number of values a level holds before it is compacted
+    count : int
+        The number of values absorbed
+    minimum : float
+        The smallest value absorbed, None if there is none
+    maximum : float
+        The largest value absorbed, None if there is none
+    total : float
+        The sum of the values absorbed
+    levels : list
+        The lists of values retained at each level, a value at level h standing for 2 ** h values absorbed
+    rank_error : int
+        The bound of the rank error accumulated by the compactions so far, 0 while the sketch is exact
+    """
+
+    def __init__(self, error_bound=DEFAULT_ERROR_BOUND):
+        if not 0 < error_bound < 1:
+            raise ValueError("The error bound of a quantile sketch must be between 0 and 1")
+        self.error_bound = error_bound
+        self.capacity = 2 * ceil(MAXIMUM_LEVEL_COUNT / (2 * error_bound))
+        self.count = 0
+        self.minimum = None
+        self.maximum = None
+        self.total = 0
+        self.levels = [[]]
+        self.rank_error = 0
+        self._compaction_offsets = [0]
+
+    def update(self, value):
+        """
+        Absorbs one value
+
+        Parameters
+        ----------
+        value : float
+            The value to be absorbed
+
+        Returns
+        -------
+        None - default
+        """
+        self.update_batch([value])
+
+    def update_batch(self, values):
+        """
+        Absorbs a batch of values
+
+        Parameters
+        ----------
+        values : list
+            A list containing numeric values
+
+        Returns
+        -------
+        None - default
+        """
+        if len(values) == 0:
+            return
+        batch_minimum = min(values)
+        batch_maximum = max(values)
+        self.minimum = batch_minimum if self.minimum is None else min(self.minimum, batch_minimum)
+        self.maximum = batch_maximum if self.maximum is None else max(self.maximum, batch_maximum)
+        self.count += len(values)
+        self.total += sum(values)
+        self.levels[0].extend(values)
+        self.compress()
+
+    def merge(self, other):
+        """
+        Merges another sketch into this one, as if its values had been absorbed by this one
+
+        Parameters
+        ----------
+        other : QuantileSketch
+            The sketch to be merged
+
+        Returns
+        -------
+        None - default
+        """
+        if other.count == 0:
+            return
+        self.minimum = other.minimum if self.minimum is None else min(self.minimum, other.minimum)
+        self.maximum = other.maximum if self.maximum is None else max(self.maximum, other.maximum)
+        self.count += other.count
+        self.total += other.total
+        self.rank_error += other.rank_error
+        for level, values in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append([])
+                self._compaction_offsets.append(0)
+            self.levels[level].extend(values)
+        self.compress()
+
+    def compress(self):
+        """
+        Compacts every level holding more values than the capacity, sorting it and promoting one value of each pair of
+        neighbouring values to the level above (an odd value out stays), which moves the estimated rank of any value by
+        at most the weight of the level
+
+        Returns
+        -------
+        None - default
+        """
+        for level in range(len(self.levels)):
+            values = self.levels[level]
+            if len(values) <= self.capacity:
+                continue
+            values.sort()
+            remaining_values = [values.pop()] if len(values) % 2 else []
+            # Alternating which value of each pair is promoted, so the errors of successive compactions cancel out
+            offset = self._compaction_offsets[level]
+            self._compaction_offsets[level] = 1 - offset
+            if level + 1 == len(self.levels):
+                self.levels.append([])
+                self._compaction_offsets.append(0)
+            self.levels[level + 1].extend(values[offset::2])
+            self.levels[level] = remaining_values
+            self.rank_error += 1 << level
+
+    def is_exact(self):
+        """
+        Checks whether every value absorbed is still retained, in which case every answer is exact
+
+        Returns
+        -------
+        bool
+            True if no compaction has happened, False otherwise
+        """
+        return self.rank_error == 0
+
+    def get_error_bound(self):
+        """
+        Returns the bound of the rank error of the answers so far as a fraction of the number of values, never more
+        than the error bound the sketch was created with
+
+        Returns
+        -------
+        float
+            The bound of the rank error, 0 if the sketch is exact
+        """
+        return self.rank_error / self.count if self.count else 0
+
+    def get_sorted_values(self):
+        """
+        Returns the retained values in order with their cumulative weights
+
+        Returns
+        -------
+        tuple
+            The sorted list of retained values and the list of the total weight of the values up to each of them
+        """
+        weighted_values = sorted((value, 1 << level) for level, values in enumerate(self.levels) for value in values)
+        return [value for value, _ in weighted_values], list(accumulate(weight for _, weight in weighted_values))
+
+    def get_quantile(self, fraction):
+        """
+        Estimates the value below which the given fraction of the values lie
+
+        Parameters
+        ----------
+        fraction : float
+            The fraction of the values, between 0 and 1
+
+        Returns
+        -------
+        float
+            The estimated quantile
+        """
+        sorted_values, cumulative_weights = self.get_sorted_values()
+        index = bisect_left(cumulative_weights, max(1, fraction * self.count))
+        return sorted_values[min(index, len(sorted_values) - 1)]
+
+    def get_quartiles(self):
+        """
+        Returns the lower quartile, median and upper quartile, calculated exactly as the halves' medians while the
+        sketch is exact and estimated from the retained values otherwise
+
+        Returns
+        -------
+        tuple
+            The lower quartile, the median and the upper quartile
+        """
+        if self.is_exact():
+            return get_half_split_quartiles(sorted(self.levels[0]))
+        return tuple(self.get_quantile(fraction) for fraction in (0.25, 0.5, 0.75))
+
+    def get_box_plot_statistics(self, whisker_factor=1.5):
+        """
+        Builds the statistics a box of a box plot is drawn from, the whiskers reaching the most extreme retained
+        values within whisker_factor inter quartile ranges of the box
+
+        Parameters
+        ----------
+        whisker_factor : float
+            The length of the whiskers in inter quartile ranges
+
+        Returns
+        -------
+        dict
+            A dictionary in the format of matplotlib.axes.Axes.bxp, without outliers
+        """
+        lower_quartile, median, upper_quartile = self.get_quartiles()
+        lower_limit, upper_limit = get_whisker_limits(lower_quartile, upper_quartile, whisker_factor)
+        # The extremes are known exactly, so they are the whiskers' ends whenever they lie within the limits
+        sorted_values = [self.minimum] + self.get_sorted_values()[0] + [self.maximum]
+        return build_box_plot_statistics(lower_quartile, median, upper_quartile,
+                                         sorted_values[bisect_left(sorted_values, lower_limit)],
+                                         sorted_values[bisect_right(sorted_values, upper_limit) - 1],
+                                         self.total / self.count)
@@ -0,0 +1,173 @@
+"""
+Author Student ID: A00316036
+
+Description: This module provides the quarantine of the rows rejected while parsing a dataset file. Every rejected row
+is kept with its line number and the reason it was rejected, and the number of invalid fields of each column is
+counted, so that a dirty file is reported by one summary at the end of the load instead of an error per field. The
+rejected rows are written to a CSV quarantine file in blocks, and without a file only the first block of them is kept.
+"""
+
+import csv
+from os import fspath
+
+QUARANTINE_SUFFIX = ".quarantine.csv"
+QUARANTINE_HEADER = ("Line number", "Reason", "Line")
+QUARANTINE_BLOCK_SIZE = 1 << 14
+# The key of the counter of the lines without the expected number of fields
+FIELD_COUNT_ERROR = "Number of fields"
+
+
+def get_quarantine_path(source):
+    """
+    Returns the path of the quarantine file of a dataset source
+
+    Parameters
+    ----------
+    source : str or os.PathLike
+        The path of the dataset file, or "-" for the standard input
+
+    Returns
+    -------
+    str
+        The path of the quarantine file, next to the dataset file or in the working directory for the standard input
+    """
+    source = fspath(source)
+    return ("stdin" if source == "-" else source) + QUARANTINE_SUFFIX
+
+
+class Quarantine:
+    """
+    The rows rejected while parsing a dataset source, with the number of errors of each column
+
+    Attributes
+    ----------
+    file_path : str
+        The path of the CSV file the rejected rows are written to, None to keep them in memory only
+    row_limit : int
+        The number of rejected rows kept in memory when there is no file, the others being only counted, None to keep
+        every one of them
+    line_count : int
+        The number of lines of the source read so far, including the header
+    row_count : int
+        The number of rows parsed so far, rejected or not
+    rejected_count : int
+        The number of rows rejected so far
+    error_counts : dict
+        A dictionary with column names (or FIELD_COUNT_ERROR) as keys and their numbers of errors as values
+    rejected_rows : list
+        The (line number, reason, line) tuples of the rejected rows not yet written to the file
+    """
+
+    def __init__(self, file_path=None, row_limit=QUARANTINE_BLOCK_SIZE):
+        self.file_path = file_path
+        self.row_limit = row_limit
+        self.line_count = 0
+        self.row_count = 0
+        self.rejected_count = 0
+        self.error_counts = {}
+        self.rejected_rows = []
+        self._is_file_started = False
+
+    def reject(self, line_number, reason, line, error_columns=(FIELD_COUNT_ERROR,)):
+        """
+        Quarantines a row, writing the rejected rows to the file once a block of them is held
+
+        Parameters
+        ----------
+        line_number : int
+            The line number of the row in the source, starting at 1 for the header
+        reason : str
+            The reason the row was rejected
+        line : str
+            The line of the row
+        error_columns : tuple
+            The columns whose fields are invalid, or FIELD_COUNT_ERROR if the line could not be split into fields
+
+        Returns
+        -------
+        None - default
+        """
+        if not self.is_full():
+            self.rejected_rows.append((line_number, reason, line))
+        self.rejected_count += 1
+        for column in error_columns:
+            self.error_counts[column] = self.error_counts.get(column, 0) + 1
+        if len(self.rejected_rows) >= QUARANTINE_BLOCK_SIZE:
+            self.flush()
+
+    def merge(self, other):
+        """
+        Merges the quarantine of the lines following those read so far, such as those of a shard of the file parsed
+        by a worker process, renumbering its rows after the lines of this one
+
+        Parameters
+        ----------
+        other : Quarantine
+            The quarantine of the following lines, numbered from 1
+
+        Returns
+        -------
+        None - default
+        """
+        renumbered_rows = [(self.line_count + line_number, reason, line)
+                           for line_number, reason, line in other.rejected_rows]
+        if self.file_path is None and self.row_limit is not None:
+            renumbered_rows = renumbered_rows[:max(self.row_limit - len(self.rejected_rows), 0)]
+        self.rejected_rows.extend(renumbered_rows)
+        self.line_count += other.line_count
+        self.row_count += other.row_count
+        self.rejected_count += other.rejected_count
+        for column, error_count in other.error_counts.items():
+            self.error_counts[column] = self.error_counts.get(column, 0) + error_count
+        if len(self.rejected_rows) >= QUARANTINE_BLOCK_SIZE:
+            self.flush()
+
+    def is_full(self):
+        """
+        Checks whether the rejected rows are only counted from now on, as there is no file and the row limit is reached
+
+        Returns
+        -------
+        bool
+            True if no more rejected rows are kept, False otherwise
+        """
+        return self.file_path is None and self.row_limit is not None and len(self.rejected_rows) >= self.row_limit
+
+    def flush(self):
+        """
+        Writes the rejected rows held in memory to the quarantine file in one block, replacing any previous quarantine
+        file on the first write. If the file cannot be written, the error is reported once and the rows rejected
+        afterwards are kept in memory up to the row limit
+
+        Returns
+        -------
+        None - default
+        """
+        if self.file_path is None or not self.rejected_rows:
+            return
+        try:
+            with open(self.file_path, "a" if self._is_file_started else "w", newline="") as quarantine_file:
+                writer = csv.writer(quarantine_file)
+                if not self._is_file_started:
+                    writer.writerow(QUARANTINE_HEADER)
+                writer.writerows(self.rejected_rows)
+        except OSError as error:
+            print("Error writing the quarantine file:", error)
+            self.file_path = None
+        self._is_file_started = True
+        self.rejected_rows = []
+
+    def get_summary(self):
+        """
+        Summarises the rows rejected and the errors of each column
+
+        Returns
+        -------
+        str
+            The summary, empty if no row was rejected
+        """
+        if not self.rejected_count:
+            return ""
+        errors = ", ".join(f"{column}: {error_count}" for column, error_count in self.error_counts.items())
+        destination = f" and written to {self.file_path}" if self.file_path is not None else ""
+        return f"{self.rejected_count} of {self.row_count} rows were rejected{destination} ({errors})"
@@ -0,0 +1,237 @@
+"""
+Author Student ID: A00316036
+
+Description: This module provides the cache of the statistics computed from the columns of a dataset, shared by the
+text analyses and the visualisations. A result is keyed by the name of its statistic and the fingerprint of every
+column it is computed from - the identity, length and checksum of the column - so going back to an analysis or a chart
+reads its statistics instead of computing them again. The checksum of a read-only column, such as a view of a dataset's
+column, is calculated once and stored, while mutable buffers are checksummed on every lookup. Lists and other columns
+without a contiguous buffer are not cached, as fingerprinting them would copy every value on every lookup. The cache
+holds a bounded number of results, evicting the least recently used one, so that a long-running process does not grow
+without limit.
+"""
+
+from array import array
+from collections import OrderedDict
+from threading import Lock
+from weakref import finalize
+from zlib import crc32
+from instrumentation import span, add_counter
+from statistics_backends import get_backend
+
+RESULT_CACHE_SIZE = 128
+
+# The number of values and the checksum of each read-only column, by the id of its identity, calculated once per column
+# and removed when the column is freed (memoryviews hash their values, so they cannot be weak dictionary keys)
+column_checksums = {}
+column_checksums_lock = Lock()
+
+
+def get_column_identity(values):
+    """
+    Returns the identity of a column - the array.array behind a view of a whole array-backed column, shared by every
+    view of it, or else the values themselves (memory-mapped columns share one file but each has a single view)
+
+    Parameters
+    ----------
+    values : list or array.array or memoryview or numpy.ndarray
+        The values of a column
+
+    Returns
+    -------
+    object
+        The object identifying the column
+    """
+    if isinstance(values, memoryview) and isinstance(values.obj, array) and len(values) == len(values.obj):
+        return values.obj
+    return values
+
+
+def get_column_checksum(values):
+    """
+    Returns the checksum of the values of a column, over their bytes if they are held in a contiguous buffer
+
+    Parameters
+    ----------
+    values : list or array.array or memoryview or numpy.ndarray
+        The values of a column
+
+    Returns
+    -------
+    int or None
+        The checksum of the values, None for lists and non-contiguous views, which have no flat buffer of bytes
+    """
+    try:
+        return crc32(memoryview(values).cast("B"))
+    except TypeError:
+        return None
+
+
+def is_read_only(values):
+    """
+    Checks whether the values of a column cannot be modified through it - a read-only memoryview or numpy array
+
+    Parameters
+    ----------
+    values : list or array.array or memoryview or numpy.ndarray
+        The values of a column
+
+    Returns
+    -------
+    bool
+        True if the column is read-only, False otherwise
+    """
+    if isinstance(values, memoryview):
+        return values.readonly
+    flags = getattr(values, "flags", None)
+    return flags is not None and not flags.writeable
+
+
+def get_column_fingerprint(values):
+    """
+    Returns the fingerprint of a column, which changes if the column is replaced or any of its values is modified
+
+    The checksum of a read-only column is calculated the first time its fingerprint is taken and stored with its
+    identity, as the buffers of a dataset are only ever extended, never modified in place; it is calculated again only
+    if the number of values has changed. Mutable buffers are checksummed every time.
+
+    Parameters
+    ----------
+    values : list or array.array or memoryview or numpy.ndarray
+        The values of a column
+
+    Returns
+    -------
+    tuple or None
+        The id of the column's identity, the number of values and their checksum, None if the column has no contiguous
+        buffer to be checksummed
+    """
+    identity = get_column_identity(values)
+    if not is_read_only(values):
+        checksum = get_column_checksum(values)
+        return None if checksum is None else (id(identity), len(values), checksum)
+    with column_checksums_lock:
+        length_and_checksum = column_checksums.get(id(identity))
+    if length_and_checksum is None or length_and_checksum[0] != len(values):
+        checksum = get_column_checksum(values)
+        if checksum is None:
+            return None
+        length_and_checksum = (len(values), checksum)
+        with column_checksums_lock:
+            if id(identity) not in column_checksums:
+                finalize(identity, column_checksums.pop, id(identity), None)
+            column_checksums[id(identity)] = length_and_checksum
+    return (id(identity),) + length_and_checksum
+
+
+class ResultCache:
+    """
+    A bounded cache of statistics keyed by statistic name and column fingerprints, with least recently used eviction
+
+    Attributes
+    ----------
+    maximum_size : int
+        The number of results the cache holds before evicting the least recently used one
+    hits : int
+        The number of results read from the cache
+    misses : int
+        The number of results computed and cached
+
+    The cache can be shared by several threads - the statistics are computed outside its lock, so a statistic
+    requested by two threads at once may be computed twice.
+    """
+
+    def __init__(self, maximum_size=RESULT_CACHE_SIZE):
+        if maximum_size < 1:
+            raise ValueError("A result cache must hold at least one result")
+        self.maximum_size = maximum_size
+        self.hits = 0
+        self.misses = 0
+        self._results = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._results)
+
+    def get_result(self, statistic, columns, compute):
+        """
+        Returns the statistic of the columns, computing it the first time and reading it from the cache afterwards.
+        The statistic of a list, or of any column without a contiguous buffer, is computed every time
+
+        Parameters
+        ----------
+        statistic : str
+            The name of the statistic, including any parameter it depends on
+        columns : tuple
+            The columns the statistic is computed from, which must not be modified once their statistic is cached
+        compute : function
+            The function computing the statistic, called without arguments
+
+        Returns
+        -------
+        object
+            The statistic, shared with every later caller so it must not be modified
+        """
+        fingerprints = tuple(get_column_fingerprint(column) for column in columns)
+        if None in fingerprints:
+            with span(statistic, "statistics"):
+                return compute()
+        identities = tuple(get_column_identity(column) for column in columns)
+        key = (statistic, fingerprints)
+        with self._lock:
+            cached_result = self._results.get(key)
+            if cached_result is not None and all(cached is identity
+                                                 for cached, identity in zip(cached_result[0], identities)):
+                self._results.move_to_end(key)
+                self.hits += 1
+                add_counter("result cache hits")
+                return cached_result[1]
+
+        with span(statistic, "statistics"):
+            result = compute()
+        with self._lock:
+            self.misses += 1
+            add_counter("result cache misses")
+            # Keeping a reference to the columns so that their ids cannot be reused by other columns while they are
+            # cached
+            self._results[key] = (identities, result)
+            self._results.move_to_end(key)
+            if len(self._results) > self.maximum_size:
+                self._results.popitem(last=False)
+        return result
+
+    def clear(self):
+        """
+        Removes every cached result
+
+        Returns
+        -------
+        None - default
+        """
+        with self._lock:
+            self._results.clear()
+
+
+result_cache = ResultCache()
+
+
+def get_cached_statistic(statistic, *columns):
+    """
+    Returns a statistic of the columns calculated by the active statistics backend, through the shared result cache
+
+    Parameters
+    ----------
+    statistic : str
+        The name of the backend method calculating the statistic, e.g. get_summary_statistics
+    columns : tuple
+        The columns passed to the backend method
+
+    Returns
+    -------
+    object
+        The statistic, which must not be modified
+    """
+    backend = get_backend()
+    return result_cache.get_result(f"{backend.name}.{statistic}", columns,
+                                   lambda: getattr(backend, statistic)(*columns))
@@ -0,0 +1,567 @@
+"""
+Author Student ID: A00316036
+
+Description: This module provides the server mode, which loads a dataset once and serves its Numerical and Categorical
+Analysis over HTTP on localhost, as JSON, and its visualisations as PNG or SVG images, for other tools and dashboards.
+The server runs on an asyncio event loop: the statistics are computed and the visualisations rendered in executor
+pools, so the loop keeps accepting requests, and every response is cached once computed - concurrent requests for a
+response being computed wait for the same computation - so that repeated requests are served from memory.
+"""
+
+import asyncio
+import json
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http import HTTPStatus
+from math import isfinite
+from multiprocessing import get_context
+from urllib.parse import parse_qs, urlsplit
+from zlib import crc32
+from analysis_and_visualisation import get_summary_statistics, get_correlation, get_correlation_matrix, \
+    get_box_plot_statistics, get_grouped_box_plot_statistics
+from batch_mode import get_visualisations, get_compact_array
+from dataset import CATEGORICAL_COLUMNS, CORRELATION_MATRIX_COLUMNS, NUMERICAL_COLUMNS
+from group_by import group_by
+from instrumentation import span, add_counter, collect_trace, merge_trace
+from matplotlib_visualisations import get_pyplot, use_headless_backend, encode_visualisation
+
+HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+# The number of connections waiting to be accepted, for bursts of dashboard requests
+LISTEN_BACKLOG = 1024
+IMAGE_CONTENT_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+JSON_CONTENT_TYPE = "application/json"
+GROUP_STATISTICS = ("count", "sum", "mean", "minimum", "maximum", "standard_deviation", "lower_quartile", "median",
+                    "upper_quartile")
+
+
+def get_chart_name(filename):
+    """
+    Returns the name of a visualisation in the URL of its chart, e.g. numerical-histograms
+
+    Parameters
+    ----------
+    filename : str
+        The name of the visualisation, e.g. Numerical Visualisation - Histograms
+
+    Returns
+    -------
+    str
+        The name of the chart
+    """
+    kind, _, chart = filename.partition(" - ")
+    return f"{kind.split()[0]}-{chart}".lower().replace(" ", "-")
+
+
+def get_json_compatible(value):
+    """
+    Converts a statistic to values JSON can represent - NaN and infinities become null and NumPy scalars Python ones
+
+    Parameters
+    ----------
+    value : object
+        The statistic, possibly a dictionary, list or tuple of statistics
+
+    Returns
+    -------
+    object
+        The converted statistic
+    """
+    if isinstance(value, dict):
+        return {str(key): get_json_compatible(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [get_json_compatible(item) for item in value]
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and not isfinite(value):
+        return None
+    return value
+
+
+def get_json_body(content):
+    """
+    Encodes the content of a JSON response
+
+    Parameters
+    ----------
+    content : dict
+        The content of the response
+
+    Returns
+    -------
+    bytes
+        The UTF-8 encoded JSON document
+    """
+    return json.dumps(get_json_compatible(content), allow_nan=False).encode()
+
+
+def get_error_response(status, message):
+    """
+    Returns the response reporting an invalid request
+
+    Parameters
+    ----------
+    status : http.HTTPStatus
+        The status of the response
+    message : str
+        The description of the error
+
+    Returns
+    -------
+    tuple
+        The status, content type, body and entity tag of the response
+    """
+    return status, JSON_CONTENT_TYPE, get_json_body({"error": message}), None
+
+
+def render_visualisation_job(filename, create_figure, arguments, image_format):
+    """
+    Creates one visualisation and encodes it as an image with the headless backend, in the current or a worker process
+
+    Parameters
+    ----------
+    filename : str
+        The name of the visualisation
+    create_figure : function
+        The function creating the figure of the visualisation
+    arguments : tuple
+        The data the figure is created from
+    image_format : str
+        The image format - png or svg
+
+    Returns
+    -------
+    bytes
+        The encoded image
+    """
+    use_headless_backend()
+    with span("create figure", "visualisation", visualisation=filename):
+        figure = create_figure(*arguments)
+    try:
+        return encode_visualisation(figure, filename, image_format)
+    finally:
+        get_pyplot().close(figure)
+
+
+class StatisticsService:
+    """
+    The analyses and visualisations of a loaded dataset served over HTTP, with the cache of their responses
+
+    Attributes
+    ----------
+    dataset : Dataset
+        The loaded dataset
+    category_column : str
+        The name of the categorical column of the categorical visualisations and the default group-by column
+    charts : dict
+        A dictionary with chart names as keys and (filename, figure creation function, arguments) tuples as values
+    responses : dict
+        A dictionary with the keys of the requested resources as keys and the tasks computing their responses as values
+    """
+
+    def __init__(self, dataset, category_column="Region", worker_count=1):
+        self.dataset = dataset
+        self.category_column = category_column
+        self.responses = {}
+        # The statistics share one thread, as the result cache and matplotlib's pyplot are not thread-safe
+        self._statistics_executor = ThreadPoolExecutor(max_workers=1)
+        # Spawning rather than forking the worker processes, as forking a process running threads can deadlock
+        self._rendering_executor = ProcessPoolExecutor(max_workers=worker_count, mp_context=get_context("spawn")) \
+            if worker_count > 1 else self._statistics_executor
+        self._is_rendering_in_processes = worker_count > 1
+
+        # Computing the columns and groupings every visualisation is created from once, at startup
+        academic_reputation_scores = dataset.get_column("Academic Reputation")
+        overall_scores = dataset.get_column("Overall")
+        grouped_statistics = group_by(dataset, category_column, "Overall")
+        region_scores_dict = grouped_statistics.get_grouped_values()
+        # Computing the box plot statistics once, from the sketches if they are enabled, rather than in every rendering
+        box_plot_statistics = (
+            get_box_plot_statistics(academic_reputation_scores, dataset.column_sketches.get("Academic Reputation")),
+            get_box_plot_statistics(overall_scores, dataset.column_sketches.get("Overall")),
+            get_grouped_box_plot_statistics(grouped_statistics,
+                                            dataset.get_grouped_sketches(category_column, "Overall")))
+        if self._is_rendering_in_processes:
+            # Sending only the compact column arrays to the worker processes
+            academic_reputation_scores = get_compact_array(academic_reputation_scores)
+            overall_scores = get_compact_array(overall_scores)
+            region_scores_dict = {region: get_compact_array(scores) for region, scores in region_scores_dict.items()}
+        visualisations = get_visualisations(academic_reputation_scores, overall_scores,
+                                            grouped_statistics.to_dict("count"), region_scores_dict,
+                                            *box_plot_statistics, category_column, self.get_correlation_matrix())
+        self.charts = {get_chart_name(filename): (filename, create_figure, arguments)
+                       for filename, create_figure, arguments in visualisations}
+
+    def get_correlation_matrix(self):
+        """
+        Returns the correlation matrix of the numerical columns, from the shared result cache
+
+        Returns
+        -------
+        dict
+            A dictionary with the column names as keys and dictionaries of their correlation with every column as
+            values
+        """
+        return get_correlation_matrix({column: self.dataset.get_column(column)
+                                       for column in CORRELATION_MATRIX_COLUMNS})
+
+    def get_index(self):
+        """
+        Lists the resources served
+
+        Returns
+        -------
+        dict
+            The paths of the resources and the names accepted in them
+        """
+        return {"institutions": len(self.dataset),
+                "resources": ["/summary", "/correlation", "/group-by?category=CATEGORY&column=COLUMN",
+                              "/charts/CHART.png", "/charts/CHART.svg"],
+                "categories": list(CATEGORICAL_COLUMNS), "columns": list(NUMERICAL_COLUMNS),
+                "charts": list(self.charts)}
+
+    def get_summary(self):
+        """
+        Calculates the numerical analysis of the Academic Reputation and Overall Scores
+
+        Returns
+        -------
+        dict
+            A dictionary with the column names as keys and dictionaries of their summary statistics as values, along
+            with the rank error bound of the approximate statistics, None if they are exact
+        """
+        summary = {}
+        for column in ("Academic Reputation", "Overall"):
+            sketch = self.dataset.column_sketches.get(column)
+            column_summary = dict(get_summary_statistics(self.dataset.get_column(column),
+                                                         self.dataset.column_moments[column], sketch))
+            column_summary["rank_error_bound"] = sketch.get_error_bound() if sketch is not None and \
+                not sketch.is_exact() else None
+            summary[column] = column_summary
+        return summary
+
+    def get_correlation(self):
+        """
+        Calculates the correlation between the Academic Reputation and Overall Scores and the correlation matrix
+
+        Returns
+        -------
+        dict
+            The correlation between the Academic Reputation and Overall Scores and the correlation matrix of the
+            numerical columns
+        """
+        return {"correlation": get_correlation(self.dataset.get_column("Academic Reputation"),
+                                               self.dataset.get_column("Overall")),
+                "correlation_matrix": self.get_correlation_matrix()}
+
+    def get_group_by(self, category_column, numerical_column):
+        """
+        Calculates the aggregates of a numerical column grouped by a categorical column
+
+        Parameters
+        ----------
+        category_column : str
+            The name of the categorical column to group by
+        numerical_column : str
+            The name of the numerical column to be aggregated
+
+        Returns
+        -------
+        dict
+            The column names and a dictionary with the sub-categories as keys and dictionaries of their aggregates as
+            values
+        """
+        grouped_statistics = group_by(self.dataset, category_column, numerical_column)
+        statistics = {statistic: grouped_statistics.get_statistic(statistic) for statistic in GROUP_STATISTICS}
+        return {"category": category_column, "column": numerical_column,
+                "groups": {group: {statistic: values[code] for statistic, values in statistics.items()}
+                           for code, group in enumerate(grouped_statistics.groups)}}
+
+    def render_chart(self, chart_name, image_format):
+        """
+        Renders a chart in the current or a worker process, merging the trace recorded by the worker process
+
+        Parameters
+        ----------
+        chart_name : str
+            The name of the chart
+        image_format : str
+            The image format - png or svg
+
+        Returns
+        -------
+        coroutine
+            The coroutine returning the encoded image
+        """
+        filename, create_figure, arguments = self.charts[chart_name]
+        loop = asyncio.get_running_loop()
+        if not self._is_rendering_in_processes:
+            return loop.run_in_executor(self._rendering_executor, render_visualisation_job, filename, create_figure,
+                                        arguments, image_format)
+
+        async def render_in_worker_process():
+            image, events, counter_amounts = await loop.run_in_executor(
+                self._rendering_executor, collect_trace, render_visualisation_job, filename, create_figure, arguments,
+                image_format)
+            merge_trace(events, counter_amounts)
+            return image
+        return render_in_worker_process()
+
+    def route(self, target):
+        """
+        Finds the resource requested by a request target, validating its query parameters
+
+        Parameters
+        ----------
+        target : str
+            The request target, e.g. /group-by?category=Country
+
+        Returns
+        -------
+        tuple
+            The key of the resource, its content type and the function returning the awaitable computing its body, or
+            None and the error response if the target is invalid
+        """
+        url = urlsplit(target)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        json_resources = {"/": self.get_index, "/summary": self.get_summary, "/correlation": self.get_correlation}
+        if url.path in json_resources:
+            resource = json_resources[url.path]
+            return (url.path,), JSON_CONTENT_TYPE, lambda: self.compute_json(resource)
+        if url.path == "/group-by":
+            category_column = query.get("category", self.category_column)
+            numerical_column = query.get("column", "Overall")
+            if category_column not in CATEGORICAL_COLUMNS:
+                return None, get_error_response(HTTPStatus.BAD_REQUEST, f"Unknown category: {category_column}")
+            if numerical_column not in NUMERICAL_COLUMNS:
+                return None, get_error_response(HTTPStatus.BAD_REQUEST, f"Unknown column: {numerical_column}")
+            return (url.path, category_column, numerical_column), JSON_CONTENT_TYPE, \
+                lambda: self.compute_json(self.get_group_by, category_column, numerical_column)
+        if url.path.startswith("/charts/"):
+            chart_name, _, image_format = url.path[len("/charts/"):].rpartition(".")
+            if chart_name in self.charts and image_format in IMAGE_CONTENT_TYPES:
+                return (url.path,), IMAGE_CONTENT_TYPES[image_format], \
+                    lambda: self.render_chart(chart_name, image_format)
+        return None, get_error_response(HTTPStatus.NOT_FOUND, f"No such resource: {url.path}")
+
+    def compute_json(self, function, *arguments):
+        """
+        Computes the content of a JSON response in the statistics thread
+
+        Parameters
+        ----------
+        function : function
+            The function returning the content
+        arguments : tuple
+            The arguments of the function
+
+        Returns
+        -------
+        asyncio.Future
+            The future of the encoded JSON document
+        """
+        return asyncio.get_running_loop().run_in_executor(self._statistics_executor,
+                                                          lambda: get_json_body(function(*arguments)))
+
+    async def compute_response(self, content_type, compute_body):
+        """
+        Computes a successful response and its entity tag
+
+        Parameters
+        ----------
+        content_type : str
+            The content type of the response
+        compute_body : function
+            The function returning the awaitable computing the body
+
+        Returns
+        -------
+        tuple
+            The status, content type, body and entity tag of the response
+        """
+        body = await compute_body()
+        return HTTPStatus.OK, content_type, body, f'"{crc32(body):08x}"'
+
+    async def get_response(self, target):
+        """
+        Returns the response to a request, computing it on the first request and reading it from the cache afterwards
+
+        Parameters
+        ----------
+        target : str
+            The request target
+
+        Returns
+        -------
+        tuple
+            The status, content type, body and entity tag of the response
+        """
+        key, *resource = self.route(target)
+        if key is None:
+            return resource[0]
+        task = self.responses.get(key)
+        if task is None:
+            content_type, compute_body = resource
+            task = asyncio.ensure_future(self.compute_response(content_type, compute_body))
+            self.responses[key] = task
+        else:
+            add_counter("response cache hits")
+        try:
+            return await asyncio.shield(task)
+        except Exception as error:
+            # Answering with the error instead of dropping the connection, and computing the response again on the next
+            # request
+            if self.responses.get(key) is task:
+                del self.responses[key]
+            return get_error_response(HTTPStatus.INTERNAL_SERVER_ERROR, f"{type(error).__name__}: {error}")
+
+    async def handle_connection(self, reader, writer):
+        """
+        Serves the GET and HEAD requests of one connection, keeping HTTP/1.1 connections open between requests
+
+        Parameters
+        ----------
+        reader : asyncio.StreamReader
+            The stream of the requests
+        writer : asyncio.StreamWriter
+            The stream of the responses
+
+        Returns
+        -------
+        None - default
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    header_line = await reader.readline()
+                    if header_line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header_line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                request = request_line.decode("latin-1").split()
+                if len(request) != 3:
+                    status, content_type, body, entity_tag = get_error_response(HTTPStatus.BAD_REQUEST,
+                                                                                "Malformed request line")
+                    method, version = "GET", "HTTP/1.0"
+                else:
+                    method, target, version = request
+                    if method in ("GET", "HEAD"):
+                        with span("request", "server", target=target):
+                            status, content_type, body, entity_tag = await self.get_response(target)
+                    else:
+                        status, content_type, body, entity_tag = get_error_response(
+                            HTTPStatus.METHOD_NOT_ALLOWED, f"Method not allowed: {method}")
+                if entity_tag is not None and headers.get("if-none-match") == entity_tag:
+                    status, body = HTTPStatus.NOT_MODIFIED, b""
+
+                is_kept_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                response_headers = [f"HTTP/1.1 {status.value} {status.phrase}", f"Content-Type: {content_type}",
+                                    f"Content-Length: {len(body)}", "Cache-Control: no-cache",
+                                    f"Connection: {'keep-alive' if is_kept_alive else 'close'}"]
+                if entity_tag is not None:
+                    response_headers.append(f"ETag: {entity_tag}")
+                if status == HTTPStatus.METHOD_NOT_ALLOWED:
+                    response_headers.append("Allow: GET, HEAD")
+                writer.write(("\r\n".join(response_headers) + "\r\n\r\n").encode("latin-1"))
+                if method != "HEAD":
+                    writer.write(body)
+                await writer.drain()
+                if not is_kept_alive:
+                    break
+        except (ConnectionError, ValueError):
+            # A client disconnecting or sending a line longer than the stream limit
+            pass
+        finally:
+            writer.close()
+
+    async def start_server(self, port=DEFAULT_PORT):
+        """
+        Starts accepting connections on localhost
+
+        Parameters
+        ----------
+        port : int
+            The port, 0 for any free port
+
+        Returns
+        -------
+        asyncio.Server
+            The server, whose sockets give the port
+        """
+        return await asyncio.start_server(self.handle_connection, HOST, port, backlog=LISTEN_BACKLOG)
+
+    def close(self):
+        """
+        Shuts the executor pools down
+
+        Returns
+        -------
+        None - default
+        """
+        self._statistics_executor.shutdown(cancel_futures=True)
+        if self._is_rendering_in_processes:
+            self._rendering_executor.shutdown(cancel_futures=True)
+
+
+async def serve(service, port=DEFAULT_PORT):
+    """
+    Serves the requests of the service until the process is interrupted
+
+    Parameters
+    ----------
+    service : StatisticsService
+        The service
+    port : int
+        The port, 0 for any free port
+
+    Returns
+    -------
+    None - default
+    """
+    server = await service.start_server(port)
+    print(f"Serving {len(service.dataset)} Institutions on http://{HOST}:{server.sockets[0].getsockname()[1]}/ "
+          f"(press Ctrl+C to stop)")
+    async with server:
+        await server.serve_forever()
+
+
+def run_server_mode(dataset, port=DEFAULT_PORT, worker_count=1, category_column="Region"):
+    """
+    Serves the analyses and visualisations of the dataset on localhost until the process is interrupted
+
+    Parameters
+    ----------
+    dataset : Dataset
+        The loaded dataset
+    port : int
+        The port, 0 for any free port
+    worker_count : int
+        The number of worker processes rendering the visualisations, which are rendered in the statistics thread for
+        a single worker
+    category_column : str
+        The name of the categorical column of the categorical visualisations and the default group-by column
+
+    Returns
+    -------
+    int
+        The exit status - 0 if the server was interrupted, 1 if it could not be started
+    """
+    if len(dataset) == 0:
+        print("No Institutions to analyse")
+        return 1
+    use_headless_backend()
+    service = StatisticsService(dataset, category_column, worker_count)
+    try:
+        asyncio.run(serve(service, port))
+    except KeyboardInterrupt:
+        pass
+    except OSError as error:
+        print("Error starting the server:", error)
+        return 1
+    finally:
+        service.close()
+    return 0
@@ -0,0 +1,526 @@
+"""
+Author Student ID: A00316036
+
+Description: This module provides the interchangeable backends computing the statistics of the numerical analysis -
+vectorised NumPy reductions when NumPy is installed and pure Python otherwise. The backend can be switched at runtime
+using set_backend or before start-up using the QS_STATISTICS_BACKEND environment variable.
+"""
+
+from math import nan, sqrt
+from operator import mul
+from os import environ
+from frequency_table import FrequencyTable
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# Parts of at most this many values are sorted rather than partitioned further by select_order_statistics
+SELECTION_SORT_SIZE = 32
+
+
+def get_sorted_median(sorted_values, start, stop):
+    """
+    Calculates the Median of a slice of already sorted values without copying it
+
+    Parameters
+    ----------
+    sorted_values : list or numpy.ndarray
+        Sorted numeric values, or values holding the sorted order statistics at least at the indices read
+    start : int
+        The index of the first value of the slice
+    stop : int
+        The index after the last value of the slice
+
+    Returns
+    -------
+    float
+        The median of the values in the slice
+    """
+    length = stop - start
+    mid_index = start + int(length / 2)
+    if length % 2 != 0:
+        return sorted_values[mid_index]
+    else:
+        return (sorted_values[mid_index - 1] + sorted_values[mid_index]) / 2
+
+
+def get_half_split_bounds(count):
+    """
+    Returns the slices of sorted values whose medians are the lower quartile, median and upper quartile, the quartiles
+    being the medians of the lower and upper halves (the middle value being excluded from both halves for an odd number
+    of values)
+
+    Parameters
+    ----------
+    count : int
+        The number of values
+
+    Returns
+    -------
+    tuple
+        The (start, stop) slices of the lower half, of all the values and of the upper half
+    """
+    mid_index = int(count / 2)
+    upper_half_start = mid_index + 1 if count % 2 != 0 else mid_index
+    return (0, mid_index), (0, count), (upper_half_start, count)
+
+
+def get_half_split_indices(count):
+    """
+    Returns the indices of the sorted values that get_half_split_quartiles reads
+
+    Parameters
+    ----------
+    count : int
+        The number of values
+
+    Returns
+    -------
+    list
+        The sorted, distinct indices of the order statistics needed
+    """
+    if count < 2:
+        return list(range(count))
+    indices = set()
+    for start, stop in get_half_split_bounds(count):
+        mid_index = start + int((stop - start) / 2)
+        indices.update((mid_index,) if (stop - start) % 2 != 0 else (mid_index - 1, mid_index))
+    return sorted(indices)
+
+
+def get_half_split_quartiles(sorted_values, count=None):
+    """
+    Calculates the lower quartile, median and upper quartile of sorted values, the quartiles being the medians of the
+    lower and upper halves (the middle value being excluded from both halves for an odd number of values)
+
+    Parameters
+    ----------
+    sorted_values : list or numpy.ndarray
+        Sorted numeric values, or values holding the sorted order statistics at the get_half_split_indices
+    count : int
+        The number of values, the length of sorted_values by default
+
+    Returns
+    -------
+    tuple
+        The lower quartile, the median and the upper quartile
+    """
+    if count is None:
+        count = len(sorted_values)
+    if count == 1:
+        # Both halves of a single value are empty, so every quartile is the value itself
+        return (sorted_values[0],) * 3
+    return tuple(get_sorted_median(sorted_values, start, stop) for start, stop in get_half_split_bounds(count))
+
+
+def select_order_statistics(values, indices):
+    """
+    Finds the values that would be at the given indices of the sorted values without sorting them - every pass
+    partitions a part around a pivot and only the parts holding a wanted index are partitioned further (multiple
+    quickselect in expected linear time), a part being sorted once it is small or partitioned too many times
+
+    Parameters
+    ----------
+    values : list
+        A list containing numeric values
+    indices : list
+        The indices of the wanted order statistics
+
+    Returns
+    -------
+    list
+        A list as long as the values holding the order statistics at the wanted indices and None elsewhere
+    """
+    order_statistics = [None] * len(values)
+    # The depth after which a part is sorted, bounding the work on inputs defeating the median-of-three pivot
+    maximum_depth = 2 * max(len(values), 1).bit_length()
+    pending_parts = [(list(values), 0, sorted(indices), 0)]
+    while pending_parts:
+        part, offset, part_indices, depth = pending_parts.pop()
+        if part_indices == [offset]:
+            order_statistics[offset] = min(part)
+            continue
+        if part_indices == [offset + len(part) - 1]:
+            order_statistics[offset + len(part) - 1] = max(part)
+            continue
+        if len(part) <= SELECTION_SORT_SIZE or depth > maximum_depth:
+            part.sort()
+            for index in part_indices:
+                order_statistics[index] = part[index - offset]
+            continue
+        pivot = sorted((part[0], part[len(part) // 2], part[-1]))[1]
+        smaller_values = [value for value in part if value < pivot]
+        larger_values = [value for value in part if value > pivot]
+        equal_start = offset + len(smaller_values)
+        equal_stop = offset + len(part) - len(larger_values)
+        smaller_indices = [index for index in part_indices if index < equal_start]
+        larger_indices = [index for index in part_indices if index >= equal_stop]
+        for index in part_indices:
+            if equal_start <= index < equal_stop:
+                order_statistics[index] = pivot
+        if smaller_indices:
+            pending_parts.append((smaller_values, offset, smaller_indices, depth + 1))
+        if larger_indices:
+            pending_parts.append((larger_values, equal_stop, larger_indices, depth + 1))
+    return order_statistics
+
+
+def partition_order_statistics(values, indices):
+    """
+    Places the values that would be at the given indices of the sorted values at those indices of a copy of the array,
+    partitioning it around the middle wanted index and then each side around its own wanted indices, as a single
+    numpy.partition with several indices is much slower than a few partitions of shrinking parts
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        Numeric values
+    indices : list
+        The indices of the wanted order statistics
+
+    Returns
+    -------
+    numpy.ndarray
+        A partitioned copy of the values holding the order statistics at the wanted indices
+    """
+    partitioned_values = numpy.array(values)
+    pending_parts = [(0, len(partitioned_values), sorted(indices))]
+    while pending_parts:
+        start, stop, part_indices = pending_parts.pop()
+        middle_index = part_indices[len(part_indices) // 2]
+        # Partitioning the view of the part in place
+        partitioned_values[start:stop].partition(middle_index - start)
+        smaller_indices = [index for index in part_indices if index < middle_index]
+        larger_indices = [index for index in part_indices if index > middle_index]
+        if smaller_indices:
+            pending_parts.append((start, middle_index, smaller_indices))
+        if larger_indices:
+            pending_parts.append((middle_index + 1, stop, larger_indices))
+    return partitioned_values
+
+
+def get_whisker_limits(lower_quartile, upper_quartile, whisker_factor=1.5):
+    """
+    Returns the limits of the whiskers of a box plot, whisker_factor inter quartile ranges away from the box (the
+    matplotlib convention)
+
+    Parameters
+    ----------
+    lower_quartile : float
+        The lower quartile of the values
+    upper_quartile : float
+        The upper quartile of the values
+    whisker_factor : float
+        The length of the whiskers in inter quartile ranges
+
+    Returns
+    -------
+    tuple
+        The lowest and highest values the whiskers can reach
+    """
+    inter_quartile_range = upper_quartile - lower_quartile
+    return lower_quartile - whisker_factor * inter_quartile_range, upper_quartile + whisker_factor * inter_quartile_range
+
+
+def build_box_plot_statistics(lower_quartile, median, upper_quartile, lower_whisker, upper_whisker, mean):
+    """
+    Builds the statistics a box of a box plot is drawn from
+
+    Parameters
+    ----------
+    lower_quartile : float
+        The lower quartile of the values
+    median : float
+        The median of the values
+    upper_quartile : float
+        The upper quartile of the values
+    lower_whisker : float
+        The smallest value within the whisker limits
+    upper_whisker : float
+        The largest value within the whisker limits
+    mean : float
+        The mean of the values
+
+    Returns
+    -------
+    dict
+        A dictionary in the format of matplotlib.axes.Axes.bxp, without outliers
+    """
+    return {
+        "q1": lower_quartile,
+        "med": median,
+        "q3": upper_quartile,
+        # The quartiles always lie within the whiskers, even when no value lies between them and the whisker limit
+        "whislo": min(lower_whisker, lower_quartile),
+        "whishi": max(upper_whisker, upper_quartile),
+        "mean": mean,
+        "fliers": [],
+    }
+
+
+def build_summary_statistics(count, minimum, maximum, mean, median, mode, inter_quartile_range, standard_deviation):
+    """
+    Builds the summary statistics dictionary, deriving the range and both skewness values
+
+    Parameters
+    ----------
+    count : int
+        The number of values
+    minimum : float
+        The smallest value
+    maximum : float
+        The largest value
+    mean : float
+        The mean of the values
+    median : float
+        The median of the values
+    mode : float
+        The mode of the values
+    inter_quartile_range : float
+        The inter quartile range of the values
+    standard_deviation : float
+        The sample standard deviation of the values
+
+    Returns
+    -------
+    dict
+        A dictionary with the statistic names as keys and their values as values
+    """
+    return {
+        "count": count,
+        "minimum": minimum,
+        "maximum": maximum,
+        "mean": mean,
+        "median": median,
+        "mode": mode,
+        "range": maximum - minimum,
+        "inter_quartile_range": inter_quartile_range,
+        "standard_deviation": standard_deviation,
+        "mode_skewness": (mean - mode) / standard_deviation if standard_deviation else 0,
+        "median_skewness": (3 * (mean - median)) / standard_deviation if standard_deviation else 0,
+    }
+
+
+class PythonBackend:
+    """
+    Statistics computed with pure Python list iteration, available everywhere
+
+    Each method computes the statistic of the analysis_and_visualisation function with the same name.
+    """
+    name = "python"
+
+    def get_mean(self, values_list):
+        return sum(values_list) / len(values_list)
+
+    def get_median(self, values_list):
+        count = len(values_list)
+        middle_indices = sorted({int((count - 1) / 2), int(count / 2)})
+        return get_sorted_median(select_order_statistics(values_list, middle_indices), 0, count)
+
+    def get_mode(self, values_list):
+        return FrequencyTable(values_list).get_mode()
+
+    def get_range(self, values_list):
+        return max(values_list) - min(values_list)
+
+    def get_quartiles(self, values_list):
+        count = len(values_list)
+        return get_half_split_quartiles(select_order_statistics(values_list, get_half_split_indices(count)), count)
+
+    def get_box_plot_statistics(self, values_list):
+        lower_quartile, median, upper_quartile = self.get_quartiles(values_list)
+        lower_limit, upper_limit = get_whisker_limits(lower_quartile, upper_quartile)
+        return build_box_plot_statistics(lower_quartile, median, upper_quartile,
+                                         min(value for value in values_list if value >= lower_limit),
+                                         max(value for value in values_list if value <= upper_limit),
+                                         self.get_mean(values_list))
+
+    def get_summary_statistics(self, values_list):
+        count = len(values_list)
+        total = 0
+        running_mean = 0
+        squared_deviations_sum = 0
+        minimum = maximum = mode = values_list[0]
+        frequencies = {}
+        highest_frequency = 0
+        # Accumulating the sum, Welford's running variance, the extremes and the frequencies in one pass, the mode being
+        # the smallest of the most frequent values seen so far
+        for index, value in enumerate(values_list, 1):
+            total += value
+            delta = value - running_mean
+            running_mean += delta / index
+            squared_deviations_sum += delta * (value - running_mean)
+            if value < minimum:
+                minimum = value
+            elif value > maximum:
+                maximum = value
+            frequency = frequencies.get(value, 0) + 1
+            frequencies[value] = frequency
+            if frequency > highest_frequency or (frequency == highest_frequency and value < mode):
+                highest_frequency = frequency
+                mode = value
+
+        lower_quartile, median, upper_quartile = self.get_quartiles(values_list)
+        standard_deviation = sqrt(squared_deviations_sum / (count - 1)) if count > 1 else 0
+        return build_summary_statistics(count, minimum, maximum, total / count, median, mode,
+                                        upper_quartile - lower_quartile, standard_deviation)
+
+    def get_correlation(self, x_values, y_values):
+        x_mean = self.get_mean(x_values)
+        y_mean = self.get_mean(y_values)
+        xy_deviations_sum = 0
+        x_squared_deviations_sum = 0
+        y_squared_deviations_sum = 0
+        for x, y in zip(x_values, y_values):
+            x_deviation = x - x_mean
+            y_deviation = y - y_mean
+            xy_deviations_sum += x_deviation * y_deviation
+            x_squared_deviations_sum += x_deviation ** 2
+            y_squared_deviations_sum += y_deviation ** 2
+        if not x_squared_deviations_sum or not y_squared_deviations_sum:
+            # The correlation with a constant column is undefined, as in the correlation matrix
+            return nan
+        return xy_deviations_sum / (sqrt(x_squared_deviations_sum) * sqrt(y_squared_deviations_sum))
+
+    def get_correlation_matrix(self, columns):
+        # Centring every column once, then summing the products of each pair of centred columns
+        deviations = []
+        for values in columns:
+            mean = self.get_mean(values)
+            deviations.append([value - mean for value in values])
+        co_moments = [[0] * len(columns) for _ in columns]
+        for row, x_deviations in enumerate(deviations):
+            for column in range(row, len(columns)):
+                co_moments[row][column] = co_moments[column][row] = sum(map(mul, x_deviations, deviations[column]))
+        return [[co_moment / sqrt(co_moments[row][row] * co_moments[column][column])
+                 if co_moments[row][row] and co_moments[column][column] else nan
+                 for column, co_moment in enumerate(row_co_moments)] for row, row_co_moments in enumerate(co_moments)]
+
+
+class NumpyBackend:
+    """
+    Statistics computed with vectorised NumPy reductions, reading array-backed columns without copying them
+
+    Each method computes the statistic of the analysis_and_visualisation function with the same name.
+    """
+    name = "numpy"
+
+    def get_mean(self, values_list):
+        return numpy.asarray(values_list).mean().item()
+
+    def get_median(self, values_list):
+        count = len(values_list)
+        middle_indices = sorted({int((count - 1) / 2), int(count / 2)})
+        return get_sorted_median(partition_order_statistics(numpy.asarray(values_list), middle_indices), 0, count).item()
+
+    def get_mode(self, values_list):
+        distinct_values, frequencies = numpy.unique(numpy.asarray(values_list), return_counts=True)
+        # The distinct values are sorted, so the first most frequent one is the smallest mode
+        return distinct_values[frequencies.argmax()].item()
+
+    def get_range(self, values_list):
+        return numpy.ptp(numpy.asarray(values_list)).item()
+
+    def get_quartiles(self, values_list):
+        partitioned_values = partition_order_statistics(numpy.asarray(values_list),
+                                                        get_half_split_indices(len(values_list)))
+        return tuple(quartile.item() for quartile in get_half_split_quartiles(partitioned_values))
+
+    def get_box_plot_statistics(self, values_list):
+        values = numpy.asarray(values_list)
+        lower_quartile, median, upper_quartile = self.get_quartiles(values)
+        lower_limit, upper_limit = get_whisker_limits(lower_quartile, upper_quartile)
+        return build_box_plot_statistics(lower_quartile, median, upper_quartile,
+                                         values[values >= lower_limit].min().item(),
+                                         values[values <= upper_limit].max().item(), values.mean().item())
+
+    def get_summary_statistics(self, values_list):
+        values = numpy.asarray(values_list)
+        count = len(values)
+        # Selecting only the order statistics the quartiles are read from instead of sorting every value
+        partitioned_values = partition_order_statistics(values, get_half_split_indices(count))
+        lower_quartile, median, upper_quartile = get_half_split_quartiles(partitioned_values)
+        standard_deviation = values.std(ddof=1).item() if count > 1 else 0
+        return build_summary_statistics(count, values.min().item(), values.max().item(), values.mean().item(),
+                                        median.item(), self.get_mode(values),
+                                        (upper_quartile - lower_quartile).item(), standard_deviation)
+
+    def get_correlation(self, x_values, y_values):
+        x_deviations = numpy.asarray(x_values, dtype=float)
+        x_deviations = x_deviations - x_deviations.mean()
+        y_deviations = numpy.asarray(y_values, dtype=float)
+        y_deviations = y_deviations - y_deviations.mean()
+        x_squared_deviations_sum = x_deviations.dot(x_deviations).item()
+        y_squared_deviations_sum = y_deviations.dot(y_deviations).item()
+        if not x_squared_deviations_sum or not y_squared_deviations_sum:
+            return nan
+        return x_deviations.dot(y_deviations).item() / (sqrt(x_squared_deviations_sum) * sqrt(y_squared_deviations_sum))
+
+    def get_correlation_matrix(self, columns):
+        # One centred matrix product gives the co-moments of every pair of columns
+        deviations = numpy.array([numpy.asarray(values, dtype=float) for values in columns])
+        deviations -= deviations.mean(axis=1, keepdims=True)
+        co_moments = deviations @ deviations.T
+        standard_deviations = numpy.sqrt(numpy.diag(co_moments))
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            correlations = co_moments / numpy.outer(standard_deviations, standard_deviations)
+        correlations[numpy.outer(standard_deviations, standard_deviations) == 0] = nan
+        return correlations.tolist()
+
+
+BACKENDS = {PythonBackend.name: PythonBackend()}
+if numpy is not None:
+    BACKENDS[NumpyBackend.name] = NumpyBackend()
+
+active_backend = BACKENDS.get(environ.get("QS_STATISTICS_BACKEND", NumpyBackend.name), BACKENDS[PythonBackend.name])
+
+
+def get_available_backends():
+    """
+    Returns the names of the backends that can be used in this environment
+
+    Returns
+    -------
+    list
+        A list with "python" and, if NumPy is installed, "numpy"
+    """
+    return list(BACKENDS)
+
+
+def get_backend():
+    """
+    Returns the backend currently computing the statistics
+
+    Returns
+    -------
+    PythonBackend or NumpyBackend
+        The active backend
+    """
+    return active_backend
+
+
+def set_backend(name):
+    """
+    Selects the backend computing the statistics
+
+    Parameters
+    ----------
+    name : str
+        The name of the backend - "python" or "numpy"
+
+    Returns
+    -------
+    None - default
+
+    Raises
+    ------
+    ValueError
+        If the backend is unknown or NumPy is not installed
+    """
+    global active_backend
+    if name not in BACKENDS:
+        raise ValueError(f"Statistics backend '{name}' is not available, choose from {', '.join(BACKENDS)}")
+    active_backend = BACKENDS[name]
@@ -0,0 +1,143 @@
+"""
+Author Student ID: A00316036
+
+Description: This module generates synthetic datasets with the schema of the QS World University Rankings 2023 dataset
+and any number of rows, for benchmarking. The Overall scores fall with the rank the way the published ones do, every
+indicator score is the Overall score plus noise of its own spread, so the indicators correlate like the real ones, and
+the countries, regions and sizes follow their frequencies in dataset.csv. The rows are written a block at a time, so
+datasets far larger than memory can be generated.
+"""
+
+from itertools import accumulate
+from random import Random
+from dataset import COLUMNS
+
+DEFAULT_SEED = 2023
+GENERATION_BLOCK_SIZE = 1 << 14
+# The countries of the Institutions with their regions and the number of Institutions they have in dataset.csv
+COUNTRY_WEIGHTS = (
+    ("United States", "North America", 50), ("Canada", "North America", 11), ("Mexico", "North America", 2),
+    ("United Kingdom", "Europe", 30), ("Germany", "Europe", 14), ("Netherlands", "Europe", 11),
+    ("Switzerland", "Europe", 8), ("France", "Europe", 7), ("Sweden", "Europe", 6), ("Spain", "Europe", 5),
+    ("Belgium", "Europe", 4), ("Italy", "Europe", 4), ("Denmark", "Europe", 3), ("Russia", "Europe", 2),
+    ("Ireland", "Europe", 2), ("Norway", "Europe", 2), ("Finland", "Europe", 2), ("Austria", "Europe", 2),
+    ("China (Mainland)", "Asia", 11), ("Japan", "Asia", 10), ("South Korea", "Asia", 8), ("Hong Kong SAR", "Asia", 5),
+    ("Malaysia", "Asia", 5), ("Taiwan", "Asia", 4), ("India", "Asia", 4), ("Saudi Arabia", "Asia", 3),
+    ("Indonesia", "Asia", 3), ("Singapore", "Asia", 2), ("Kazakhstan", "Asia", 1), ("United Arab Emirates", "Asia", 1),
+    ("Qatar", "Asia", 1), ("Israel", "Asia", 1), ("Thailand", "Asia", 1), ("South Africa", "Asia", 1),
+    ("Australia", "Oceania", 15), ("New Zealand", "Oceania", 2),
+    ("Brazil", "South America", 2), ("Chile", "South America", 2), ("Colombia", "South America", 2),
+    ("Argentina", "South America", 1),
+)
+SIZE_WEIGHTS = (("L", 119), ("XL", 94), ("M", 28), ("S", 9))
+# The standard deviation of each indicator score around the Overall score - the smaller it is, the more the indicator
+# correlates with the Overall score
+INDICATOR_SPREADS = {"Academic Reputation": 10, "Employer Reputation": 15, "Citations per faculty": 25,
+                     "International Faculty Ratio": 32, "International Students Ratio": 28, "Employment Outcomes": 20}
+# The fraction of International Faculty Ratio fields left empty, as some are in dataset.csv
+MISSING_FIELD_FRACTION = 0.004
+
+
+def get_overall_score(rank_fraction):
+    """
+    Returns the Overall score of the Institution at the given fraction of the ranking, steeply falling from 100 at the
+    top and levelling out towards 15 at the bottom
+
+    Parameters
+    ----------
+    rank_fraction : float
+        The position of the Institution in the ranking, from 0 for the first to 1 for the last
+
+    Returns
+    -------
+    float
+        The Overall score, rounded to one decimal place
+    """
+    return round(15 + 85 * (1 - rank_fraction) ** 6, 1)
+
+
+def format_score(score):
+    """
+    Formats a score the way dataset.csv does, without a decimal point for whole numbers
+
+    Parameters
+    ----------
+    score : float
+        The score, rounded to one decimal place
+
+    Returns
+    -------
+    str
+        The text of the field
+    """
+    return f"{score:g}"
+
+
+def generate_rows(row_count, seed=DEFAULT_SEED):
+    """
+    Generates the fields of every row of a synthetic dataset, in order of rank
+
+    Parameters
+    ----------
+    row_count : int
+        The number of rows
+    seed : int
+        The seed of the random number generator, the same seed generating the same rows
+
+    Returns
+    -------
+    generator
+        A generator of lists of the fields of one row, in the order of the dataset's columns
+    """
+    generator = Random(seed)
+    countries = [(country, region) for country, region, _ in COUNTRY_WEIGHTS]
+    country_cumulative_weights = list(accumulate(weight for _, _, weight in COUNTRY_WEIGHTS))
+    sizes = [size for size, _ in SIZE_WEIGHTS]
+    size_cumulative_weights = list(accumulate(weight for _, weight in SIZE_WEIGHTS))
+    rank = 0
+    previous_overall_score = None
+    for index in range(row_count):
+        overall_score = get_overall_score(index / row_count)
+        # Institutions with the same Overall score share a rank, the next one skipping the ranks shared
+        if overall_score != previous_overall_score:
+            rank = index + 1
+            previous_overall_score = overall_score
+        country, region = generator.choices(countries, cum_weights=country_cumulative_weights)[0]
+        fields = [str(rank), f"Synthetic University {index + 1}", country, region,
+                  generator.choices(sizes, cum_weights=size_cumulative_weights)[0]]
+        for column, spread in INDICATOR_SPREADS.items():
+            if column == "International Faculty Ratio" and generator.random() < MISSING_FIELD_FRACTION:
+                fields.append("")
+            else:
+                score = round(min(100.0, max(1.0, generator.gauss(overall_score, spread))), 1)
+                fields.append(format_score(score))
+        fields.append(format_score(overall_score))
+        yield fields
+
+
+def write_synthetic_dataset(file_path, row_count, seed=DEFAULT_SEED):
+    """
+    Writes a synthetic dataset with the schema of dataset.csv to a CSV file
+
+    Parameters
+    ----------
+    file_path : str or os.PathLike
+        The path of the CSV file, overwritten if it exists
+    row_count : int
+        The number of rows, excluding the header
+    seed : int
+        The seed of the random number generator, the same seed writing the same file
+
+    Returns
+    -------
+    None - default
+    """
+    with open(file_path, "w", newline="") as dataset_file:
+        dataset_file.write(",".join(COLUMNS) + "\n")
+        block = []
+        for fields in generate_rows(row_count, seed):
+            block.append(",".join(fields) + "\n")
+            if len(block) == GENERATION_BLOCK_SIZE:
+                dataset_file.writelines(block)
+                block = []
+        dataset_file.writelines(block)
@@ -0,0 +1,666 @@
+"""
+Author Student ID: A00316036
+
+Description: This module contains functions to perform unit testing using PyTest on the columnar dataset and its loader.
+"""
+
+from collections import deque
+from contextlib import redirect_stdout
+from gzip import compress
+from io import BytesIO, StringIO
+from os import path, utime
+from subprocess import run
+from sys import executable
+import asyncio
+import batch_mode
+from pytest import main, approx
+from data_ingestion import load_dataset, load_dataset_in_parallel, load_datasets_concurrently, stream_dataset
+from dataset import COLUMNS
+import instrumentation
+import json
+from histogram_aggregation import get_histogram
+import matplotlib_visualisations
+import group_by
+import dataset_cache
+from dataset_cache import CACHE_HEADER, get_cache_path, load_dataset_with_cache, read_dataset_cache
+from quarantine import Quarantine
+from server_mode import StatisticsService
+from synthetic_dataset import write_synthetic_dataset
+import year_comparison
+
+ROWS = [
+    "1,Institution A,United States,North America,M,100,100,100,100,90,100,100",
+    "2,Institution B,United Kingdom,Europe,L,90.5,100,92.3,100,96.3,100,98.8",
+    "3,Institution C,Germany,Europe,L,,80,70,60,50,40,70.2",
+]
+
+
+def write_dataset_file(directory, rows):
+    """
+    Write a dataset file with the dataset header and the given rows.
+
+    Parameters:
+    - directory: The directory in which the file is written.
+    - rows: The lines of the file after the header.
+
+    Returns:
+    - The path of the written file.
+    """
+    file_path = directory / "dataset.csv"
+    file_path.write_text(",".join(COLUMNS) + "\n" + "\n".join(rows) + "\n")
+    return file_path
+
+
+def test_read_dataset_columns(tmp_path):
+    """
+    Test the dataset loader that stores numerical columns in typed buffers and categorical columns as codes.
+
+    Parameters:
+    - tmp_path: The temporary directory provided by PyTest.
+
+    Returns:
+    - None
+
+    Raises:
+    - AssertionError if the result is incorrect.
+    """
+    dataset = load_dataset(write_dataset_file(tmp_path, ROWS))
+    assert len(dataset) == 3
+    assert list(dataset.get_column("Academic Reputation")) == [100, 90.5, 0]
+    assert list(dataset.get_column("Rank")) == [1, 2, 3]
+    assert list(dataset.get_category_codes("Region")) == [0, 1, 1]
+    assert dataset.categories["Region"] == ["North America", "Europe"]
+    assert dataset.get_categorical_values("Size") == ["M", "L", "L"]
+
+
+def test_dataset_group_queries(tmp_path):
+    """
+    Test the dataset frequency and decoding queries over a categorical column.
+
+    Parameters:
+    - tmp_path: The temporary directory provided by PyTest.
+
+    Returns:
+    - None
+
+    Raises:
+    - AssertionError if the result is incorrect.
+    """
+    dataset = load_dataset(write_dataset_file(tmp_path, ROWS))
+    assert dataset.get_category_frequencies("Region") == {"North America": 1, "Europe": 2}
+    assert dataset.get_categorical_values("Region") == ["North America", "Europe", "Europe"]
+
+
+def test_group_by_aggregates_every_group(tmp_path, monkeypatch):
+    """
+    Test the group-by engine aggregating a numerical column by any categorical column, with and without NumPy.
+
+    Parameters:
+    - tmp_path: The temporary directory provided by PyTest.
+    - monkeypatch: The PyTest fixture used to hide NumPy from the engine.
+
+    Returns:
+    - None
+
+    Raises:
+    - AssertionError if the result is incorrect.
+    """
+    dataset = load_dataset(write_dataset_file(tmp_path, ROWS))
+    for is_numpy_hidden in (False, True):
+        if is_numpy_hidden:
+            monkeypatch.setattr(group_by, "numpy", None)
+        region_statistics = group_by.group_by(dataset, "Region", "Overall")
+        assert region_statistics.to_dict("count") == {"North America": 1, "Europe": 2}
+        assert region_statistics.to_dict("mean") == approx({"North America": 100, "Europe": 84.5})
+        assert region_statistics.get_statistic("minimum") == [100, 70.2]
+        assert region_statistics.get_statistic("maximum") == [100, 98.8]
+        assert region_statistics.get_statistic("standard_deviation") == approx([0, 20.223254])
+        assert region_statistics.get_statistic("median") == approx([100, 84.5])
+        assert list(region_statistics.get_grouped_values()["Europe"]) == [98.8, 70.2]
+        size_statistics = group_by.group_by(dataset, "Size", "Academic Reputation")
+        assert size_statistics.to_dict("sum") == approx({"M": 100, "L": 90.5})
+
+
+def test_load_dataset_from_small_chunks(tmp_path):
+    """
+    Test the streaming loader carrying partial lines over chunk boundaries and yielding the dataset after each batch.
+
+    Parameters:
+    - tmp_path: The temporary directory provided by PyTest.
+
+    Returns:
+    - None
+
+    Raises:
+    - AssertionError if the result is incorrect.
+    """
+    file_path = write_dataset_file(tmp_path, ROWS)
+    row_counts = [len(dataset) for dataset in stream_dataset(file_path, chunk_size=64)]
+    assert row_counts == sorted(row_counts) and row_counts[-1] == 3
+    assert len(row_counts) > 1
+    dataset = load_dataset(file_path, chunk_size=7)
+    assert list(dataset.get_column("Overall")) == [100, 98.8, 70.2]
+    assert dataset.column_moments["Overall"].count == 3
+    assert dataset.column_moments["Overall"].get_mean() == approx((100 + 98.8 + 70.2) / 3)
+
+
+def test_load_dataset_from_streams():
+    """
+    Test the streaming loader reading gzip-compressed binary streams and text streams.
+
+    Parameters:
+    - None
+
+    Returns:
+    - None
+
+    Raises:
+    - AssertionError if the result is incorrect.
+    """
+    text = ",".join(COLUMNS) + "\n" + "\n".join(ROWS)
+    compressed_dataset = load_dataset(BytesIO(compress(text.encode("utf-8"))))
+    assert compressed_dataset.get_category_frequencies("Country") == {"United States": 1, "United Kingdom": 1,
+                                                                      "Germany": 1}
+    assert list(load_dataset(StringIO(text)).get_column("Rank")) == [1, 2, 3]
+
+
+def test_dataset_cache_round_trip(tmp_path):
+    """
+    Test the binary dataset cache written on the first load, memory-mapped on the next one, refreshed when the file is
+    touched and ignored once stale or corrupted.
+
+    Parameters:
+    - tmp_path: The temporary directory provided by PyTest.
+
+    Returns:
+    - None
+
+    Raises:
+    - AssertionError if the result is incorrect.
+    """
+    file_path = write_dataset_file(tmp_path, ROWS)
+    assert read_dataset_cache(file_path) is None
+    parsed_dataset = load_dataset_with_cache(file_path)
+    cached_dataset = read_dataset_cache(file_path, verify_content=True)
+    assert cached_dataset is not None
+    for column in ("Rank", "Academic Reputation", "Overall"):
+        assert list(cached_dataset.get_column(column)) == list(parsed_dataset.get_column(column))
+    assert cached_dataset.get_category_frequencies("Region") == parsed_dataset.get_category_frequencies("Region")
+    assert list(group_by.group_by(cached_dataset, "Region", "Overall").get_grouped_values()["Europe"]) == [98.8, 70.2]
+    assert get_histogram(cached_dataset.get_column("Academic Reputation"))[1] == [1, 0, 0, 0, 0, 0, 0, 0, 0, 2]
+    assert get_histogram(cached_dataset.get_column("Overall"))[1] == [0, 0, 0, 0, 0, 0, 0, 1, 0, 2]
+
+    # Touching the file without changing it records its new modification time in the cache
+    cache_path = tmp_path / get_cache_path("dataset.csv")
+    utime(file_path, ns=(1_000_000_000, 1_000_000_000))
+    assert read_dataset_cache(file_path) is not None
+    assert CACHE_HEADER.unpack_from(cache_path.read_bytes())[3] == 1_000_000_000
+
+    # A truncated or corrupted cache is ignored
+    cache = cache_path.read_bytes()
+    cache_path.write_bytes(cache[:-1])
+    assert read_dataset_cache(file_path) is None
+    cache_path.write_bytes(cache[:-1] + b"{")
+    assert read_dataset_cache(file_path) is None
+
+    write_dataset_file(tmp_path, ROWS[:2] + [ROWS[2].replace("Germany", "Austria")])
+    assert read_dataset_cache(file_path, verify_content=True) is None
+    assert load_dataset_with_cache(file_path, verify_content=True).categories["Country"][-1] == "Austria"
+    assert (tmp_path / get_cache_path("dataset.csv")).exists()
+
+
+def test_dataset_cache_ignores_file_modified_while_parsed(tmp_path, monkeypatch):
+    """
+    Test the dataset cache keyed on the file as it was before parsing, so that a file modified while it is parsed is
+    parsed again on the next load instead of being read from a stale cache.
+
+    Parameters:
+    - tmp_path: The temporary directory provided by PyTest.
+    - monkeypatch: The PyTest fixture used to modify the file during the parse.
+
+    Returns:
+    - None
+
+    Raises:
+    - AssertionError if the result is incorrect.
+    """
+    file_path = write_dataset_file(tmp_path, ROWS)
+    load_dataset_in_parallel = dataset_cache.load_dataset_in_parallel
+
+    def load_and_modify(*arguments, **keyword_arguments):
+        dataset = load_dataset_in_parallel(*arguments, **keyword_arguments)
+        write_dataset_file(tmp_path, ROWS[:2] + [ROWS[2].replace("Germany", "Austria")])
+        utime(file_path, ns=(2_000_000_000, 2_000_000_000))
+        return dataset
+    monkeypatch.setattr(dataset_cache, "load_dataset_in_parallel", load_and_modify)
+    assert load_dataset_with_cache(file_path).categories["Country"][-1] == "Germany"
+    assert read_dataset_cache(file_path) is None
+
+
+def test_load_dataset_in_parallel_matches_serial_load(tmp_path):
+    """
+    Test the sharded loader whose merged worker datasets keep the row order, codes and counts of a serial load.
+
+    Parameters:
+    - tmp_path: The temporary directory provided by PyTest.
+
+    Returns:
+    - None
+
+    Raises:
+    - AssertionError if the result is incorrect.
+    """
+    rows = [ROWS[index % len(ROWS)].replace(",", f",{index}-", 1) for index in range(40)]
+    file_path = write_dataset_file(tmp_path, rows)
+    serial_dataset = load_dataset(file_path)
+    parallel_dataset = load_dataset_in_parallel(file_path, worker_count=3, minimum_shard_size=1)
+    assert len(parallel_dataset) == 40
+    assert list(parallel_dataset.get_column("Overall")) == list(serial_dataset.get_column("Overall"))
+    assert parallel_dataset.categories == serial_dataset.categories
+    assert list(parallel_dataset.get_category_codes("Region")) == list(serial_dataset.get_category_codes("Region"))
+    assert parallel_dataset.category_counts == serial_dataset.category_counts
+    assert parallel_dataset.column_moments["Overall"].get_mean() == approx(
+        serial_dataset.column_moments["Overall"].get_mean())
+
+
+def test_quantile_sketches_fed_from_streaming_load(tmp_path):
+    """
+    Test the quantile sketches fed batch by batch while streaming, matching the sketches enabled after loading.
+
+    Parameters:
+    - tmp_path: The temporary directory provided by PyTest.
+
+    Returns:
+    - None
+
+    Raises:
+    - AssertionError if the result is incorrect.
+    """
+    file_path = write_dataset_file(tmp_path, ROWS)
+    streamed_dataset = load_dataset(file_path, chunk_size=64, quantile_error_bound=0.01)
+    loaded_dataset = load_dataset(file_path)
+    loaded_dataset.enable_quantile_sketches(0.01)
+    for dataset in (streamed_dataset, loaded_dataset):
+        assert dataset.column_sketches["Overall"].is_exact()
+        assert dataset.column_sketches["Overall"].get_quartiles() == (70.2, 98.8, 100)
+        region_sketches = dataset.get_grouped_sketches("Region", "Overall")
+        assert list(region_sketches) == ["North America", "Europe"]
+        assert region_sketches["Europe"].get_box_plot_statistics()["med"] == approx(84.5)
+
+
+def test_synthetic_dataset_has_the_dataset_schema(tmp_path):
+    """
+    Test the synthetic dataset generator whose files load like dataset.csv, ranked by falling Overall scores.
+
+    Parameters:
+    - tmp_path: The temporary directory provided by PyTest.
+
+    Returns:
+    - None
+
+    Raises:
+    - AssertionError if the result is incorrect.
+    """
+    file_path = tmp_path / "synthetic.csv"
+    write_synthetic_dataset(file_path, 500, seed=1)
+    assert file_path.read_text().splitlines()[0] == ",".join(COLUMNS)
+    dataset = load_dataset(file_path)
+    assert len(dataset) == 500
+    overall_scores = list(dataset.get_column("Overall"))
+    ranks = list(dataset.get_column("Rank"))
+    assert overall_scores == sorted(overall_scores, reverse=True)
+    assert ranks == sorted(ranks) and ranks[0] == 1
+    assert all(1 <= score <= 100 for score in dataset.get_column("Academic Reputation"))
+    assert set(dataset.categories["Region"]) <= {"North America", "Europe", "Asia", "Oceania", "South America"}
+    assert dataset.co_moments[("Academic Reputation", "Overall")].get_correlation() > 0.5
+    write_synthetic_dataset(tmp_path / "again.csv", 500, seed=1)
+    assert (tmp_path / "again.csv").read_text() == file_path.read_text()
+
+
+def test_instrumentation_traces_ingestion(tmp_path, monkeypatch):
+    """
+    Test the instrumentation counting the rows parsed and parse errors, and timing the batches, in a Chrome trace.
+
+    Parameters:
+    - tmp_path: The temporary directory provided by PyTest.
+    - monkeypatch: The PyTest fixture enabling the instrumentation for this test only.
+
+    Returns:
+    - None
+
+    Raises:
+    - AssertionError if the result is incorrect.
+    """
+    bad_rows = ["4,Institution D,France,Europe,S,1,2,3", "5,Institution E,Spain,Europe,S,x,1,1,1,1,1,1"]
+    file_path = write_dataset_file(tmp_path, ROWS + bad_rows)
+    load_dataset(file_path)
+    assert instrumentation.counters == {}
+    monkeypatch.setattr(instrumentation, "is_enabled", True)
+    monkeypatch.setattr(instrumentation, "trace_events", deque(maxlen=instrumentation.TRACE_EVENT_LIMIT))
+    monkeypatch.setattr(instrumentation, "counters", {})
+    load_dataset(file_path)
+    assert instrumentation.counters == {"rows parsed": 3, "parse errors": 2}
+    trace_path = tmp_path / "trace.json"
+    instrumentation.write_trace(trace_path)
+    trace = json.loads(trace_path.read_text())
+    assert trace["otherData"]["counters"] == {"rows parsed": 3, "parse errors": 2}
+    assert [event["name"] for event in trace["traceEvents"] if event["ph"] == "X"] == ["parse_line_batch"]
+
+    # Only the latest events are kept, including around the events collected for a worker process
+    monkeypatch.setattr(instrumentation, "trace_events", deque(maxlen=5))
+    for index in range(7):
+        with instrumentation.span(f"stage {index}"):
+            pass
+    assert [event["name"] for event in instrumentation.trace_events] == [f"stage {index}" for index in range(2, 7)]
+    _, events, _ = instrumentation.collect_trace(load_dataset, file_path)
+    assert [event["name"] for event in events] == ["parse_line_batch"]
+    assert [event["name"] for event in instrumentation.trace_events][-1:] == ["stage 6"]
+    assert all(event["name"].startswith("stage") for event in instrumentation.trace_events)
+
+
+def test_rejected_rows_are_quarantined(tmp_path):
+    """
+    Test the quarantine of the rows that cannot be parsed, numbered by line in serial and parallel loads alike.
+
+    Parameters:
+    - tmp_path: The temporary directory provided by PyTest.
+
+    Returns:
+    - None
+
+    Raises:
+    - AssertionError if the result is incorrect.
+    """
+    bad_rows = ["4,Institution D,France,Europe,S,1,2,3", "", "5,Institution E,Spain,Europe,S,x,1,1,1,1,1,y"]
+    rows = [ROWS[index % len(ROWS)] for index in range(30)] + bad_rows + ROWS
+    file_path = write_dataset_file(tmp_path, rows)
+    quarantine_path = tmp_path / "dataset.quarantine.csv"
+    quarantine = Quarantine(quarantine_path)
+    dataset = load_dataset(file_path, chunk_size=128, quarantine=quarantine)
+    assert len(dataset) == 33
+    assert list(dataset.get_column("Overall"))[-3:] == [100, 98.8, 70.2]
+    assert quarantine.error_counts == {"Number of fields": 1, "Academic Reputation": 1, "Overall": 1}
+    assert quarantine.get_summary() == (f"2 of 35 rows were rejected and written to {quarantine_path} "
+                                        f"(Number of fields: 1, Academic Reputation: 1, Overall: 1)")
+    quarantined_lines = quarantine_path.read_text().splitlines()
+    assert quarantined_lines[0] == "Line number,Reason,Line"
+    assert quarantined_lines[1].startswith("32,Expected 12 fields but found 8,")
+    assert quarantined_lines[2].startswith("34,Invalid Academic Reputation: 'x'; Invalid Overall: 'y',")
+
+    parallel_quarantine = Quarantine()
+    parallel_dataset = load_dataset_in_parallel(file_path, worker_count=3, minimum_shard_size=1,
+                                                quarantine=parallel_quarantine)
+    assert list(parallel_dataset.get_column("Overall")) == list(dataset.get_column("Overall"))
+    assert [line_number for line_number, _, _ in parallel_quarantine.rejected_rows] == [32, 34]
+
+    # Without a quarantine file only the rows up to the limit are kept, the others being counted
+    limited_quarantine = Quarantine(row_limit=1)
+    load_dataset_in_parallel(file_path, worker_count=3, minimum_shard_size=1, quarantine=limited_quarantine)
+    assert [line_number for line_number, _, _ in limited_quarantine.rejected_rows] == [32]
+    assert limited_quarantine.rejected_count == 2
+    limited_quarantine = Quarantine(row_limit=1)
+    load_dataset(file_path, quarantine=limited_quarantine)
+    assert [line_number for line_number, _, _ in limited_quarantine.rejected_rows] == [32]
+    assert limited_quarantine.rejected_count == 2
+
+    # No cache is written for a file with rejected rows, so that they are reported on every load
+    for _ in range(2):
+        cached_quarantine = Quarantine()
+        assert len(load_dataset_with_cache(file_path, quarantine=cached_quarantine)) == 33
+        assert cached_quarantine.rejected_count == 2
+    assert not (tmp_path / get_cache_path("dataset.csv")).exists()
+
+
+def test_year_comparison_joins_institutions_by_name(tmp_path, monkeypatch):
+    """
+    Test the comparison of two years loaded concurrently, joined on the Institution names, with and without NumPy.
+
+    Parameters:
+    - tmp_path: The temporary directory provided by PyTest.
+    - monkeypatch: The PyTest fixture used to hide NumPy from the comparison and the group-by engine.
+
+    Returns:
+    - None
+
+    Raises:
+    - AssertionError if the result is incorrect.
+    """
+    later_rows = ["1,Institution B,United Kingdom,Europe,L,95,100,92.3,100,96.3,100,99.0",
+                  "2, Institution A ,United States,North America,M,100,100,100,100,90,100,97",
+                  "3,Institution D,France,Europe,S,50,50,50,50,50,50,60"]
+    file_paths = []
+    for year, rows in (("2023", later_rows), ("2022", ROWS)):
+        (tmp_path / year).mkdir()
+        file_paths.append(write_dataset_file(tmp_path / year, rows).rename(tmp_path / year / f"QS {year}.csv"))
+    assert [year_comparison.get_year_label(file_path) for file_path in file_paths] == ["2023", "2022"]
+    (later_dataset, later_quarantine), (earlier_dataset, _) = load_datasets_concurrently(file_paths, worker_count=2)
+    assert len(later_dataset) == 3 and len(earlier_dataset) == 3 and later_quarantine.rejected_count == 0
+
+    for is_numpy_hidden in (False, True):
+        if is_numpy_hidden:
+            monkeypatch.setattr(year_comparison, "numpy", None)
+            monkeypatch.setattr(group_by, "numpy", None)
+        comparison = year_comparison.YearComparison(earlier_dataset, later_dataset, "2022", "2023")
+        assert comparison.names == ["Institution B", "Institution A"]
+        assert (comparison.entered_count, comparison.left_count) == (1, 1)
+        assert list(comparison.overall_changes) == approx([0.2, -3])
+        assert list(comparison.academic_reputation_changes) == approx([4.5, 0])
+        assert list(comparison.rank_movements) == [1, -1]
+        assert comparison.get_region_changes("Overall").to_dict("mean") == approx({"Europe": 0.2,
+                                                                                   "North America": -3})
+        assert comparison.get_region_changes("Rank").to_dict("sum") == {"Europe": 1, "North America": -1}
+        assert comparison.get_rank_movement_distribution(bin_width=1) == {-1: 1, 1: 1}
+        assert comparison.get_rank_movement_distribution() == {-50: 1, 0: 1}
+        assert comparison.get_largest_movements() == ([("Institution B", 1)], [("Institution A", -1)])
+
+
+def test_server_mode_serves_cached_responses(tmp_path, monkeypatch):
+    """
+    Test the HTTP service on localhost - JSON analyses, rendered charts, errors and the cache of the responses.
+
+    Parameters:
+    - tmp_path: The temporary directory provided by PyTest.
+    - monkeypatch: The PyTest fixture restoring the headless backend flag set by the chart rendering.
+
+    Returns:
+    - None
+
+    Raises:
+    - AssertionError if the result is incorrect.
+    """
+    monkeypatch.setattr(matplotlib_visualisations, "is_headless_backend_forced", False)
+    service = StatisticsService(load_dataset(write_dataset_file(tmp_path, ROWS)))
+
+    async def request(port, target, headers=""):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n{headers}\r\n".encode())
+        response = await reader.read()
+        writer.close()
+        head, _, body = response.partition(b"\r\n\r\n")
+        status_line, *header_lines = head.decode().split("\r\n")
+        return int(status_line.split()[1]), dict(line.split(": ", 1) for line in header_lines), body
+
+    async def exercise_server():
+        server = await service.start_server(port=0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            summaries = await asyncio.gather(*(request(port, "/summary") for _ in range(20)))
+            status, headers, body = summaries[0]
+            assert status == 200 and headers["Content-Type"] == "application/json"
+            assert json.loads(body)["Overall"]["count"] == 3
+            assert json.loads(body)["Academic Reputation"]["maximum"] == 100
+            assert {summary for _, _, summary in summaries} == {body}
+            assert len(service.responses) == 1
+            status, _, _ = await request(port, "/summary", f"If-None-Match: {headers['ETag']}\r\n")
+            assert status == 304
+
+            status, _, body = await request(port, "/group-by?category=Size&column=Academic%20Reputation")
+            assert status == 200
+            assert {size: group["sum"] for size, group in json.loads(body)["groups"].items()} == approx({"M": 100,
+                                                                                                        "L": 90.5})
+            status, _, body = await request(port, "/correlation")
+            assert json.loads(body)["correlation_matrix"]["Overall"]["Overall"] == approx(1)
+            status, headers, body = await request(port, "/charts/categorical-bar-chart.svg")
+            assert status == 200 and headers["Content-Type"] == "image/svg+xml" and b"<svg" in body
+            assert (await request(port, "/charts/categorical-bar-chart.svg"))[2] == body
+
+            assert (await request(port, "/charts/unknown.png"))[0] == 404
+            assert (await request(port, "/group-by?category=Rank"))[0] == 400
+            assert len(service.responses) == 4
+
+            # A failed computation is answered with an error and computed again on the next request
+            correlation = service.get_correlation
+            service.get_correlation = lambda: 1 / 0
+            service.responses.pop(("/correlation",))
+            status, _, body = await request(port, "/correlation")
+            assert status == 500 and json.loads(body)["error"].startswith("ZeroDivisionError")
+            assert ("/correlation",) not in service.responses
+            service.get_correlation = correlation
+            assert (await request(port, "/correlation"))[0] == 200
+
+    try:
+        asyncio.run(exercise_server())
+    finally:
+        service.close()
+
+
+def test_background_export_reuses_encoded_image(tmp_path, monkeypatch):
+    """
+    Test the background export of a visualisation, rendering and encoding an unchanged figure only once however often it
+    is exported, and closing it.
+
+    Parameters:
+    - tmp_path: The temporary directory provided by PyTest.
+    - monkeypatch: The PyTest fixture used to count the encodings and force the headless backend.
+
+    Returns:
+    - None
+
+    Raises:
+    - AssertionError if the result is incorrect.
+    """
+    encoded_filenames = []
+    encode_visualisation_pixels = matplotlib_visualisations.encode_visualisation_pixels
+
+    def count_encoding(pixels, dpi, filename):
+        encoded_filenames.append(filename)
+        return encode_visualisation_pixels(pixels, dpi, filename)
+    monkeypatch.setattr(matplotlib_visualisations, "encode_visualisation_pixels", count_encoding)
+    monkeypatch.setattr(matplotlib_visualisations, "is_headless_backend_forced", True)
+    figure, axes = matplotlib_visualisations.get_pyplot().subplots()
+    axes.bar(["Europe", "Asia"], [2, 1])
+
+    futures = [matplotlib_visualisations.queue_visualisation_export(figure, "Chart", tmp_path) for _ in range(3)]
+    assert [future.result() for future in futures] == [str(tmp_path / "Chart.png")] * 3
+    assert encoded_filenames == ["Chart"]
+    image = (tmp_path / "Chart.png").read_bytes()
+    assert image.startswith(b"\x89PNG")
+    axes.set_title("Institutions by region")
+    matplotlib_visualisations.queue_visualisation_export(figure, "Chart", tmp_path).result()
+    assert encoded_filenames == ["Chart", "Chart"]
+    assert (tmp_path / "Chart.png").read_bytes() != image
+
+    output = StringIO()
+    with redirect_stdout(output):
+        matplotlib_visualisations.wait_for_exports()
+    assert output.getvalue().count("| Chart exported successfully |") == 4
+    assert matplotlib_visualisations.export_jobs == []
+    matplotlib_visualisations.close_visualisation(figure)
+    assert figure not in matplotlib_visualisations.encoded_images
+    assert not matplotlib_visualisations.get_pyplot().fignum_exists(figure.number)
+
+
+def test_batch_mode_exports_in_worker_processes(tmp_path, monkeypatch):
+    """
+    Test the batch mode writing the report and every visualisation with two worker processes, and reporting a failed
+    visualisation without stopping the others.
+
+    Parameters:
+    - tmp_path: The temporary directory provided by PyTest.
+    - monkeypatch: The PyTest fixture restoring the headless backend flag set by the batch mode.
+
+    Returns:
+    - None
+
+    Raises:
+    - AssertionError if the result is incorrect.
+    """
+    monkeypatch.setattr(matplotlib_visualisations, "is_headless_backend_forced", False)
+    dataset = load_dataset(write_dataset_file(tmp_path, ROWS))
+    output_directory = tmp_path / "batch"
+    with redirect_stdout(StringIO()):
+        assert batch_mode.run_batch_mode(dataset, str(output_directory), worker_count=2) == 0
+    exported_filenames = sorted(file_path.name for file_path in output_directory.iterdir())
+    assert exported_filenames == sorted([batch_mode.REPORT_FILENAME] + [
+        f"{filename}.png" for filename, _, _ in batch_mode.get_visualisations([], [], {}, {}, correlation_matrix={})])
+    assert "Institution" in (output_directory / batch_mode.REPORT_FILENAME).read_text()
+
+    def create_failing_figure():
+        raise TypeError("no figure")
+    visualisations = [("Failing", create_failing_figure, ())] + \
+        batch_mode.get_visualisations([1, 2], [3, 4], {"Europe": 2}, {"Europe": [3, 4]})[:1]
+    results = list(batch_mode.iterate_export_results(visualisations, str(tmp_path)))
+    assert [(filename, type(error).__name__) for filename, _, error in results] == \
+        [("Failing", "TypeError"), ("Numerical Visualisation - Histograms", "NoneType")]
+
+
+def test_scatter_plot_switches_to_density_above_threshold(monkeypatch):
+    """
+    Test the scatter plot drawing one marker per Institution up to the density threshold, and a hexbin density or a
+    stratified sample above it.
+
+    Parameters:
+    - monkeypatch: The PyTest fixture used to force the headless backend.
+
+    Returns:
+    - None
+
+    Raises:
+    - AssertionError if the result is incorrect.
+    """
+    monkeypatch.setattr(matplotlib_visualisations, "is_headless_backend_forced", True)
+    x_values = [float(index % 97) for index in range(200)]
+    y_values = [float(index % 89) for index in range(200)]
+    for density_threshold, large_data_mode, expected_artists, expected_point_count in (
+            (200, "density", ["PathCollection"], 200),
+            (199, "density", ["PolyCollection"], None),
+            (100, "sample", ["PathCollection"], 100)):
+        figure = matplotlib_visualisations.create_scatter_plot_figure(x_values, y_values, density_threshold,
+                                                                       large_data_mode)
+        axes = figure.axes[0]
+        assert [type(collection).__name__ for collection in axes.collections] == expected_artists
+        if expected_point_count is not None:
+            assert len(axes.collections[0].get_offsets()) == expected_point_count
+        matplotlib_visualisations.get_pyplot().close(figure)
+
+
+def test_pyplot_is_imported_only_for_a_chart():
+    """
+    Test that importing the analyses and every module of the application leaves matplotlib.pyplot unimported until the
+    first chart is created, in a fresh interpreter.
+
+    Parameters:
+    - None
+
+    Returns:
+    - None
+
+    Raises:
+    - AssertionError if the result is incorrect.
+    """
+    script = "\n".join([
+        "import sys",
+        "import analysis_and_visualisation, main",
+        "import matplotlib_visualisations",
+        "assert 'matplotlib.pyplot' not in sys.modules, 'imported at start-up'",
+        "matplotlib_visualisations.use_headless_backend()",
+        "matplotlib_visualisations.create_bar_chart_figure({'Europe': 2, 'Asia': 1}, 'Region')",
+        "assert 'matplotlib.pyplot' in sys.modules, 'not imported for a chart'",
+    ])
+    completed_process = run([executable, "-c", script], cwd=path.dirname(path.abspath(__file__)), capture_output=True,
+                            text=True)
+    assert completed_process.returncode == 0, completed_process.stderr
+
+
+if __name__ == '__main__':
+    main([__file__, '-v'])
@@ -4,11 +4,38 @@ Author Student ID: A00316036
 Description: This module contains functions to perform unit testing using PyTest on the user-defined statistics functions.".
 """
 
-from pytest import main, approx
+from array import array
+from math import isnan
+from pytest import main, approx, fixture, mark
 from analysis_and_visualisation import get_mean, get_median, get_mode, get_range, get_inter_quartile_range, \
-    get_standard_deviation, get_mode_skewness, get_median_skewness, get_correlation
+    get_standard_deviation, get_mode_skewness, get_median_skewness, get_correlation, get_summary_statistics, \
+    get_correlation_matrix
+from frequency_table import FrequencyTable
+from accumulators import MomentAccumulator, CoMomentAccumulator
+from histogram_aggregation import HistogramAccumulator, get_histogram
+from quantile_sketch import QuantileSketch
+from result_cache import ResultCache, column_checksums, get_column_fingerprint
+from statistics_backends import get_available_backends, get_backend, set_backend, get_half_split_quartiles
+
+
+@fixture(params=get_available_backends())
+def statistics_backend(request):
+    """
+    Run a test of the backend-dispatched statistics once with each statistics backend available in the environment.
+
+    Parameters:
+    - request: The PyTest request holding the name of the backend.
 
+    Returns:
+    - The name of the selected backend.
+    """
+    previous_backend = get_backend().name
+    set_backend(request.param)
+    yield request.param
+    set_backend(previous_backend)
 
+
+@mark.usefixtures("statistics_backend")
 def test_get_mean():
     """
     Test the mean function that calculates and returns the mean of a list of values.
@@ -25,6 +52,7 @@ def test_get_mean():
     assert get_mean([1, 3, 5, 7, 9]) == 5
 
 
+@mark.usefixtures("statistics_backend")
 def test_get_median_for_odd_list_length():
     """
     Test the median function that calculates and returns the median of a list of values of odd length.
@@ -41,6 +69,7 @@ def test_get_median_for_odd_list_length():
     assert get_median([5, 1, 3, 6, 7]) == 5
 
 
+@mark.usefixtures("statistics_backend")
 def test_get_median_for_even_list_length():
     """
     Test the median function that calculates and returns the median of a list of values of even length.
@@ -57,6 +86,7 @@ def test_get_median_for_even_list_length():
     assert get_median([5, 2, 6, 4, 7, 1, 3, 8]) == 4.5
 
 
+@mark.usefixtures("statistics_backend")
 def test_get_mode():
     """
     Test the mode function that calculates and returns the mode of a list of values.
@@ -73,6 +103,7 @@ def test_get_mode():
     assert get_mode([5, 1, 3, 9, 3, 3, 4, 7]) == 3
 
 
+@mark.usefixtures("statistics_backend")
 def test_get_range():
     """
     Test the range function that calculates and returns the range of a list of values.
@@ -89,6 +120,7 @@ def test_get_range():
     assert get_range([4, 2, 7, 8, 5]) == 6
 
 
+@mark.usefixtures("statistics_backend")
 def test_inter_quartile_range_for_odd_list_length():
     """
     Test the inter quartile range function that calculates and returns the inter quartile range of a list of values of odd length.
@@ -105,6 +137,7 @@ def test_inter_quartile_range_for_odd_list_length():
     assert get_inter_quartile_range([2, 4, 4, 5, 6, 7, 8]) == 3
 
 
+@mark.usefixtures("statistics_backend")
 def test_inter_quartile_range_for_even_list_length():
     """
     Test the inter quartile range function that calculates and returns the inter quartile range of a list of values of even length.
@@ -121,6 +154,7 @@ def test_inter_quartile_range_for_even_list_length():
     assert get_inter_quartile_range([1, 3, 3, 4, 5, 6, 6, 7, 8, 8]) == 4
 
 
+@mark.usefixtures("statistics_backend")
 def test_get_standard_deviation():
     """
     Test the standard deviation function that calculates and returns the standard deviation of a list of values.
@@ -137,6 +171,7 @@ def test_get_standard_deviation():
     assert get_standard_deviation([1, 2, 3, 4, 4, 5]) == approx(1.47, 0.01)
 
 
+@mark.usefixtures("statistics_backend")
 def test_get_mode_skewness():
     """
     Test the mode skewness function that calculates and returns the mode skewness of a list of values.
@@ -153,6 +188,7 @@ def test_get_mode_skewness():
     assert get_mode_skewness([1, 2, 3, 4, 4, 5]) == approx(-0.567, 0.01)
 
 
+@mark.usefixtures("statistics_backend")
 def test_get_median_skewness():
     """
     Test the median skewness function that calculates and returns the median skewness of a list of values.
@@ -169,9 +205,11 @@ def test_get_median_skewness():
     assert get_median_skewness([1, 2, 3, 4, 4, 5]) == approx(-0.68, 0.01)
 
 
+@mark.usefixtures("statistics_backend")
 def test_get_correlation():
     """
-    Test the correlation function that calculates and returns the correlation between two lists of values.
+    Test the correlation function that calculates and returns the correlation between two lists of values, with each
+    backend, and NaN for a constant list.
 
     Parameters:
     - None
@@ -183,6 +221,291 @@ def test_get_correlation():
     - AssertionError if the result is incorrect.
     """
     assert get_correlation([1, 2, 3, 4], [2, 4, 6, 8]) == approx(1, 0.1)
+    # The correlation with a constant column is undefined (NaN), like in the correlation matrix
+    assert isnan(get_correlation([1, 2, 3, 4], [5, 5, 5, 5]))
+    assert isnan(get_correlation([7, 7, 7], [1, 2, 3]))
+
+
+@mark.usefixtures("statistics_backend")
+def test_get_correlation_matrix():
+    """
+    Test the correlation matrix function that calculates the correlation between every pair of columns in one pass.
+
+    Parameters:
+    - None
+
+    Returns:
+    - None
+
+    Raises:
+    - AssertionError if the result is incorrect.
+    """
+    columns = {"a": [1, 2, 3, 4, 6], "b": [2, 1, 4, 3, 5], "c": [9, 7, 4, 4, 1], "d": [3, 3, 3, 3, 3]}
+    correlation_matrix = get_correlation_matrix(columns)
+    assert list(correlation_matrix) == ["a", "b", "c", "d"]
+    for row in ("a", "b", "c"):
+        assert correlation_matrix[row][row] == approx(1)
+        for column in ("a", "b", "c"):
+            assert correlation_matrix[row][column] == approx(get_correlation(columns[row], columns[column]))
+    assert isnan(correlation_matrix["a"]["d"])
+
+
+@mark.usefixtures("statistics_backend")
+def test_get_summary_statistics():
+    """
+    Test the summary statistics function that calculates and returns every summary statistic of a list of values.
+
+    Parameters:
+    - None
+
+    Returns:
+    - None
+
+    Raises:
+    - AssertionError if the result is incorrect.
+    """
+    summary = get_summary_statistics([5, 2, 4, 4, 1, 3])
+    assert summary["count"] == 6
+    assert summary["minimum"] == 1
+    assert summary["maximum"] == 5
+    assert summary["mean"] == 19 / 6
+    assert summary["median"] == 3.5
+    assert summary["mode"] == 4
+    assert summary["range"] == 4
+    assert summary["inter_quartile_range"] == 2
+    assert summary["standard_deviation"] == approx(1.47, 0.01)
+    assert summary["mode_skewness"] == approx(-0.567, 0.01)
+    assert summary["median_skewness"] == approx(-0.68, 0.01)
+
+
+@mark.usefixtures("statistics_backend")
+def test_get_mode_for_tied_frequencies():
+    """
+    Test the mode function that returns the smallest of the most frequent values when frequencies are tied.
+
+    Parameters:
+    - None
+
+    Returns:
+    - None
+
+    Raises:
+    - AssertionError if the result is incorrect.
+    """
+    assert get_mode([7, 2, 7, 2, 9]) == 2
+
+
+def test_frequency_table_ties_and_top_k():
+    """
+    Test the frequency table that reports multimodal values, the least frequent values and the top-k frequent values.
+
+    Parameters:
+    - None
+
+    Returns:
+    - None
+
+    Raises:
+    - AssertionError if the result is incorrect.
+    """
+    frequency_table = FrequencyTable(["Asia", "Europe", "Asia", "Europe", "Africa", "Oceania", "Asia"])
+    assert frequency_table.get_total() == 7
+    assert frequency_table.get_most_frequent() == [("Asia", 3)]
+    assert frequency_table.get_least_frequent() == [("Africa", 1), ("Oceania", 1)]
+    assert frequency_table.get_top_k(2) == [("Asia", 3), ("Europe", 2)]
+    assert not frequency_table.is_multimodal()
+    assert FrequencyTable([4, 1, 4, 1, 2]).get_modes() == [1, 4]
+
+
+def test_moment_accumulators_merge_exactly():
+    """
+    Test the moment accumulator whose merged partial accumulators match the statistics of the whole list of values.
+
+    Parameters:
+    - None
+
+    Returns:
+    - None
+
+    Raises:
+    - AssertionError if the result is incorrect.
+    """
+    values = [1, 2, 3, 4, 4, 5, 9, 0.5]
+    moments = MomentAccumulator.from_values(values[:3])
+    moments.merge(MomentAccumulator.from_values(values[3:6]))
+    for value in values[6:]:
+        moments.update(value)
+    whole_moments = MomentAccumulator.from_values(values)
+    assert moments.count == len(values)
+    assert (moments.minimum, moments.maximum) == (0.5, 9)
+    assert moments.get_mean() == approx(get_mean(values))
+    assert moments.get_standard_deviation() == approx(get_standard_deviation(values))
+    assert moments.get_skewness() == approx(whole_moments.get_skewness())
+    assert get_summary_statistics(values, moments) == approx(get_summary_statistics(values))
+
+
+def test_co_moment_accumulators_merge_exactly():
+    """
+    Test the co-moment accumulator whose merged partial accumulators match the correlation of the whole lists of values.
+
+    Parameters:
+    - None
+
+    Returns:
+    - None
+
+    Raises:
+    - AssertionError if the result is incorrect.
+    """
+    x_values = [1, 2, 3, 4, 5, 6]
+    y_values = [2, 1, 4, 3, 7, 5]
+    co_moments = CoMomentAccumulator.from_values(x_values[:2], y_values[:2])
+    co_moments.update_batch(x_values[2:5], y_values[2:5])
+    co_moments.update(x_values[5], y_values[5])
+    assert co_moments.get_correlation() == approx(get_correlation(x_values, y_values))
+    # The correlation with a constant column is NaN, as with the statistics backends
+    assert isnan(CoMomentAccumulator.from_values([1, 1, 1], [1, 2, 3]).get_correlation())
+    assert isnan(get_correlation([1, 1, 1], [1, 2, 3]))
+
+
+def test_get_histogram():
+    """
+    Test the histogram function that calculates and caches the bin edges and counts of a list of values.
+
+    Parameters:
+    - None
+
+    Returns:
+    - None
+
+    Raises:
+    - AssertionError if the result is incorrect.
+    """
+    values = [0, 5, 10, 19.9, 20, 35, 40]
+    assert get_histogram(values) == ([0, 10, 20, 30, 40], [2, 2, 1, 2])
+    assert get_histogram(values) == get_histogram(values)
+    merged_histogram = HistogramAccumulator([0, 10, 20, 30, 40])
+    for shard in (values[:3], values[3:]):
+        shard_histogram = HistogramAccumulator([0, 10, 20, 30, 40])
+        shard_histogram.update_batch(shard)
+        merged_histogram.merge(shard_histogram)
+    assert merged_histogram.counts == [2, 2, 1, 2]
+
+
+def test_result_cache():
+    """
+    Test the result cache that computes a statistic once per column fingerprint and evicts the least recently used one,
+    the checksums of read-only columns stored until the column grows, and lists computed without being cached.
+
+    Parameters:
+    - None
+
+    Returns:
+    - None
+
+    Raises:
+    - AssertionError if the result is incorrect.
+    """
+    cache = ResultCache(maximum_size=2)
+    first_values = array("q", [3, 1, 2])
+    second_values = array("q", [5, 4])
+    assert cache.get_result("sum", (first_values,), lambda: sum(first_values)) == 6
+    assert cache.get_result("sum", (first_values,), lambda: None) == 6
+    assert (cache.hits, cache.misses) == (1, 1)
+    first_values[0] = 4
+    assert cache.get_result("sum", (first_values,), lambda: sum(first_values)) == 7
+    assert cache.get_result("sum", (second_values,), lambda: sum(second_values)) == 9
+    assert cache.get_result("max", (second_values,), lambda: max(second_values)) == 5
+    assert len(cache) == 2
+    assert cache.get_result("sum", (first_values,), lambda: sum(first_values)) == 7
+    assert cache.misses == 5
+    # Lists are not cached, their statistic being computed every time
+    values_list = [1, 2]
+    assert cache.get_result("sum", (values_list,), lambda: sum(values_list)) == 3
+    assert cache.get_result("sum", (values_list,), lambda: None) is None
+    assert (cache.hits, cache.misses) == (1, 5)
+
+    column = array("d", [1.5, 2.5])
+    fingerprint = get_column_fingerprint(memoryview(column).toreadonly())
+    assert column_checksums[id(column)] == fingerprint[1:]
+    assert get_column_fingerprint(memoryview(column).toreadonly()) == fingerprint
+    column.append(3.5)
+    assert get_column_fingerprint(memoryview(column).toreadonly())[1:] == column_checksums[id(column)]
+    assert column_checksums[id(column)][0] == 3
+
+
+@mark.usefixtures("statistics_backend")
+def test_get_box_plot_statistics():
+    """
+    Test the box plot statistics function that calculates the quartiles, whiskers and mean a box is drawn from.
+
+    Parameters:
+    - None
+
+    Returns:
+    - None
+
+    Raises:
+    - AssertionError if the result is incorrect.
+    """
+    box_plot_statistics = get_backend().get_box_plot_statistics([7, 1, 100, 3, 5, 2, 6, 4])
+    assert box_plot_statistics == {"q1": 2.5, "med": 4.5, "q3": 6.5, "whislo": 1, "whishi": 7, "mean": 16,
+                                   "fliers": []}
+
+
+@mark.usefixtures("statistics_backend")
+def test_quantile_sketch_error_bound():
+    """
+    Test the quantile sketch, exact while it retains every value and within its reported rank error once compacted.
+
+    Parameters:
+    - None
+
+    Returns:
+    - None
+
+    Raises:
+    - AssertionError if the result is incorrect.
+    """
+    exact_sketch = QuantileSketch()
+    exact_sketch.update_batch([7, 1, 100, 3, 5, 2, 6, 4])
+    assert exact_sketch.is_exact()
+    assert exact_sketch.get_quartiles() == get_backend().get_quartiles([7, 1, 100, 3, 5, 2, 6, 4])
+
+    values = [(index * 7919) % 10007 for index in range(100000)]
+    merged_sketch = QuantileSketch(0.05)
+    for start in range(0, len(values), 25000):
+        shard_sketch = QuantileSketch(0.05)
+        shard_sketch.update_batch(values[start:start + 25000])
+        merged_sketch.merge(shard_sketch)
+    assert not merged_sketch.is_exact()
+    assert merged_sketch.count == len(values)
+    assert 0 < merged_sketch.get_error_bound() <= 0.05
+    sorted_values = sorted(values)
+    for fraction, quartile in zip((0.25, 0.5, 0.75), merged_sketch.get_quartiles()):
+        assert abs(sorted_values.index(quartile) - fraction * len(values)) <= merged_sketch.rank_error + 10
+
+
+@mark.usefixtures("statistics_backend")
+def test_get_quartiles_by_selection_matches_sorting():
+    """
+    Test the quartiles found by selecting order statistics, which must equal the half-split quartiles of the sorted
+    values for odd and even lengths, ties and ordered input.
+
+    Parameters:
+    - None
+
+    Returns:
+    - None
+
+    Raises:
+    - AssertionError if the result is incorrect.
+    """
+    for length in range(2, 80):
+        values = [(index * 37) % 11 + (index % 3) / 4 for index in range(length)]
+        for ordered_values in (values, sorted(values), sorted(values, reverse=True)):
+            assert get_backend().get_quartiles(ordered_values) == get_half_split_quartiles(sorted(values))
+            assert get_median(ordered_values) == get_half_split_quartiles(sorted(values))[1]
 
 
 if __name__ == '__main__':
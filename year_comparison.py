@@ -0,0 +1,339 @@
+"""
+Author Student ID: A00316036
+
+Description: This module provides the comparison of the rankings of several years. The dataset files of the years are
+loaded concurrently, and the Institutions of two years are joined on their name through a hash index, so the join and
+the changes of every Institution in the Overall and Academic Reputation scores and in rank take one pass over the rows
+of each year. The changes are aggregated by region with the group-by engine, and the rank movements are summarised by
+their quartiles and distribution.
+"""
+
+import re
+from array import array
+from os import path
+from data_ingestion import load_datasets_concurrently
+from group_by import group_values
+from result_cache import get_cached_statistic
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# A year in a dataset file name, e.g. 2023 in "QS 2023.csv"
+YEAR_PATTERN = re.compile(r"(?<!\d)(?:19|20)\d{2}(?!\d)")
+RANK_MOVEMENT_BIN_WIDTH = 50
+LARGEST_MOVEMENT_COUNT = 3
+
+
+def get_year_label(file_path):
+    """
+    Returns the label of the year of a dataset file - the year in its name, or else its name without the extension
+
+    Parameters
+    ----------
+    file_path : str
+        The path of the dataset file
+
+    Returns
+    -------
+    str
+        The label of the year
+    """
+    filename = path.basename(file_path)
+    match = YEAR_PATTERN.search(filename)
+    return match.group(0) if match else path.splitext(filename)[0]
+
+
+def get_name_index(dataset):
+    """
+    Builds the hash index of the Institutions of a dataset by name, surrounding spaces being ignored
+
+    Parameters
+    ----------
+    dataset : Dataset
+        The dataset of one year
+
+    Returns
+    -------
+    dict
+        A dictionary with the Institution names as keys, in row order, and the row of their first occurrence as values
+    """
+    names = [name.strip() for name in dataset.categories["Institution Name"]]
+    name_index = {}
+    for row, code in enumerate(dataset.get_category_codes("Institution Name")):
+        name_index.setdefault(names[code], row)
+    return name_index
+
+
+def gather(values, rows, typecode):
+    """
+    Gathers the values of the given rows of a column
+
+    Parameters
+    ----------
+    values : memoryview
+        The values of the column
+    rows : array.array
+        The rows to be gathered
+    typecode : str
+        The array typecode of the values
+
+    Returns
+    -------
+    numpy.ndarray or array.array
+        The values of the rows, in the order of the rows
+    """
+    if numpy is not None:
+        return numpy.asarray(values)[numpy.asarray(rows, dtype=numpy.intp)]
+    return array(typecode, [values[row] for row in rows])
+
+
+def subtract(minuends, subtrahends, typecode):
+    """
+    Subtracts two gathered columns element by element
+
+    Parameters
+    ----------
+    minuends : numpy.ndarray or array.array
+        The values subtracted from
+    subtrahends : numpy.ndarray or array.array
+        The values subtracted
+    typecode : str
+        The array typecode of the differences
+
+    Returns
+    -------
+    numpy.ndarray or array.array
+        The differences
+    """
+    if numpy is not None:
+        return minuends - subtrahends
+    return array(typecode, [minuend - subtrahend for minuend, subtrahend in zip(minuends, subtrahends)])
+
+
+class YearComparison:
+    """
+    The changes of the Institutions ranked in two years, joined on their name
+
+    Attributes
+    ----------
+    earlier_label : str
+        The label of the earlier year
+    later_label : str
+        The label of the later year
+    names : list
+        The names of the Institutions ranked in both years, in the order of the later year
+    overall_changes : numpy.ndarray or array.array
+        The change of the Overall score of each Institution
+    academic_reputation_changes : numpy.ndarray or array.array
+        The change of the Academic Reputation score of each Institution
+    rank_movements : numpy.ndarray or array.array
+        The number of places each Institution moved up (negative if it moved down)
+    regions : list
+        The regions of the later year, indexed by code
+    region_codes : numpy.ndarray or array.array
+        The code of the region of each Institution in the later year
+    entered_count : int
+        The number of Institutions ranked in the later year only
+    left_count : int
+        The number of Institutions ranked in the earlier year only
+    """
+
+    def __init__(self, earlier_dataset, later_dataset, earlier_label, later_label):
+        self.earlier_label = earlier_label
+        self.later_label = later_label
+        earlier_index = get_name_index(earlier_dataset)
+        later_index = get_name_index(later_dataset)
+        # Probing the earlier year's index with every Institution of the later year - one lookup per row
+        self.names = []
+        earlier_rows = array("q")
+        later_rows = array("q")
+        for name, later_row in later_index.items():
+            earlier_row = earlier_index.get(name)
+            if earlier_row is not None:
+                self.names.append(name)
+                earlier_rows.append(earlier_row)
+                later_rows.append(later_row)
+        self.entered_count = len(later_index) - len(self.names)
+        self.left_count = len(earlier_index) - len(self.names)
+
+        self.overall_changes = subtract(gather(later_dataset.get_column("Overall"), later_rows, "d"),
+                                        gather(earlier_dataset.get_column("Overall"), earlier_rows, "d"), "d")
+        self.academic_reputation_changes = subtract(
+            gather(later_dataset.get_column("Academic Reputation"), later_rows, "d"),
+            gather(earlier_dataset.get_column("Academic Reputation"), earlier_rows, "d"), "d")
+        self.rank_movements = subtract(gather(earlier_dataset.get_column("Rank"), earlier_rows, "q"),
+                                       gather(later_dataset.get_column("Rank"), later_rows, "q"), "q")
+        self.regions = list(later_dataset.categories["Region"])
+        self.region_codes = gather(later_dataset.get_category_codes("Region"), later_rows, "i")
+
+    def __len__(self):
+        return len(self.names)
+
+    def get_region_changes(self, numerical_column):
+        """
+        Aggregates the changes of a numerical column by the region of the Institutions in the later year
+
+        Parameters
+        ----------
+        numerical_column : str
+            The numerical column whose changes are aggregated - Overall, Academic Reputation or Rank
+
+        Returns
+        -------
+        GroupedStatistics
+            The aggregates of the changes in every region, the changes of Rank being the rank movements
+        """
+        changes, typecode = {"Overall": (self.overall_changes, "d"),
+                             "Academic Reputation": (self.academic_reputation_changes, "d"),
+                             "Rank": (self.rank_movements, "q")}[numerical_column]
+        return group_values("Region", numerical_column, self.regions, self.region_codes, changes, typecode)
+
+    def get_rank_movement_distribution(self, bin_width=RANK_MOVEMENT_BIN_WIDTH):
+        """
+        Counts the rank movements in bins of equal width
+
+        Parameters
+        ----------
+        bin_width : int
+            The number of places covered by every bin
+
+        Returns
+        -------
+        dict
+            A dictionary with the first movement of every non-empty bin as keys, in increasing order, and the number
+            of Institutions whose movement is in the bin as values
+        """
+        if len(self) == 0:
+            return {}
+        if numpy is not None:
+            bins = numpy.floor_divide(self.rank_movements, bin_width)
+            first_bin = int(bins.min())
+            counts = numpy.bincount(bins - first_bin).tolist()
+            return {(first_bin + index) * bin_width: count for index, count in enumerate(counts) if count}
+        counts = {}
+        for movement in self.rank_movements:
+            bin_start = movement // bin_width * bin_width
+            counts[bin_start] = counts.get(bin_start, 0) + 1
+        return dict(sorted(counts.items()))
+
+    def get_largest_movements(self, count=LARGEST_MOVEMENT_COUNT):
+        """
+        Returns the Institutions that moved up and down the most places
+
+        Parameters
+        ----------
+        count : int
+            The number of Institutions of each direction
+
+        Returns
+        -------
+        tuple
+            The lists of (name, movement) tuples of the largest rises and of the largest falls
+        """
+        order = sorted(range(len(self)), key=self.rank_movements.__getitem__)
+        rises = [(self.names[index], int(self.rank_movements[index])) for index in reversed(order[-count:])
+                 if self.rank_movements[index] > 0]
+        falls = [(self.names[index], int(self.rank_movements[index])) for index in order[:count]
+                 if self.rank_movements[index] < 0]
+        return rises, falls
+
+
+def display_year_comparison(comparison):
+    """
+    Displays the changes of the Institutions ranked in two years, overall and by region
+
+    Parameters
+    ----------
+    comparison : YearComparison
+        The comparison of the two years
+
+    Returns
+    -------
+    None - default
+    """
+    title = f"| Year-over-year comparison: {comparison.earlier_label} to {comparison.later_label} |"
+    print()
+    print("-" * len(title))
+    print(title)
+    print("-" * len(title))
+    print()
+    print(f"Institutions ranked in both years: {len(comparison)}")
+    print(f"Institutions ranked in {comparison.later_label} only: {comparison.entered_count}")
+    print(f"Institutions ranked in {comparison.earlier_label} only: {comparison.left_count}")
+    if len(comparison) == 0:
+        return
+
+    overall_changes = comparison.get_region_changes("Overall")
+    academic_reputation_changes = comparison.get_region_changes("Academic Reputation")
+    rank_movements = comparison.get_region_changes("Rank")
+    print(f"Average change in Overall score: {sum(overall_changes.sums) / len(comparison):+.2f}")
+    print(f"Average change in Academic Reputation score: "
+          f"{sum(academic_reputation_changes.sums) / len(comparison):+.2f}")
+    moved_up_count = sum(1 for movement in comparison.rank_movements if movement > 0)
+    moved_down_count = sum(1 for movement in comparison.rank_movements if movement < 0)
+    print(f"Institutions moving up / down / keeping their rank: {moved_up_count} / {moved_down_count} / "
+          f"{len(comparison) - moved_up_count - moved_down_count}")
+    lower_quartile, median, upper_quartile = get_cached_statistic("get_quartiles", comparison.rank_movements)
+    print(f"Rank movement quartiles: {lower_quartile:+g} / {median:+g} / {upper_quartile:+g}")
+    rises, falls = comparison.get_largest_movements()
+    for label, movements in (("Largest rises", rises), ("Largest falls", falls)):
+        if movements:
+            print(f"{label}: " + ", ".join(f"{name} ({movement:+d})" for name, movement in movements))
+
+    print()
+    print(f"Rank movement distribution (places moved up, in bins of {RANK_MOVEMENT_BIN_WIDTH})")
+    print("-------------------------------------------------------------")
+    distribution = comparison.get_rank_movement_distribution()
+    bar_scale = max(distribution.values()) / 40
+    for bin_start, count in distribution.items():
+        print(f"{bin_start:>+7d} to {bin_start + RANK_MOVEMENT_BIN_WIDTH - 1:>+7d}: {count:>7} "
+              f"{'#' * max(1, round(count / bar_scale))}")
+
+    print()
+    print("Changes by region")
+    print("-----------------")
+    region_width = max(len("Region"), *(len(region) for region in comparison.regions))
+    print(f"{'Region':<{region_width}} {'Institutions':>12} {'Overall':>9} {'Academic Reputation':>19} "
+          f"{'Rank movement':>13}")
+    for code, region in enumerate(comparison.regions):
+        if overall_changes.counts[code]:
+            print(f"{region:<{region_width}} {overall_changes.counts[code]:>12} {overall_changes.means[code]:>+9.2f} "
+                  f"{academic_reputation_changes.means[code]:>+19.2f} {rank_movements.means[code]:>+13.1f}")
+
+
+def run_year_comparison(file_paths, worker_count=1):
+    """
+    Loads the dataset files of several years concurrently and displays the comparison of every year with the previous
+    one, the years being ordered by their labels
+
+    Parameters
+    ----------
+    file_paths : list
+        The paths of the dataset files
+    worker_count : int
+        The number of worker processes loading the files, 0 for one per CPU
+
+    Returns
+    -------
+    int
+        The exit status - 0 if every file was loaded and compared, 1 otherwise
+    """
+    labels = [get_year_label(file_path) for file_path in file_paths]
+    if len(set(labels)) < len(labels):
+        # Telling apart the files whose names give the same year
+        labels = [path.basename(file_path) for file_path in file_paths]
+    try:
+        loaded_datasets = load_datasets_concurrently(file_paths, worker_count)
+    except FileNotFoundError as error:
+        print("File not found:", error.filename)
+        return 1
+    years = sorted(zip(labels, loaded_datasets), key=lambda year: year[0])
+    for label, (dataset, quarantine) in years:
+        print(f"{label}: {len(dataset)} Institutions")
+        if quarantine.rejected_count:
+            print(quarantine.get_summary())
+    for (earlier_label, (earlier_dataset, _)), (later_label, (later_dataset, _)) in zip(years, years[1:]):
+        display_year_comparison(YearComparison(earlier_dataset, later_dataset, earlier_label, later_label))
+    return 0